@@ -242,16 +242,31 @@ class CorrFigureManager(FigureManager):
         verbose=1, debug=0, **kwargs):
         """
         Draws dataset
+
+        Arguments:
+          subplot (Axes): Axes on which to draw
+          dataset_kw (dict): Keyword arguments passed to
+            :meth:`load_dataset
+            <myplotspec.FigureManager.FigureManager.load_dataset>`
+          dataset_cache_size (int, optional): Size in bytes of cache of
+            previously-loaded datasets above which least-recently-used
+            datasets are evicted; see
+            :class:`DatasetCache<moldynplot.cache.DatasetCache>`
+          verbose (int): Level of verbose output
+          debug (int): Level of debug output
+          kwargs (dict): Additional keyword arguments
         """
         from os.path import expandvars
         from warnings import warn
         import numpy as np
         import pandas as pd
+        from .cache import use_dataset_cache
         from .myplotspec import get_colors, multi_get_copy
 
         # Load data
         dataset_kw = multi_get_copy("dataset_kw", kwargs, {})
         if "cls" in dataset_kw and dataset_kw["cls"] is not None:
+            use_dataset_cache(self, kwargs.get("dataset_cache_size"), verbose)
             dataset = self.load_dataset(verbose=verbose, debug=debug,
               **dataset_kw)
             dataframe = dataset.dataframe
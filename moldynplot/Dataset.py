@@ -33,6 +33,8 @@ import pandas as pd
 pd.set_option('display.width', 120)
 from .myplotspec.Dataset import Dataset
 from .myplotspec import sformat, wiprint
+from .cache import open_disk_cache
+from .formats import HDF5TimeSeries, cast_dtype, get_dtype
 ################################### CLASSES ###################################
 class SequenceDataset(Dataset):
     """
@@ -114,6 +116,41 @@ class SequenceDataset(Dataset):
                          first infile; may contain environment variables""")
         except argparse.ArgumentError:
             pass
+        try:
+            input_group.add_argument(
+              "-dtype",
+              required = False,
+              type     = str,
+              help     = """Data type in which to hold values (e.g. float32),
+                         or kind of cpptraj output (e.g. secstruct); by
+                         default values are held as read""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            input_group.add_argument(
+              "-disk_cache",
+              required = False,
+              type     = str,
+              metavar  = "DIRECTORY",
+              help     = """Directory of persistent cache of processed data,
+                         reused if infiles and processing parameters are
+                         unchanged""")
+        except argparse.ArgumentError:
+            pass
+
+        # Output arguments
+        output_group = arg_groups.get("output",
+          parser.add_argument_group("output"))
+        try:
+            output_group.add_argument(
+              "-hdf5_layout",
+              required = False,
+              type     = str,
+              help     = """storage layout of hdf5 outfile; may be 'auto',
+                         'frames', 'columns', 'balanced', 'compact', 'fast',
+                         or 'lossless'""")
+        except argparse.ArgumentError:
+            pass
 
         # Arguments inherited from superclass
         Dataset.construct_argparser(parser)
@@ -144,13 +181,20 @@ class SequenceDataset(Dataset):
             use_indexes = tuple(kwargs.get("use_indexes"))
         else:
             use_indexes = None
+        residues = kwargs.get("residues")
+        if isinstance(residues, list):
+            residues = tuple(residues)
         for key, value in kwargs.get("read_csv_kw", {}).items():
             if isinstance(value, list):
                 value = tuple(value)
             read_csv_kw.append((key, value))
-        return (cls, tuple(infiles), use_indexes, tuple(read_csv_kw))
+        dtype = kwargs.get("dtype")
+        if dtype is not None:
+            dtype = str(dtype)
+        return (cls, tuple(infiles), use_indexes, residues, dtype,
+          tuple(read_csv_kw))
 
-    def __init__(self, calc_pdist=False, outfile=None,
+    def __init__(self, calc_pdist=False, dtype=None, outfile=None,
         interactive=False, **kwargs):
         """
         Arguments:
@@ -158,9 +202,32 @@ class SequenceDataset(Dataset):
             environment variables and wildcards
           use_indexes (list): Residue indexes to select from DataFrame,
             once DataFrame has already been loaded
+          residues (int, str, list, optional): Residues to select from
+            DataFrame, by number, range of numbers, name, or regular
+            expression; see
+            :func:`select_residues<moldynplot.formats.select_residues>`
+          dtype (str, dtype, optional): Data type in which to hold
+            values (e.g. 'float32'), or kind of cpptraj output; see
+            :func:`get_dtype<moldynplot.formats.get_dtype>`. By default
+            values are held as read
           calc_pdist (bool): Calculate probability distribution
             using :meth:`calc_pdist`
           dataset_cache (dict): Cache of previously-loaded Datasets
+          disk_cache (str, optional): Directory of persistent cache of
+            processed data, reused by later runs if infiles and
+            processing parameters are unchanged; see
+            :class:`DiskCache<moldynplot.cache.DiskCache>`
+          disk_cache_size (int, optional): Size of disk cache in bytes
+            above which least-recently-used entries are evicted
+          disk_cache_hash (bool): Identify infiles in disk cache by
+            digest of their contents rather than modification time
+          hdf5_layout (str, dict, optional): Storage layout used when
+            writing hdf5 *outfile*; see
+            :data:`hdf5_layouts<moldynplot.cpptraj2hdf5.hdf5_layouts>`
+          pyramid (list, optional): Factors by which to reduce each
+            level of multi-resolution pyramid written alongside hdf5
+            *outfile*; if empty,
+            :data:`pyramid_factors<moldynplot.cpptraj2hdf5.pyramid_factors>`
           interactive (bool): Provide iPython prompt and reading and
             processing data
           verbose (int): Level of verbose output
@@ -171,31 +238,71 @@ class SequenceDataset(Dataset):
         verbose = kwargs.get("verbose", 1)
         self.dataset_cache = kwargs.get("dataset_cache", None)
 
-        # Read data
-        self.sequence_df = self.read(**kwargs)
-        if verbose >= 2:
-            wiprint("Processed sequence DataFrame:")
-            print(self.sequence_df)
+        # Restore processed data from disk cache
+        cache, cache_key = open_disk_cache(type(self),
+          dict(calc_pdist=calc_pdist, dtype=dtype), **kwargs)
+        state = cache.load(cache_key) if cache is not None else None
+        if state is not None:
+            if verbose >= 1:
+                wiprint("""Restored processed data from disk cache
+                        '{0}'""".format(cache.path))
+            self.__dict__.update(state)
+        else:
+            # Read data
+            self.sequence_df = cast_dtype(self.read(**kwargs), dtype)
+            if verbose >= 2:
+                wiprint("Processed sequence DataFrame:")
+                print(self.sequence_df)
 
-        # Cut data
-        if "use_indexes" in kwargs:
-            use_indexes = np.array(kwargs.pop("use_indexes"))
-            res_index = np.array([int(i.split(":")[1])
-              for i in self.sequence_df.index.values])
-            self.sequence_df = self.sequence_df[np.in1d(res_index,use_indexes)]
+            # Cut data
+            if "use_indexes" in kwargs:
+                use_indexes = np.array(kwargs.pop("use_indexes"))
+                res_index = np.array([int(i.split(":")[1])
+                  for i in self.sequence_df.index.values])
+                self.sequence_df = self.sequence_df[np.in1d(res_index,
+                  use_indexes)]
+            if kwargs.get("residues") is not None:
+                from .formats import select_residues
 
-        # Calculate probability distribution
-        if calc_pdist:
-            self.pdist_df = self.calc_pdist(df=self.sequence_df, **kwargs)
+                self.sequence_df = self.sequence_df.loc[select_residues(
+                  self.sequence_df.index, kwargs.pop("residues"))]
+
+            # Calculate probability distribution
+            if calc_pdist:
+                self.pdist_df = self.calc_pdist(df=self.sequence_df, **kwargs)
+
+            # Store processed data in disk cache
+            if cache is not None:
+                cache.store(cache_key, dict((a, getattr(self, a)) for a in
+                  ["sequence_df", "pdist_df"] if hasattr(self, a)))
 
         # Write data
         if outfile is not None:
+            self.set_hdf5_layout(df=self.sequence_df, **kwargs)
             self.write(df=self.sequence_df, outfile=outfile, **kwargs)
 
         # Interactive prompt
         if interactive:
             embed()
 
+    def set_hdf5_layout(self, df, hdf5_layout=None, **kwargs):
+        """
+        Configures storage layout used when writing hdf5.
+
+        Arguments:
+          df (DataFrame): DataFrame to be written
+          hdf5_layout (str, dict, optional): Storage layout; see
+            :data:`hdf5_layouts<moldynplot.cpptraj2hdf5.hdf5_layouts>`
+          kwargs (dict): Additional keyword arguments
+        """
+        from .cpptraj2hdf5 import get_hdf5_kw
+
+        if hdf5_layout is None:
+            return
+        hdf5_kw = getattr(self, "default_hdf5_kw", {})
+        self.default_hdf5_kw = get_hdf5_kw(hdf5_layout, df.shape,
+          hdf5_kw.get("dtype", df.values.dtype), hdf5_kw.get("scaleoffset"))
+
     def _read_index(self, df, indexfile=None, **kwargs):
         """
         Reads index for sequence DataFrame.
@@ -279,7 +386,12 @@ class SequenceDataset(Dataset):
             bandwidth for each column; for any column for which
             *bandwidth* is not specified, the standard deviation will be
             used; alternatively may be 'se', in which case the standard
-            error of each value will be used
+            error of each value, in the column of the same name followed
+            by ' se', will be used; values lacking a finite, positive
+            standard error are omitted
+          pdist_kw[n_processes] (int): Number of processes with which to
+            calculate the probability distributions of columns in
+            parallel; see :func:`calc_pdists<moldynplot.stats.calc_pdists>`
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
 
@@ -290,8 +402,8 @@ class SequenceDataset(Dataset):
           normalized probability at each grid point
         """
         from collections import OrderedDict
-        from scipy.stats import norm
         import six
+        from .stats import calc_pdist, calc_pdists
 
         # Process arguments
         verbose = kwargs.get("verbose", 1)
@@ -330,8 +442,8 @@ class SequenceDataset(Dataset):
                     grid[column] = all_grid
                 else:
                     grid[column] = np.linspace(
-                      series.min() - 3 * series.std(),
-                      series.max() + 3 * series.std(), 1000)
+                      float(series.min()) - 3 * float(series.std()),
+                      float(series.max()) + 3 * float(series.std()), 1000)
 
             # Prepare bandwidths:
             bandwidth = pdist_kw.pop("bandwidth", None)
@@ -348,30 +460,43 @@ class SequenceDataset(Dataset):
             elif isinstance(bandwidth, dict):
                 all_bandwidth = None
                 pass
+            if bandwidth == "se":
+                bandwidth = {}
+                for column in columns:
+                    if column + " se" not in df.columns:
+                        raise ValueError("bandwidth 'se' requires column "
+                          "'{0} se', which is not present".format(column))
+                    bandwidth[column] = df[column + " se"].values
             for column, series in df[columns].iteritems():
                 if column in bandwidth:
-                    bandwidth[column] = float(bandwidth[column])
+                    if np.ndim(bandwidth[column]) == 0:
+                        bandwidth[column] = float(bandwidth[column])
                 elif all_bandwidth is not None:
                     bandwidth[column] = all_bandwidth
                 else:
-                    bandwidth[column] = series.std()
+                    bandwidth[column] = float(series.std())
 
             # Calculate probability distributions
-            pdist = OrderedDict()
-            for column in columns:
+            n_processes = pdist_kw.get("n_processes", 1)
+            if n_processes > 1:
                 if verbose >= 1:
-                    print("calculating probability distribution of "
-                    "{0} using a kernel density estimate".format(column))
-                g = grid[column]
-                b = bandwidth[column]
-                pdf = np.zeros_like(g)
-                for residue, row in df.iterrows():
-                    if np.isnan(row[column]):
-                        continue
-#                    c = norm(loc=b[column], scale=b[column+" se"])
-                    pdf += norm(loc=row[column], scale=b).pdf(g)
-                pdf /= pdf.sum()
-                series_pdist = pd.DataFrame(pdf, index=g,
+                    print("calculating probability distributions of {0} "
+                      "columns using a kernel density estimate with {1} "
+                      "processes".format(len(columns), n_processes))
+                pdfs = calc_pdists(df[columns].values,
+                  [grid[c] for c in columns], [bandwidth[c] for c in columns],
+                  "norm", n_processes=n_processes)
+            else:
+                pdfs = []
+                for column in columns:
+                    if verbose >= 1:
+                        print("calculating probability distribution of "
+                        "{0} using a kernel density estimate".format(column))
+                    pdfs.append(calc_pdist(df[column].values, grid[column],
+                      bandwidth[column], "norm"))
+            pdist = OrderedDict()
+            for column, pdf in zip(columns, pdfs):
+                series_pdist = pd.DataFrame(pdf, index=grid[column],
                   columns=["probability"])
                 series_pdist.index.name = column
                 pdist[column] = series_pdist
@@ -461,23 +586,182 @@ class TimeSeriesDataset(Dataset):
               help     = """Factor by which to downsample data""")
         except argparse.ArgumentError:
             pass
+        try:
+            action_group.add_argument(
+              "-tmin",
+              required = False,
+              type     = float,
+              help     = """First time to read; rows preceding are not read""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            action_group.add_argument(
+              "-tmax",
+              required = False,
+              type     = float,
+              help     = """Last time to read; rows following are not read""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            action_group.add_argument(
+              "-stride",
+              required = False,
+              type     = float,
+              help     = """Interval of time between rows to read""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            action_group.add_argument(
+              "-max_points",
+              required = False,
+              type     = int,
+              help     = """Maximum number of points; longer data is
+                         downsampled, using a multi-resolution pyramid if
+                         available""")
+        except argparse.ArgumentError:
+            pass
+
+        # Input arguments
+        try:
+            input_group.add_argument(
+              "-cpptraj_sidecar",
+              action   = "store_true",
+              help     = """Cache cpptraj text infiles in hdf5 sidecars,
+                         which are read in place of infiles that have not
+                         changed""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            input_group.add_argument(
+              "-residues",
+              required = False,
+              type     = str,
+              nargs    = "+",
+              metavar  = "RESIDUE",
+              help     = """Residues (columns) to read, by number (e.g. 12),
+                         range of numbers (e.g. 1-20), name (e.g. PRO:12),
+                         or regular expression (e.g. 'GL.:.*'); other
+                         columns are not read""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            input_group.add_argument(
+              "-dtype",
+              required = False,
+              type     = str,
+              help     = """Data type in which to hold values (e.g. float32),
+                         or kind of cpptraj output (e.g. secstruct); by
+                         default values are held as read""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            input_group.add_argument(
+              "-disk_cache",
+              required = False,
+              type     = str,
+              metavar  = "DIRECTORY",
+              help     = """Directory of persistent cache of processed data,
+                         reused if infiles and processing parameters are
+                         unchanged""")
+        except argparse.ArgumentError:
+            pass
+
+        # Output arguments
+        try:
+            output_group.add_argument(
+              "-hdf5_layout",
+              required = False,
+              type     = str,
+              help     = """storage layout of hdf5 outfile; may be 'auto',
+                         'frames', 'columns', 'balanced', 'compact', 'fast',
+                         or 'lossless'""")
+        except argparse.ArgumentError:
+            pass
+        try:
+            output_group.add_argument(
+              "-pyramid",
+              required = False,
+              type     = int,
+              nargs    = "*",
+              metavar  = "FACTOR",
+              help     = """write multi-resolution pyramid of levels reduced
+                         by each factor alongside hdf5 outfile (default
+                         factors: 10 100 1000)""")
+        except argparse.ArgumentError:
+            pass
+
         # Arguments inherited from superclass
         Dataset.construct_argparser(parser)
 
         return parser
 
-    def __init__(self, dt=None, toffset=None, downsample=None,
-        calc_pdist=False, outfile=None, interactive=False, **kwargs):
+    def __init__(self, dt=None, toffset=None, tmin=None, tmax=None,
+        stride=None, dtype=None, downsample=None, max_points=None,
+        calc_error=False, calc_pdist=False, outfile=None, interactive=False,
+        lazy=False, pyramid=None, **kwargs):
         """
         Arguments:
           infile{s} (list): Path(s) to input file(s); may contain
             environment variables and wildcards
+          lazy (bool): If a single hdf5 infile is provided, back
+            *timeseries_df* by the open hdf5 dataset, reading only the
+            rows and columns that are accessed; see
+            :class:`HDF5TimeSeries<moldynplot.formats.HDF5TimeSeries>`.
+            Enabled automatically when downsampling using the mean a
+            single hdf5 infile that has a multi-resolution pyramid
           dt (float): Time interval between points; units unspecified
           toffset (float): Time offset to be added to all points (i.e.
             time of first point)
+          tmin (float, optional): First time to read, after applying
+            *dt* and *toffset*
+          tmax (float, optional): Last time to read, after applying *dt*
+            and *toffset*
+          stride (float, optional): Interval of time between points to
+            read. The window and stride are converted to units of the
+            index as stored using *dt* and *toffset*, and pushed down
+            into reading: as hyperslab selections for hdf5 infiles, and
+            by parsing only the selected lines of cpptraj text infiles
+          residues (int, str, list, optional): Residues (columns) to
+            read, by number, range of numbers, name, or regular
+            expression; see
+            :func:`select_residues<moldynplot.formats.select_residues>`.
+            Only the selected columns of hdf5 infiles are read, and only
+            the selected fields of cpptraj text infiles are parsed
+          dtype (str, dtype, optional): Data type in which to hold
+            values through reading and downsampling (e.g. 'float32'), or
+            kind of cpptraj output, whose data type is float32 for
+            continuous kinds and uint8 for categorical kinds such as
+            'secstruct'; see :func:`get_dtype
+            <moldynplot.formats.get_dtype>`. cpptraj text infiles are
+            parsed directly into floating-point *dtype*; other infiles
+            are cast once read. Values are converted to double precision
+            only within reductions: downsampling using the mean, and
+            calculation of standard error and probability distribution.
+            By default values are held as read
+          cpptraj_sidecar (bool): Read cpptraj text infiles from hdf5
+            sidecars if up to date; otherwise parse text and write
+            sidecars
+          disk_cache (str, optional): Directory of persistent cache of
+            processed data, reused by later runs if infiles and
+            processing parameters are unchanged; see
+            :class:`DiskCache<moldynplot.cache.DiskCache>`
+          disk_cache_size (int, optional): Size of disk cache in bytes
+            above which least-recently-used entries are evicted
+          disk_cache_hash (bool): Identify infiles in disk cache by
+            digest of their contents rather than modification time
+          n_threads (int, optional): Number of threads with which to
+            parse cpptraj text infiles
           downsample (int): Interval by which to downsample points
+          max_points (int, optional): Maximum number of points; longer
+            time series are downsampled by the smallest interval
+            yielding at most this many, rounded up to a multiple of the
+            coarsest suitable level of pyramid, if any
           downsample_mode (str): Method of downsampling; may be 'mean'
             or 'mode'
+          calc_error (bool): Calculate mean and standard error of each
+            column using :meth:`calc_error`
+          error_method (str): Method of calculating standard error; may
+            be 'blocking' or 'autocorrelation'
           pdist (bool): Calculate probability distribution
           pdist_key (str): Column of which to calculate probability
             distribution
@@ -485,42 +769,113 @@ class TimeSeriesDataset(Dataset):
             sklearn.neighbors.KernelDensity; key argument is 'bandwidth'
           grid (ndarray): Grid on which to calculate probability
             distribution
+          hdf5_layout (str, dict, optional): Storage layout used when
+            writing hdf5 *outfile*; see
+            :data:`hdf5_layouts<moldynplot.cpptraj2hdf5.hdf5_layouts>`
           interactive (bool): Provide iPython prompt and reading and
             processing data
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
 
           .. todo:
-            - Calculate pdist using histogram
             - Verbose pdist
         """
 
         # Process arguments
         verbose = kwargs.get("verbose", 1)
-
-        # Load
-        self.timeseries_df = self.read(**kwargs)
-
-        # Convert from frame index to time
-        if dt is not None:
-            self.timeseries_df.set_index(self.timeseries_df.index.values *
-              float(dt), inplace=True)
-            self.timeseries_df.index.name = "time"
-
-        # Offset time
-        if toffset is not None:
-            index_name = self.timeseries_df.index.name
-            self.timeseries_df.set_index(self.timeseries_df.index.values +
-              float(toffset), inplace=True)
-            self.timeseries_df.index.name = index_name
-
-        # Downsample
-        if downsample:
-            self.timeseries_df = self.downsample(downsample, **kwargs)
-
-        # Calculate probability distibution
-        if calc_pdist:
-            self.pdist_df = self.calc_pdist(**kwargs)
+        if tmin is not None or tmax is not None or stride is not None:
+            scale = float(dt) if dt is not None else 1.0
+            shift = float(toffset) if toffset is not None else 0.0
+            kwargs["frames"] = (
+              (float(tmin) - shift) / scale if tmin is not None else None,
+              (float(tmax) - shift) / scale if tmax is not None else None,
+              float(stride) / scale if stride is not None else None)
+        if dtype is not None:
+            kwargs["dtype"] = get_dtype(dtype)
+
+        # Restore processed data from disk cache
+        cache, cache_key = None, None
+        if not lazy:
+            cache, cache_key = open_disk_cache(type(self), dict(dt=dt,
+              toffset=toffset, tmin=tmin, tmax=tmax, stride=stride,
+              downsample=downsample, max_points=max_points,
+              calc_error=calc_error, calc_pdist=calc_pdist), **kwargs)
+        state = cache.load(cache_key) if cache is not None else None
+        if state is not None:
+            if verbose >= 1:
+                wiprint("""Restored processed data from disk cache
+                        '{0}'""".format(cache.path))
+            self.__dict__.update(state)
+        else:
+            # Load
+            self.timeseries_df = None
+            pyramid_timeseries = None
+            if lazy:
+                self.timeseries_df = self.read_lazy(**kwargs)
+            elif ((downsample or max_points)
+            and kwargs.get("downsample_mode", "mean") == "mean"):
+                lazy_kw = kwargs.copy()
+                lazy_kw["verbose"] = 0
+                timeseries = self.read_lazy(**lazy_kw)
+                if timeseries is not None and timeseries.pyramid_factors:
+                    if verbose >= 1:
+                        wiprint("""Opening '{0}' for lazy reading from
+                                pyramid""".format(self.infiles[0]))
+                    self.timeseries_df = pyramid_timeseries = timeseries
+                elif timeseries is not None:
+                    timeseries.close()
+            if self.timeseries_df is None:
+                self.timeseries_df = cast_dtype(self.read(**kwargs),
+                  kwargs.get("dtype"))
+            lazy = isinstance(self.timeseries_df, HDF5TimeSeries)
+
+            # Convert from frame index to time
+            if dt is not None and lazy:
+                self.timeseries_df = self.timeseries_df.scale_index(float(dt),
+                  "time")
+            elif dt is not None:
+                self.timeseries_df.set_index(self.timeseries_df.index.values *
+                  float(dt), inplace=True)
+                self.timeseries_df.index.name = "time"
+
+            # Offset time
+            if toffset is not None and lazy:
+                self.timeseries_df = self.timeseries_df.shift_index(
+                  float(toffset))
+            elif toffset is not None:
+                index_name = self.timeseries_df.index.name
+                self.timeseries_df.set_index(self.timeseries_df.index.values +
+                  float(toffset), inplace=True)
+                self.timeseries_df.index.name = index_name
+
+            # Downsample
+            if max_points and len(self.timeseries_df) > max_points:
+                needed = -(-len(self.timeseries_df) // max_points)
+                factors = [f for f in getattr(self.timeseries_df,
+                  "pyramid_factors", []) if f <= needed]
+                if len(factors) > 0:
+                    needed = -(-needed // max(factors)) * max(factors)
+                downsample = max(downsample or 1, needed)
+            if downsample:
+                self.timeseries_df = self.downsample(downsample, **kwargs)
+            if (pyramid_timeseries is not None
+            and not isinstance(self.timeseries_df, HDF5TimeSeries)):
+                pyramid_timeseries.close()
+
+            # Calculate standard error
+            if calc_error:
+                self.error_df = self.calc_error(**kwargs)
+
+            # Calculate probability distibution
+            if calc_pdist:
+                self.pdist_df = self.calc_pdist(**kwargs)
+
+            # Store processed data in disk cache
+            if (cache is not None
+            and not isinstance(self.timeseries_df, HDF5TimeSeries)):
+                cache.store(cache_key, dict((a, getattr(self, a)) for a in
+                  ["timeseries_df", "error_df", "pdist_df"]
+                  if hasattr(self, a)))
 
         # Output to screen
         if verbose >= 2:
@@ -529,24 +884,274 @@ class TimeSeriesDataset(Dataset):
 
         # Write data
         if outfile is not None:
-            self.write(df=self.timeseries_df, outfile=outfile, **kwargs)
+            df = self.timeseries_df
+            if isinstance(df, HDF5TimeSeries):
+                df = df.load()
+            self.set_hdf5_layout(df=df, **kwargs)
+            self.write(df=df, outfile=outfile, **kwargs)
+            if pyramid is not None:
+                self.write_pyramid(outfile, pyramid, **kwargs)
 
         # Interactive prompt
         if interactive:
             embed()
 
-    def downsample(self, downsample, downsample_mode="mean", **kwargs):
+    def write_pyramid(self, outfile, pyramid=None, **kwargs):
+        """
+        Writes multi-resolution pyramid alongside time series in hdf5.
+
+        Arguments:
+          outfile (str): Path to hdf5 file to which time series has been
+            written, and (optionally) address within the file in the
+            form ``/path/to/file.h5:address``; may contain environment
+            variables
+          pyramid (list, optional): Factors by which to reduce each
+            level; if empty,
+            :data:`pyramid_factors<moldynplot.cpptraj2hdf5.pyramid_factors>`
+          verbose (int): Level of verbose output
+          kwargs (dict): Additional keyword arguments
+        """
+        from os.path import expandvars
+        from .cpptraj2hdf5 import write_pyramid
+        from .formats import get_hdf5_node, split_hdf5_address
+
+        # Process arguments
+        verbose = kwargs.get("verbose", 1)
+        path, address = split_hdf5_address(expandvars(outfile))
+        if path is None:
+            raise ValueError("Pyramid may only be written alongside time "
+              "series in hdf5; '{0}' is not hdf5".format(outfile))
+
+        with h5py.File(path, "r+") as h5_file:
+            write_pyramid(get_hdf5_node(h5_file, address),
+              list(pyramid) or None, verbose=verbose)
+
+    def read_lazy(self, **kwargs):
+        """
+        Opens a single hdf5 infile as a lazily-read time series.
+
+        Arguments:
+          infile{s} (list): Path(s) to input file(s); may contain
+            environment variables and wildcards
+          frames (tuple, optional): First and last labels of index to
+            select, and interval between rows in units of index; see
+            :func:`select_window<moldynplot.formats.select_window>`
+          residues (int, str, list, optional): Residues (columns) to
+            select; see
+            :func:`select_residues<moldynplot.formats.select_residues>`
+          verbose (int): Level of verbose output
+          kwargs (dict): Additional keyword arguments
+
+        Returns:
+          HDF5TimeSeries: Time series, or None if infiles are not a
+          single hdf5 file
+        """
+        from .formats import select_residues, select_window, sniff_infile
+        from .myplotspec import multi_pop_merged
+
+        # Process arguments
+        verbose = kwargs.get("verbose", 1)
+        infile_args = multi_pop_merged(["infile", "infiles"], kwargs)
+        infiles = self.process_infiles(infiles=infile_args)
+        if len(infiles) != 1 or sniff_infile(infiles[0]) != "hdf5":
+            if verbose >= 2:
+                wiprint("""Lazy loading requires a single hdf5 infile;
+                        loading '{0}' eagerly""".format(infile_args))
+            return None
+
+        # Open time series
+        if verbose >= 1:
+            wiprint("""Opening '{0}' for lazy reading""".format(infiles[0]))
+        self.infiles = infiles
+        timeseries = HDF5TimeSeries(infiles[0])
+        if kwargs.get("residues") is not None:
+            timeseries = timeseries[select_residues(timeseries.columns,
+              kwargs["residues"])]
+        if kwargs.get("frames") is not None:
+            timeseries = select_window(timeseries, *kwargs["frames"])
+
+        return timeseries
+
+    def set_hdf5_layout(self, df, hdf5_layout=None, **kwargs):
+        """
+        Configures storage layout used when writing hdf5.
+
+        Arguments:
+          df (DataFrame): DataFrame to be written
+          hdf5_layout (str, dict, optional): Storage layout; see
+            :data:`hdf5_layouts<moldynplot.cpptraj2hdf5.hdf5_layouts>`
+          kwargs (dict): Additional keyword arguments
+        """
+        from .cpptraj2hdf5 import get_hdf5_kw
+
+        if hdf5_layout is None:
+            return
+        hdf5_kw = getattr(self, "default_hdf5_kw", {})
+        self.default_hdf5_kw = get_hdf5_kw(hdf5_layout, df.shape,
+          hdf5_kw.get("dtype", df.values.dtype), hdf5_kw.get("scaleoffset"))
+
+    def _read_hdf5(self, infile, frames=None, residues=None, dtype=None,
+        **kwargs):
+        """
+        Reads DataFrame from hdf5.
+
+        Extends :meth:`Dataset._read_hdf5` to transparently unpack
+        bit-packed datasets written by
+        :func:`process_cpptraj<moldynplot.cpptraj2hdf5.process_cpptraj>`;
+        other datasets are read by the superclass. Multi-resolution
+        pyramids stored alongside datasets are disregarded when
+        locating the dataset within the file. If *frames* or *residues*
+        is provided, only the selected hyperslab of rows and columns is
+        read. Values are held in the data type in which they are
+        stored, unless *dtype* is provided.
+
+        Arguments:
+          infile (str): Path to input hdf5 file and (optionally) address
+            within the file in the form ``/path/to/file.h5:address``
+          frames (tuple, optional): First and last labels of index to
+            read, and interval between rows in units of index; see
+            :func:`select_window<moldynplot.formats.select_window>`
+          residues (int, str, list, optional): Residues (columns) to
+            read; see
+            :func:`select_residues<moldynplot.formats.select_residues>`
+          dtype (dtype, optional): Data type of values; see
+            :func:`cast_dtype<moldynplot.formats.cast_dtype>`
+          kwargs (dict): Additional keyword arguments
+
+        Returns:
+          DataFrame: DataFrame
+        """
+        from os.path import expandvars
+        from .formats import (get_hdf5_node, read_hdf5, select_residues,
+          select_window, split_hdf5_address)
+
+        path, address = split_hdf5_address(expandvars(infile))
+        with h5py.File(path, "r") as h5_file:
+            node = get_hdf5_node(h5_file, address)
+            packed = (isinstance(node, h5py.Dataset)
+                      and "packbits" in node.attrs)
+            if address is None and node.name != "/":
+                infile = "{0}:{1}".format(path, node.name)
+        if frames is None and residues is None:
+            if packed:
+                return cast_dtype(read_hdf5(expandvars(infile)), dtype)
+            return cast_dtype(super(TimeSeriesDataset, self)._read_hdf5(
+              infile, **kwargs), dtype)
+
+        timeseries = HDF5TimeSeries(expandvars(infile))
+        try:
+            if residues is not None:
+                timeseries = timeseries[select_residues(timeseries.columns,
+                  residues)]
+            if frames is not None:
+                timeseries = select_window(timeseries, *frames)
+            return cast_dtype(timeseries.load(), dtype)
+        finally:
+            timeseries.close()
+
+    def _read_text(self, infile, cpptraj_sidecar=False, n_threads=None,
+        frames=None, residues=None, dtype=None, **kwargs):
+        """
+        Reads DataFrame from text.
+
+        Extends :meth:`Dataset._read_text` to parse cpptraj output in
+        '#Frame' format, including gzip and xz, in blocks using multiple
+        threads; other text is read by the superclass, as is cpptraj
+        output for which *read_csv_kw* requests more than renaming of
+        columns.
+
+        Arguments:
+          infile (str): Path to input file; may contain environment
+            variables
+          cpptraj_sidecar (bool): Read cpptraj output from hdf5 sidecar
+            if up to date; otherwise parse text and write sidecar
+          n_threads (int, optional): Number of threads with which to
+            parse cpptraj output; by default up to 4
+          frames (tuple, optional): First and last labels of index to
+            read, and interval between rows in units of index; lines of
+            cpptraj output outside of window are not parsed, while other
+            text is selected once read
+          residues (int, str, list, optional): Residues (columns) to
+            read; other fields of cpptraj output are not parsed, while
+            other text is selected once read; see
+            :func:`select_residues<moldynplot.formats.select_residues>`
+          dtype (dtype, optional): Data type of values; cpptraj output
+            is parsed directly into a floating-point *dtype*, while
+            other text, and output cast to an integer *dtype*, is cast
+            once read; see :func:`cast_dtype
+            <moldynplot.formats.cast_dtype>`
+          read_csv_kw (dict): Keyword arguments passed to
+            :func:`read_csv<pandas.read_csv>`
+          verbose (int): Level of verbose output
+          kwargs (dict): Additional keyword arguments
+
+        Returns:
+          DataFrame: DataFrame
+        """
+        from multiprocessing import cpu_count
+        from os.path import expandvars
+        from .cpptraj2hdf5 import read_cpptraj_fields
+        from .formats import (read_cpptraj, select_residues, select_window,
+          sniff_infile)
+
+        # Process arguments
+        verbose = kwargs.get("verbose", 1)
+        infile = expandvars(infile)
+        read_csv_kw = kwargs.get("read_csv_kw", {})
+        if (sniff_infile(infile) != "cpptraj"
+        or not set(read_csv_kw).issubset(
+          ["delim_whitespace", "sep", "header", "names", "index_col"])
+        or read_csv_kw.get("header", 0) not in [0, "infer"]
+        or read_csv_kw.get("index_col", 0) != 0):
+            df = super(TimeSeriesDataset, self)._read_text(infile, **kwargs)
+            if residues is not None:
+                df = df[select_residues(df.columns, residues)]
+            if frames is not None:
+                df = select_window(df, *frames)
+            return cast_dtype(df, dtype)
+        if n_threads is None:
+            n_threads = min(4, cpu_count())
+
+        # Read DataFrame
+        if verbose >= 1:
+            wiprint("""Reading DataFrame from '{0}' """.format(infile))
+        columns = None
+        if residues is not None:
+            columns = select_residues(read_cpptraj_fields(infile), residues)
+        parse_dtype = None
+        if dtype is not None and np.dtype(dtype).kind == "f":
+            parse_dtype = dtype
+        df = read_cpptraj(infile, dtype=parse_dtype, n_threads=n_threads,
+          sidecar=cpptraj_sidecar, frames=frames, columns=columns)
+        names = read_csv_kw.get("names")
+        if names is not None and len(names) == df.shape[1] + 1:
+            df.index.name = names[0]
+            df.columns = names[1:]
+
+        return cast_dtype(df, dtype)
+
+    def downsample(self, downsample, downsample_mode="mean", dtype=None,
+        **kwargs):
         """
         Downsamples time series.
 
+        Time series backed by hdf5 (see :meth:`read_lazy`) are reduced
+        out-of-core, one block at a time; see :meth:`iter_downsample`.
+        When downsampling using the mean, the coarsest suitable level of
+        the multi-resolution pyramid stored alongside the time series,
+        if any, is used in place of the full-resolution time series;
+        see :meth:`HDF5TimeSeries.get_level
+        <moldynplot.formats.HDF5TimeSeries.get_level>`.
+
         Arguments:
           downsample (int): Interval by which to downsample points
           downsample_mode (str): Method of downsampling; may be 'mean'
             or 'mode'
+          dtype (dtype, optional): Data type of downsampled values; see
+            :meth:`iter_downsample`
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
         """
-        from scipy.stats.mstats import mode
 
         # Process rguments
         verbose = kwargs.get("verbose", 1)
@@ -557,66 +1162,138 @@ class TimeSeriesDataset(Dataset):
             else:
                 raise()
 
-        # Truncate dataset
-        reduced = df.values[:df.shape[0] - (df.shape[0] % downsample),:]
-        new_shape = (int(reduced.shape[0]/downsample), downsample,
-          reduced.shape[1])
-        index = np.reshape(df.index.values[
-          :df.shape[0]-(df.shape[0] % downsample)],
-          new_shape[:-1]).mean(axis=1)
-        reduced = np.reshape(reduced, new_shape)
-
         # Downsample
-        if downsample_mode == "mean":
-            if verbose >= 1:
-                wiprint("downsampling by factor of {0} using mean".format(
-                  downsample))
-            reduced = np.squeeze(reduced.mean(axis=1))
-        elif downsample_mode == "mode":
-            if verbose >= 1:
-                wiprint("downsampling by factor of {0} using mode".format(
-                  downsample))
-            reduced = np.squeeze(mode(reduced, axis=1)[0])
-
-        # Store downsampled time series
-        reduced = pd.DataFrame(data=reduced, index=index,
-          columns=df.columns.values)
+        if verbose >= 1:
+            wiprint("downsampling by factor of {0} using {1}".format(
+              downsample, downsample_mode))
+        if isinstance(df, HDF5TimeSeries) and downsample_mode == "mean":
+            df, remaining = df.get_level(downsample)
+            if remaining != downsample:
+                if verbose >= 1:
+                    wiprint("""using pyramid level reduced by factor of
+                            {0}""".format(downsample // remaining))
+                downsample = remaining
+        blocks = list(self.iter_downsample(df, downsample, downsample_mode,
+          dtype=dtype))
+        if len(blocks) > 0:
+            reduced = pd.concat(blocks)
+        else:
+            reduced = pd.DataFrame(columns=df.columns.values,
+              dtype=dtype if dtype is not None else np.float64)
         reduced.index.name = "time"
         df = reduced
 
         return df
 
-#    def calc_error(self, error_method="std", **kwargs):
-#        """
-#        Calculates standard error using time series data.
-#
-#        .. todo:
-#          - Support breaking into blocks (essentially downsampling,
-#            then calculating standard error)
-#        """
-#
-#        # Arguments
-#        verbose = kwargs.get("verbose", 1)
-#        timeseries=self.timeseries
-#
-#        # Calculate standard error
-#        if error_method == "std":
-#            if verbose >= 1:
-#                print("calculating standard error using standard deviation")
-#            se = timeseries.std()
-#        elif error_method == "block":
-#            from .fpblockaverager.FPBlockAverager import FPBlockAverager
-#            if verbose >= 1:
-#                print("calculating standard error using block averaging")
-#            ba = FPBlockAverager(timeseries, **kwargs)
-#            se = ba.parameters.loc["exp", "a (se)"]
-#        else:
-#            if verbose >= 1:
-#                print("error_method '{0}' not understood, ".format(scale) +
-#                      "must be one of 'std', 'block'; not calculating error.")
-#            return
-#
-#        return se
+    @staticmethod
+    def iter_downsample(df, downsample, downsample_mode="mean",
+        block_size=None, dtype=None):
+        """
+        Downsamples time series one block at a time.
+
+        Each block spans a whole number of intervals, such that results
+        are identical to downsampling the complete time series at once;
+        points following the last complete interval are discarded.
+        Means are accumulated in double precision.
+
+        Arguments:
+          df (DataFrame, HDF5TimeSeries): Time series; if
+            :class:`HDF5TimeSeries<moldynplot.formats.HDF5TimeSeries>`,
+            blocks are read from hdf5 aligned to its chunks, and only
+            one block is held in memory at once
+          downsample (int): Interval by which to downsample points
+          downsample_mode (str): Method of downsampling; may be 'mean'
+            or 'mode'
+          block_size (int, optional): Approximate number of values per
+            block
+          dtype (dtype, optional): Data type of downsampled values; the
+            mean of values of an integer *dtype* is instead single
+            precision. By default, that of floating-point values, and
+            double precision otherwise
+
+        Yields:
+          DataFrame: Downsampled block
+        """
+        from .stats import block_mode
+
+        if downsample_mode not in ["mean", "mode"]:
+            raise ValueError("downsample_mode '{0}' not understood, ".format(
+              downsample_mode) + "must be one of 'mean', 'mode'")
+        if isinstance(df, HDF5TimeSeries):
+            blocks = df.iter_blocks(downsample, block_size)
+        else:
+            blocks = [df]
+
+        for block in blocks:
+            n_rows = block.shape[0] - (block.shape[0] % downsample)
+            if n_rows == 0:
+                continue
+            new_shape = (n_rows // downsample, downsample, block.shape[1])
+            index = np.reshape(block.index.values[:n_rows],
+              new_shape[:-1]).mean(axis=1)
+            values = block.values[:n_rows]
+            if dtype is not None:
+                reduced_dtype = np.dtype(dtype)
+                if downsample_mode == "mean" and reduced_dtype.kind != "f":
+                    reduced_dtype = np.dtype(np.float32)
+            elif values.dtype.kind == "f":
+                reduced_dtype = values.dtype
+            else:
+                reduced_dtype = np.dtype(np.float64)
+            reduced = np.reshape(values, new_shape)
+            if downsample_mode == "mean":
+                reduced = reduced.mean(axis=1, dtype=np.float64)
+            elif downsample_mode == "mode":
+                reduced = block_mode(reduced)
+            reduced = reduced.astype(reduced_dtype, copy=False)
+            reduced = pd.DataFrame(data=reduced, index=index,
+              columns=df.columns.values)
+            reduced.index.name = "time"
+            yield reduced
+
+    def calc_error(self, error_method="blocking", **kwargs):
+        """
+        Calculates mean and standard error of time series.
+
+        Arguments:
+          df (DataFrame, HDF5TimeSeries, optional): Time series; by
+            default *timeseries_df*
+          error_method (str): Method of calculating standard error; may
+            be 'blocking' or 'autocorrelation'; see
+            :func:`calc_se<moldynplot.stats.calc_se>`
+          verbose (int): Level of verbose output
+          kwargs (dict): Additional keyword arguments
+
+        Returns:
+          DataFrame: Single row containing the mean of each column,
+          each followed by its standard error in column '<column> se'
+        """
+        from .stats import calc_se
+
+        # Process arguments
+        verbose = kwargs.get("verbose", 1)
+        df      = kwargs.get("df")
+        if df is None:
+            if hasattr(self, "timeseries_df"):
+                df = self.timeseries_df
+            else:
+                raise()
+
+        # Calculate mean and standard error
+        if verbose >= 1:
+            wiprint("calculating standard error using {0}".format(
+              error_method))
+        se = calc_se(df, error_method)
+        if isinstance(df, HDF5TimeSeries):
+            mean = pd.Series([df[c].mean() for c in df.columns],
+              index=df.columns)
+        else:
+            mean = df.mean(axis=0)
+        error_df = pd.DataFrame([np.ravel(list(zip(mean.values,
+          se.values)))], columns=[name for column in df.columns for name
+          in (column, "{0} se".format(column))])
+
+        return error_df
 
     def calc_pdist(self, **kwargs):
         """
@@ -625,11 +1302,45 @@ class TimeSeriesDataset(Dataset):
         Arguments:
           pdist_kw (dict): Keyword arguments used to configure
             probability distribution calculation
+          pdist_kw[mode] (str): Method of calculating probability
+            distribution; may be 'kde' for a kernel density estimate
+            calculated by linear binning and FFT convolution (see
+            :func:`binned_kde<moldynplot.stats.binned_kde>`), 'sklearn'
+            for a kernel density estimate calculated by
+            :class:`KernelDensity<sklearn.neighbors.KernelDensity>`, or
+            'hist' for a histogram whose bins are centered on the grid
+            (see :func:`histogram<moldynplot.stats.histogram>`)
+          pdist_kw[bandwidth] (float, dict, optional): Bandwidth of
+            kernel density estimate; may be a single float that will be
+            applied to all columns or a dictionary whose keys are column
+            names and values are floats corresponding to the bandwidth
+            for each column; for any column for which *bandwidth* is not
+            specified, one tenth of the standard deviation will be used
+          pdist_kw[grid] (ndarray, dict, optional): Grid on which to
+            calculate probability distribution; may be a single ndarray
+            that will be applied to all columns or a dictionary whose
+            keys are column names and values are ndarrays corresponding
+            to the grid for each column; for any column for which *grid*
+            is not specified, a grid of 100 points between the minimum
+            value minus the standard deviation and the maximum value
+            plus the standard deviation will be used
+          pdist_kw[kde_kw] (dict): Keyword arguments passed to
+            :class:`KernelDensity<sklearn.neighbors.KernelDensity>`; of
+            these only 'kernel' is used by mode 'kde'
+          pdist_kw[n_processes] (int): Number of processes with which to
+            calculate the probability distributions of columns in
+            parallel; see :func:`calc_pdists<moldynplot.stats.calc_pdists>`
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
+
+        Returns:
+          dict: Dictionary whose keys are columns in *df* and values are
+          DataFrames whose indexes are the *grid* for that column and
+          contain a single column 'probability' containing the
+          normalized probability at each grid point
         """
         from collections import OrderedDict
-        from sklearn.neighbors import KernelDensity
+        from .stats import calc_pdist, calc_pdists
 
         # Process arguments
         verbose = kwargs.get("verbose", 1)
@@ -641,71 +1352,101 @@ class TimeSeriesDataset(Dataset):
                 raise()
 
         pdist_kw = kwargs.get("pdist_kw", {"bandwidth": 0.1})
-        mode = "kde"
-        if mode == "kde":
-
-            # Prepare bandwidths
-            bandwidth = pdist_kw.pop("bandwidth", None)
-            if bandwidth is None:
-                all_bandwidth = None
-                bandwidth = {}
-            elif isinstance(bandwidth, float):
-                all_bandwidth = bandwidth
-                bandwidth = {}
-            elif isinstance(bandwidth, dict):
-                all_bandwidth = None
-                pass
-            for column, series in df.iteritems():
-                if column in bandwidth:
-                    bandwidth[column] = float(bandwidth[column])
-                elif all_bandwidth is not None:
-                    bandwidth[column] = all_bandwidth
-                else:
-                    bandwidth[column] = series.std() / 10.0
-
-            # Prepare grids
-            grid = pdist_kw.pop("grid", None)
-            if grid is None:
-                all_grid = None
-                grid = {}
-            elif isinstance(grid, list) or isinstance(grid, np.ndarray):
-                all_grid = np.array(grid)
-                grid = {}
-            elif isinstance(grid, dict):
-                all_grid = None
-                pass
-            for column, series in df.iteritems():
-                if column in grid:
-                    grid[column] = np.array(grid[column])
-                elif all_grid is not None:
-                    grid[column] = all_grid
-                else:
-                    grid[column] = np.linspace(series.min() - series.std(),
-                                      series.max() + series.std(), 100)
-
-            # Calculate probability distributions
-            kde_kw = pdist_kw.get("kde_kw", {})
-            pdist = OrderedDict()
+        mode = pdist_kw.get("mode", "kde")
+        if mode not in ["kde", "sklearn", "hist"]:
+            raise ValueError("pdist mode '{0}' not understood, ".format(mode)
+              + "must be one of 'kde', 'sklearn', 'hist'")
+
+        # Prepare bandwidths
+        bandwidth = pdist_kw.pop("bandwidth", None)
+        if bandwidth is None:
+            all_bandwidth = None
+            bandwidth = {}
+        elif isinstance(bandwidth, float):
+            all_bandwidth = bandwidth
+            bandwidth = {}
+        elif isinstance(bandwidth, dict):
+            all_bandwidth = None
+            pass
+        for column, series in df.iteritems():
+            if column in bandwidth:
+                bandwidth[column] = float(bandwidth[column])
+            elif all_bandwidth is not None:
+                bandwidth[column] = all_bandwidth
+            else:
+                bandwidth[column] = float(series.std()) / 10.0
+
+        # Prepare grids
+        grid = pdist_kw.pop("grid", None)
+        if grid is None:
+            all_grid = None
+            grid = {}
+        elif isinstance(grid, list) or isinstance(grid, np.ndarray):
+            all_grid = np.array(grid)
+            grid = {}
+        elif isinstance(grid, dict):
+            all_grid = None
+            pass
+        for column, series in df.iteritems():
+            if column in grid:
+                grid[column] = np.array(grid[column])
+            elif all_grid is not None:
+                grid[column] = all_grid
+            else:
+                grid[column] = np.linspace(
+                  float(series.min()) - float(series.std()),
+                  float(series.max()) + float(series.std()), 100)
+
+        # Calculate probability distributions
+        kde_kw = pdist_kw.get("kde_kw", {})
+        n_processes = pdist_kw.get("n_processes", 1)
+        if mode == "hist":
+            method = "a histogram"
+        else:
+            method = "a kernel density estimate"
+        columns = list(df.columns)
+        if n_processes > 1:
+            if verbose >= 1:
+                wiprint("calculating probability distributions of {0} "
+                  "columns using {1} with {2} processes".format(
+                  len(columns), method, n_processes))
+            pdfs = calc_pdists(df.values, [grid[c] for c in columns],
+              [bandwidth[c] for c in columns], mode, kde_kw, n_processes)
+        else:
+            pdfs = []
             for column, series in df.iteritems():
                 if verbose >= 1:
-                   wiprint("calculating probability distribution of "
-                    "{0} using a kernel density estimate".format(column))
-                kde = KernelDensity(bandwidth=bandwidth[column], **kde_kw)
-                kde.fit(series[:, np.newaxis])
-                pdf = np.exp(kde.score_samples(grid[column][:, np.newaxis]))
-                pdf /= pdf.sum()
-                series_pdist = pd.DataFrame(pdf, index=grid[column],
-                  columns=["probability"])
-                series_pdist.index.name = column
-                pdist[column] = series_pdist
+                    wiprint("calculating probability distribution of "
+                      "{0} using {1}".format(column, method))
+                pdfs.append(calc_pdist(series.values, grid[column],
+                  bandwidth[column], mode, kde_kw))
+        pdist = OrderedDict()
+        for column, pdf in zip(columns, pdfs):
+            series_pdist = pd.DataFrame(pdf, index=grid[column],
+              columns=["probability"])
+            series_pdist.index.name = column
+            pdist[column] = series_pdist
 
-            return pdist
+        return pdist
 
 class SAXSDataset(Dataset):
     """
     Represents Small-Angle X-ray Scattering Data.
     """
 
+    def __init__(self, dtype=None, **kwargs):
+        """
+        Arguments:
+          dtype (str, dtype, optional): Data type in which to hold
+            intensity (e.g. 'float32'); see
+            :func:`get_dtype<moldynplot.formats.get_dtype>`. Intensity
+            is converted to double precision only to fit scale (see
+            :meth:`scale`). By default intensity is held as read
+          kwargs (dict): Additional keyword arguments
+        """
+        super(SAXSDataset, self).__init__(**kwargs)
+        self.dataframe = cast_dtype(self.dataframe, dtype)
+
     def scale(self, scale, **kwargs):
         """
         Scales SAXS intensity, either by a constant or to match the
@@ -892,6 +1633,14 @@ class HSQCDataset(Dataset):
         Arguments:
           infile (str): Path to input file, may contain environment
             variables
+          disk_cache (str, optional): Directory of persistent cache of
+            processed data, reused by later runs if infiles and
+            processing parameters are unchanged; see
+            :class:`DiskCache<moldynplot.cache.DiskCache>`
+          disk_cache_size (int, optional): Size of disk cache in bytes
+            above which least-recently-used entries are evicted
+          disk_cache_hash (bool): Identify infiles in disk cache by
+            digest of their contents rather than modification time
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
         """
@@ -899,19 +1648,34 @@ class HSQCDataset(Dataset):
         # Process arguments
         verbose = kwargs.get("verbose", 1)
 
-        # Load
-        self.hsqc_df = self.read(**kwargs)
-
-        # Offset 1H and 15N
-        if "hoffset" in kwargs or "noffset" in kwargs:
-            hydrogen = np.array(self.hsqc_df.index.levels[0].values)
-            nitrogen = np.array(self.hsqc_df.index.levels[1].values)
-            if "hoffset" in kwargs:
-                hydrogen += float(kwargs.pop("hoffset"))
-            if "noffset" in kwargs:
-                nitrogen += float(kwargs.pop("noffset"))
-            self.hsqc_df.index = pd.MultiIndex.from_product(
-              [hydrogen, nitrogen], names=["1H", "15N"])
+        # Restore processed data from disk cache
+        cache, cache_key = open_disk_cache(type(self),
+          dict(downsample=downsample, calc_pdist=calc_pdist), **kwargs)
+        state = cache.load(cache_key) if cache is not None else None
+        if state is not None:
+            if verbose >= 1:
+                wiprint("""Restored processed data from disk cache
+                        '{0}'""".format(cache.path))
+            self.__dict__.update(state)
+        else:
+            # Load
+            self.hsqc_df = self.read(**kwargs)
+
+            # Offset 1H and 15N
+            if "hoffset" in kwargs or "noffset" in kwargs:
+                hydrogen = np.array(self.hsqc_df.index.levels[0].values)
+                nitrogen = np.array(self.hsqc_df.index.levels[1].values)
+                if "hoffset" in kwargs:
+                    hydrogen += float(kwargs.pop("hoffset"))
+                if "noffset" in kwargs:
+                    nitrogen += float(kwargs.pop("noffset"))
+                self.hsqc_df.index = pd.MultiIndex.from_product(
+                  [hydrogen, nitrogen], names=["1H", "15N"])
+
+            # Store processed data in disk cache
+            if cache is not None:
+                cache.store(cache_key, dict((a, getattr(self, a)) for a in
+                  ["hsqc_df"] if hasattr(self, a)))
 
         # Output to screen
         if verbose >= 2:
@@ -941,8 +1705,8 @@ class HSQCDataset(Dataset):
         Returns:
           DataFrame: DataFrame
         """
-        import nmrglue
         from os.path import expandvars
+        from .formats import read_nmrpipe
 
         # Process arguments
         verbose = kwargs.get("verbose", 1)
@@ -951,18 +1715,7 @@ class HSQCDataset(Dataset):
         # Read DataFrame
         if verbose >= 1:
             wiprint("""Reading DataFrame from '{0}' """.format(infile))
-        parameters, intensity = nmrglue.pipe.read(infile)
-        hydrogen  = nmrglue.pipe.make_uc(parameters, intensity,
-                       dim=1).ppm_scale()
-        nitrogen  = nmrglue.pipe.make_uc(parameters, intensity,
-                        dim=0).ppm_scale()
-
-        index = pd.MultiIndex.from_product([nitrogen, hydrogen],
-          names=["15N", "1H"])
-        df = pd.DataFrame(data=intensity.flatten(), index=index,
-          columns=["intensity"])
-        df = df.swaplevel(0, 1)
-        df = df.sortlevel()
+        df = read_nmrpipe(infile)
 
         return df
 
@@ -970,7 +1723,7 @@ class HSQCDataset(Dataset):
         """
         Reads HSQC from one or more *infiles* into a DataFrame.
         """
-        import re
+        from .formats import sniff_infile
         from .myplotspec import multi_pop_merged
 
         # Process arguments
@@ -979,16 +1732,14 @@ class HSQCDataset(Dataset):
         if len(infiles) == 0:
             raise Exception(sformat("""No infiles found matching
             '{0}'""".format(infile_args)))
-        re_h5 = re.compile(
-          r"^(?P<path>(.+)\.(h5|hdf5))((:)?(/)?(?P<address>.+))?$",
-          flags=re.UNICODE)
 
         # Load Data
         dfs = []
         for infile in infiles:
-            if infile.endswith(".ft"):
+            kind = sniff_infile(infile)
+            if kind == "nmrpipe":
                 df = self._read_nmr(infile, **kwargs)
-            elif re_h5.match(infile):
+            elif kind == "hdf5":
                 df = self._read_hdf5(infile, **kwargs)
             else:
                 df = self._read_text(infile, **kwargs)
@@ -1046,18 +1797,34 @@ class RelaxSequenceDataset(SequenceDataset):
 
         return parser
 
-    def __init__(self, calc_pdist=False, outfile=None, interactive=False,
-        **kwargs):
+    def __init__(self, calc_pdist=False, dtype=None, outfile=None,
+        interactive=False, **kwargs):
         """
         Arguments:
           infile{s} (list): Path(s) to input file(s); may contain
             environment variables and wildcards
           use_indexes (list): Residue indexes to select from DataFrame,
             once DataFrame has already been loaded
+          residues (int, str, list, optional): Residues to select from
+            DataFrame, by number, range of numbers, name, or regular
+            expression; see
+            :func:`select_residues<moldynplot.formats.select_residues>`
+          dtype (str, dtype, optional): Data type in which to hold
+            values (e.g. 'float32'); see
+            :func:`get_dtype<moldynplot.formats.get_dtype>`. By default
+            values are held as read
           calc_pdist (bool): Calculate probability distribution
           pdist_kw (dict): Keyword arguments used to configure
             probability distribution calculation
           dataset_cache (dict): Cache of previously-loaded Datasets
+          disk_cache (str, optional): Directory of persistent cache of
+            processed data, reused by later runs if infiles and
+            processing parameters are unchanged; see
+            :class:`DiskCache<moldynplot.cache.DiskCache>`
+          disk_cache_size (int, optional): Size of disk cache in bytes
+            above which least-recently-used entries are evicted
+          disk_cache_hash (bool): Identify infiles in disk cache by
+            digest of their contents rather than modification time
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
         """
@@ -1066,34 +1833,57 @@ class RelaxSequenceDataset(SequenceDataset):
         verbose = kwargs.get("verbose", 1)
         self.dataset_cache = kwargs.get("dataset_cache", None)
 
-        # Read data
-        self.sequence_df = self.read(**kwargs)
-        if verbose >= 2:
+        # Restore processed data from disk cache
+        cache, cache_key = open_disk_cache(type(self),
+          dict(calc_pdist=calc_pdist, dtype=dtype), **kwargs)
+        state = cache.load(cache_key) if cache is not None else None
+        if state is not None:
             if verbose >= 1:
-                print("Processed sequence DataFrame:")
-                print(self.sequence_df)
-
-        # Cut data
-        if "use_indexes" in kwargs:
-            use_indexes = np.array(kwargs.pop("use_indexes"))
-            res_index = np.array([int(i.split(":")[1])
-              for i in self.sequence_df.index.values])
-            self.sequence_df = self.sequence_df[np.in1d(res_index,use_indexes)]
-
-        # Calculate r2/r1 ratio
-        if "r1" in self.sequence_df and "r2" in self.sequence_df:
-            self.sequence_df["r2/r1"] = self.sequence_df["r2"] / \
-                                        self.sequence_df["r1"]
-            self.sequence_df["r2/r1 se"] = np.sqrt((self.sequence_df["r2 se"] /
-              self.sequence_df["r2"]) ** 2 + (self.sequence_df["r1 se"] /
-              self.sequence_df["r1"]) ** 2) * self.sequence_df["r2/r1"]
-
-        # Calculate probability distribution
-        if calc_pdist:
-            self.pdist_df = self.calc_pdist(df=self.sequence_df, **kwargs)
+                wiprint("""Restored processed data from disk cache
+                        '{0}'""".format(cache.path))
+            self.__dict__.update(state)
+        else:
+            # Read data
+            self.sequence_df = cast_dtype(self.read(**kwargs), dtype)
+            if verbose >= 2:
+                if verbose >= 1:
+                    print("Processed sequence DataFrame:")
+                    print(self.sequence_df)
+
+            # Cut data
+            if "use_indexes" in kwargs:
+                use_indexes = np.array(kwargs.pop("use_indexes"))
+                res_index = np.array([int(i.split(":")[1])
+                  for i in self.sequence_df.index.values])
+                self.sequence_df = self.sequence_df[np.in1d(res_index,
+                  use_indexes)]
+            if kwargs.get("residues") is not None:
+                from .formats import select_residues
+
+                self.sequence_df = self.sequence_df.loc[select_residues(
+                  self.sequence_df.index, kwargs.pop("residues"))]
+
+            # Calculate r2/r1 ratio
+            if "r1" in self.sequence_df and "r2" in self.sequence_df:
+                self.sequence_df["r2/r1"] = self.sequence_df["r2"] / \
+                                            self.sequence_df["r1"]
+                self.sequence_df["r2/r1 se"] = np.sqrt(
+                  (self.sequence_df["r2 se"] / self.sequence_df["r2"]) ** 2
+                  + (self.sequence_df["r1 se"] / self.sequence_df["r1"]) ** 2
+                  ) * self.sequence_df["r2/r1"]
+
+            # Calculate probability distribution
+            if calc_pdist:
+                self.pdist_df = self.calc_pdist(df=self.sequence_df, **kwargs)
+
+            # Store processed data in disk cache
+            if cache is not None:
+                cache.store(cache_key, dict((a, getattr(self, a)) for a in
+                  ["sequence_df", "pdist_df"] if hasattr(self, a)))
 
         # Write data
         if outfile is not None:
+            self.set_hdf5_layout(df=self.sequence_df, **kwargs)
             self.write(df=self.sequence_df, outfile=outfile, **kwargs)
 
         # Interactive prompt
@@ -1301,34 +2091,13 @@ class IREDRelaxDataset(RelaxSequenceDataset):
           'ired_order', or 'other'
 
         .. todo:
-          - Identify pandas files and hdf5 files
+          - Identify pandas files
         """
-        import six
-        from os import devnull
-        import re
-        from subprocess import Popen, PIPE
-
-        re_t1t2noe = re.compile(
-          r"^#Vec\s+[\w_]+\[T1\]\s+[\w_]+\[\T2\]\s+[\w_]+\[NOE\]$",
-          flags=re.UNICODE)
-        re_order = re.compile(
-          r"^#Vec\s+[\w_]+\[S2\]$", flags=re.UNICODE)
-        re_h5 = re.compile(
-          r"^(?P<path>(.+)\.(h5|hdf5))((:)?(/)?(?P<address>.+))?$",
-          flags=re.UNICODE)
-
-        with open(devnull, "w") as fnull:
-            header = Popen("head -n 1 {0}".format(infile),
-              stdout=PIPE, stderr=fnull, shell=True).stdout.read().strip()
-            if six.PY3:
-                header = str(header, "utf-8")
-
-        if re.match(re_t1t2noe, header):
-            return "ired_relax"
-        elif re.match(re_order, header):
-            return "ired_order"
-        elif re.match(re_h5, infile):
-            return "hdf5"
+        from .formats import sniff_infile
+
+        kind = sniff_infile(infile)
+        if kind in ["ired_relax", "ired_order", "hdf5"]:
+            return kind
         else:
             return "other"
 
@@ -1348,6 +2117,7 @@ class IREDRelaxDataset(RelaxSequenceDataset):
           DataFrame: Sequence DataFrame
         """
         from os.path import expandvars
+        from .formats import read_infile
 
         # Process arguments
         verbose = kwargs.get("verbose", 1)
@@ -1358,16 +2128,12 @@ class IREDRelaxDataset(RelaxSequenceDataset):
             if verbose >= 1:
                 wiprint("""Loading iRED relaxation data from '{0}'
                         """.format(infile))
-            df = pd.read_csv(infile, delim_whitespace=True, header=0,
-              index_col=0, names=["r1","r2","noe"])
-            df["r1"] = 1 / df["r1"]
-            df["r2"] = 1 / df["r2"]
+            df = read_infile(infile, kind)
         elif kind == "ired_order":                  # Parse order parameters
             if verbose >= 1:
                 wiprint("""Loading iRED order parameter data from '{0}'
                         """.format(infile))
-            df = pd.read_csv(infile, delim_whitespace=True, header=0,
-              index_col=0, names=["s2"])
+            df = read_infile(infile, kind)
         else:                                       # Parse other
             df = super(IREDRelaxDataset, self)._read_text(infile, **kwargs)
         df = self._read_index(df, **kwargs)
@@ -1405,7 +2171,7 @@ class IREDRelaxDataset(RelaxSequenceDataset):
         Returns:
           df (DataFrame): iRED sequence DataFrame
         """
-        import re
+        from .formats import sniff_infile
         from .myplotspec import multi_pop_merged
 
         # Process arguments
@@ -1414,15 +2180,12 @@ class IREDRelaxDataset(RelaxSequenceDataset):
         if len(infiles) == 0:
             raise Exception(sformat("""No infiles found matching
             '{0}'""".format(infile_args)))
-        re_h5 = re.compile(
-          r"^(?P<path>(.+)\.(h5|hdf5))((:)?(/)?(?P<address>.+))?$",
-          flags=re.UNICODE)
 
         # Load data
         relax_dfs = []
         order_dfs = []
         for infile in infiles:
-            if re_h5.match(infile):
+            if sniff_infile(infile) == "hdf5":
                 df = self._read_hdf5(infile, **kwargs)
             else:
                 df = self._read_text(infile, **kwargs)
@@ -1562,8 +2325,10 @@ class IREDTimeSeriesDataset(TimeSeriesDataset, IREDRelaxDataset):
         Calculates the average and standard error of relaxation, prepares
         sequence DataFrame.
 
-        .. todo:
-          - Make this general case, should be able to unstack properly
+        Averages are calculated in a single pass using
+        :func:`calc_summary<moldynplot.stats.calc_summary>`, and standard
+        error using :func:`calc_se<moldynplot.stats.calc_se>` with
+        *error_method*, 'blocking' by default.
         """
 
         # Process arguments
@@ -1571,23 +2336,14 @@ class IREDTimeSeriesDataset(TimeSeriesDataset, IREDRelaxDataset):
         wiprint("""Calculating average and standard error of time series
                 infiles""")
 
-        sequence_df = pd.DataFrame(data=timeseries_df.mean(axis=0))
-
-        from .fpblockaverager.FPBlockAverager import FPBlockAverager
-        ba = FPBlockAverager(timeseries_df, **kwargs)
-        self.ba = ba
-        self.p = self.ba.parameters.loc[("exp", "a (se)")]
-        self.p.index = pd.MultiIndex.from_tuples(map(eval, self.p.index.values))
-        self.p.index = self.p.index.set_levels([c+" se" for c in
-        self.p.index.levels[1].values], level=1)
-
-        a =sequence_df.squeeze().unstack()
-        b = self.p.unstack()
-        c = a.join(b)
-        c = c[["r1", "r1 se", "r2", "r2 se", "noe", "noe se", "s2", "s2 se"]]
-        self.sequence_df = c
-        c = c.loc[sorted(c.index.values, key=lambda x: int(x.split(":")[1]))]
-        sequence_df = c
+        from .stats import calc_se, calc_summary, summary_to_sequence_df
+        summary = calc_summary(timeseries_df)
+        se = calc_se(timeseries_df, kwargs.get("error_method", "blocking"))
+        sequence_df = summary_to_sequence_df(summary, se)
+        sequence_df = sequence_df[["r1", "r1 se", "r2", "r2 se", "noe",
+          "noe se", "s2", "s2 se"]]
+        sequence_df = sequence_df.loc[sorted(sequence_df.index.values,
+          key=lambda x: int(x.split(":")[1]))]
 
         return sequence_df
 
@@ -1617,6 +2373,7 @@ class IREDTimeSeriesDataset(TimeSeriesDataset, IREDRelaxDataset):
 
         # Write data
         if outfile is not None:
+            self.set_hdf5_layout(df=self.timeseries_df, **kwargs)
             self.write(df=self.timeseries_df, outfile=outfile, **kwargs)
 
         # Interactive prompt
@@ -1628,7 +2385,7 @@ class IREDTimeSeriesDataset(TimeSeriesDataset, IREDRelaxDataset):
         Reads iRED time series data from one or more *infiles* into a
         DataFrame.
         """
-        import re
+        from .formats import sniff_infile
         from .myplotspec import multi_pop_merged
 
         # Process arguments
@@ -1637,16 +2394,13 @@ class IREDTimeSeriesDataset(TimeSeriesDataset, IREDRelaxDataset):
         if len(infiles) == 0:
             raise Exception(sformat("""No infiles found matching
             '{0}'""".format(infile_args)))
-        re_h5 = re.compile(
-          r"^(?P<path>(.+)\.(h5|hdf5))((:)?(/)?(?P<address>.+))?$",
-          flags=re.UNICODE)
 
         # Load data
         timeseries_dfs = []
         relax_dfs = []
         order_dfs = []
         for infile in infiles:
-            if re_h5.match(infile):
+            if sniff_infile(infile) == "hdf5":
                 df = self._read_hdf5(infile, **kwargs)
             else:
                 df = self._read_text(infile, **kwargs)
@@ -1711,25 +2465,11 @@ class NatConTimeSeriesDataset(TimeSeriesDataset):
         # Downsample; flag included in function definition to prevent
         #   superclass from downsampling before applying cutoff
         if downsample is not None:
-            from scipy.stats.mstats import mode
-
             if verbose >= 1:
                 print("downsampling by factor of {0} using mode".format(
                   downsample))
-
-            reduced = dataframe.values[
-              :dataframe.shape[0]-(dataframe.shape[0] % downsample),:]
-            new_shape=(int(reduced.shape[0]/ downsample),
-                downsample, reduced.shape[1])
-            index = np.reshape(dataframe.index.values[
-              :dataframe.shape[0]-(dataframe.shape[0] % downsample)],
-              new_shape[:-1]).mean(axis=1)
-            reduced = np.reshape(reduced, new_shape)
-            reduced = np.squeeze(mode(reduced, axis=1)[0])
-            reduced = pd.DataFrame(data=reduced, index=index,
-              columns=dataframe.columns.values)
-            reduced.index.name = "time"
-            dataframe = self.dataframe = reduced
+            dataframe = self.dataframe = pd.concat(list(self.iter_downsample(
+              dataframe, downsample, "mode")))
 
         # Calculate probability distribution
         if calc_pdist:
@@ -1820,6 +2560,8 @@ class SAXSExperimentDataset(SAXSDataset):
         Arguments:
           infile (str): Path to input file, may contain environment
             variables
+          dtype (str, dtype, optional): Data type in which to hold
+            intensity; see :class:`SAXSDataset`
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
         """
@@ -1862,8 +2604,11 @@ class SAXSDiffDataset(SAXSDataset):
 #
 #        return tuple(key)
 
-    def __init__(self, dataset_cache=None, **kwargs):
+    def __init__(self, dataset_cache=None, dtype=None, **kwargs):
         """
+        Arguments:
+          dtype (str, dtype, optional): Data type in which to hold
+            intensity; see :class:`SAXSDataset`
         """
         from sys import exit
         from .myplotspec import multi_get_copy
@@ -1884,7 +2629,8 @@ class SAXSDiffDataset(SAXSDataset):
         diff_I_se = np.sqrt(m_I_se**2 +s_I_se**2)
         diff_I.name = "intensity"
         diff_I_se.name = "intensity_se"
-        self.dataframe = pd.concat([diff_I, diff_I_se], axis=1)
+        self.dataframe = cast_dtype(pd.concat([diff_I, diff_I_se], axis=1),
+          dtype)
 
 class MDGXDataset(Dataset):
     """
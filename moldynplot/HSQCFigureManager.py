@@ -214,11 +214,16 @@ class HSQCFigureManager(FigureManager):
             fill_between
           pdist_kw (dict): Keyword arguments using to configure probability
             distribution
+          dataset_cache_size (int, optional): Size in bytes of cache of
+            previously-loaded datasets above which least-recently-used
+            datasets are evicted; see
+            :class:`DatasetCache<moldynplot.cache.DatasetCache>`
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
         """
         import numpy as np
 #        from . import get_cmap
+        from .cache import use_dataset_cache
         from .myplotspec import get_cmap, get_colors, multi_get_copy
 
         # Cheap way to invert axes without overriding draw_subplot
@@ -232,6 +237,7 @@ class HSQCFigureManager(FigureManager):
         dataset_kw = multi_get_copy("dataset_kw", kwargs, {})
         if "infile" in kwargs:
             dataset_kw["infile"] = kwargs["infile"]
+        use_dataset_cache(self, kwargs.get("dataset_cache_size"), verbose)
         dataset = self.load_dataset(verbose=verbose, **dataset_kw)
         if dataset is not None and hasattr(dataset, "hsqc_df"):
             hsqc = dataset.hsqc_df
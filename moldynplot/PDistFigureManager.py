@@ -332,11 +332,16 @@ class PDistFigureManager(FigureManager):
           draw_mean (bool): Draw point at mean value
           mean_kw (dict): Keyword arguments used to configure call to 
             :meth:`plot<matplotlib.axes.Axes.plot>`
+          dataset_cache_size (int, optional): Size in bytes of cache of
+            previously-loaded datasets above which least-recently-used
+            datasets are evicted; see
+            :class:`DatasetCache<moldynplot.cache.DatasetCache>`
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
         """
         from warnings import warn
         import numpy as np
+        from .cache import use_dataset_cache
         from .myplotspec import get_colors, multi_get_copy
 
         # Process arguments
@@ -344,6 +349,7 @@ class PDistFigureManager(FigureManager):
         dataset_kw = multi_get_copy("dataset_kw", kwargs, {})
         if "infile" in kwargs:
             dataset_kw["infile"] = kwargs["infile"]
+        use_dataset_cache(self, kwargs.get("dataset_cache_size"), verbose)
         dataset = self.load_dataset(verbose=verbose, **dataset_kw)
         if dataset is not None and hasattr(dataset, "pdist_df"):
             pdist_df = dataset.pdist_df
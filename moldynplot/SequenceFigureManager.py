@@ -330,13 +330,31 @@ class SequenceFigureManager(FigureManager):
         draw_fill_between=False, draw_errorbar=True, draw_plot=False,
         draw_handle=True, draw_label=False,
         verbose=1, debug=0, **kwargs):
+        """
+        Draws a dataset on a subplot.
+
+        Arguments:
+          subplot (Axes): Axes on which to draw
+          dataset_kw (dict): Keyword arguments passed to
+            :meth:`load_dataset
+            <myplotspec.FigureManager.FigureManager.load_dataset>`
+          dataset_cache_size (int, optional): Size in bytes of cache of
+            previously-loaded datasets above which least-recently-used
+            datasets are evicted; see
+            :class:`DatasetCache<moldynplot.cache.DatasetCache>`
+          verbose (int): Level of verbose output
+          debug (int): Level of debug output
+          kwargs (dict): Additional keyword arguments
+        """
         import numpy as np
+        from .cache import use_dataset_cache
         from .myplotspec import get_colors, multi_get_copy
 
         # Load data
         dataset_kw = multi_get_copy("dataset_kw", kwargs, {})
         if "infile" in kwargs:
             dataset_kw["infile"] = kwargs["infile"]
+        use_dataset_cache(self, kwargs.get("dataset_cache_size"), verbose)
         dataframe = self.load_dataset(verbose=verbose, debug=debug,
           **dataset_kw).sequence_df
         x = np.array([filter(lambda x: x in '0123456789.', s)
@@ -345,6 +345,11 @@ class TimeSeries2DFigureManager(FigureManager):
             zlabel_fp: 10b
             zlabel_kw:
               labelpad: 3
+      draft:
+        class: appearance
+        help: Quick preview drawn from every tenth point of each dataset
+        draw_dataset:
+          draft: True
     """
 
     @manage_defaults_presets()
@@ -352,16 +357,40 @@ class TimeSeries2DFigureManager(FigureManager):
     def draw_dataset(self, subplot, label=None,
         handles=None, logz=False,
         draw_heatmap=False, draw_colorbar=False, draw_contour=False,
-        draw_legend=False, draw_label=True, 
+        draw_legend=False, draw_label=True, draft=False, residues=None,
         verbose=1, debug=0, **kwargs):
+        """
+        Draws a dataset on a subplot.
+
+        Arguments:
+          subplot (Axes): Axes on which to draw
+          dataset_kw (dict): Keyword arguments passed to
+            :meth:`load_dataset
+            <myplotspec.FigureManager.FigureManager.load_dataset>`
+          dataset_cache_size (int, optional): Size in bytes of cache of
+            previously-loaded datasets above which least-recently-used
+            datasets are evicted; see
+            :class:`DatasetCache<moldynplot.cache.DatasetCache>`
+          verbose (int): Level of verbose output
+          debug (int): Level of debug output
+          kwargs (dict): Additional keyword arguments
+        """
         import numpy as np
         import six
+        from .cache import use_dataset_cache
         from .myplotspec import get_colors, multi_get_copy
 
         # Load data
         dataset_kw = multi_get_copy("dataset_kw", kwargs, {})
         if "infile" in kwargs:
             dataset_kw["infile"] = kwargs["infile"]
+        if residues is not None:
+            dataset_kw["residues"] = residues
+        if draft:
+            factor = 10 if draft is True else int(draft)
+            dataset_kw["stride"] = factor * float(dataset_kw.get("stride")
+              or dataset_kw.get("dt") or 1.0)
+        use_dataset_cache(self, kwargs.get("dataset_cache_size"), verbose)
         dataset = self.load_dataset(verbose=verbose, debug=debug, **dataset_kw)
         timeseries_df = dataset.timeseries_df
 
@@ -70,6 +70,8 @@ class TimeSeriesFigureManager(FigureManager):
             horizontalalignment: left
             verticalalignment: top
         draw_dataset:
+          dataset_kw:
+            cpptraj_sidecar: True
           partner_kw:
             position: right
             y2label_kw:
@@ -318,13 +320,19 @@ class TimeSeriesFigureManager(FigureManager):
             xticks:      [0,0.000001]
             xticklabels: []
             yticklabels: []
+      draft:
+        class: appearance
+        help: Quick preview drawn from every tenth point of each dataset
+        draw_dataset:
+          draft: True
     """
 
     @manage_defaults_presets()
     @manage_kwargs()
     def draw_dataset(self, subplot, label=None, column=None, handles=None,
         draw_pdist=False, draw_fill_between=False, draw_mean=False,
-        draw_plot=True, **kwargs):
+        draw_plot=True, decimate=None, decimate_mode="minmax", draft=False,
+        **kwargs):
         """
         Draws a dataset on a subplot.
 
@@ -339,16 +347,32 @@ class TimeSeriesFigureManager(FigureManager):
           plot_kw (dict): Keyword arguments passed to methods of
             :class:`Axes<matplotlib.axes.Axes>`
           draw_plot (bool): Draw plot
+          decimate (int, bool, optional): Approximate number of points
+            to draw; if True, twice the width of *subplot* in pixels.
+            Unlike *downsample*, extrema are retained, such that long
+            time series look the same at figure resolution; see
+            :func:`decimate<moldynplot.stats.decimate>`
+          decimate_mode (str): Method of decimation; may be 'minmax' or
+            'lttb'
+          draft (bool, int): Draw a quick preview, reading only every
+            tenth point (or every *draft*th point, if an int) of the
+            dataset; see *stride* of :class:`TimeSeriesDataset
+            <moldynplot.Dataset.TimeSeriesDataset>`
           draw_pdist (bool): Draw probability distribution
           draw_fill_between (bool): Fill between specified region for this
             dataset
           draw_mean (bool): Draw point at mean value value of
             probability distribution
+          dataset_cache_size (int, optional): Size in bytes of cache of
+            previously-loaded datasets above which least-recently-used
+            datasets are evicted; see
+            :class:`DatasetCache<moldynplot.cache.DatasetCache>`
           verbose (int): Level of verbose output
           kwargs (dict): Additional keyword arguments
         """
         from warnings import warn
         import numpy as np
+        from .cache import use_dataset_cache
         from .myplotspec import get_colors, multi_get_copy
 
         # Process arguments
@@ -356,6 +380,11 @@ class TimeSeriesFigureManager(FigureManager):
         dataset_kw = multi_get_copy("dataset_kw", kwargs, {})
         if "infile" in kwargs:
             dataset_kw["infile"] = kwargs["infile"]
+        if draft:
+            factor = 10 if draft is True else int(draft)
+            dataset_kw["stride"] = factor * float(dataset_kw.get("stride")
+              or dataset_kw.get("dt") or 1.0)
+        use_dataset_cache(self, kwargs.get("dataset_cache_size"), verbose)
         dataset = self.load_dataset(verbose=verbose, **dataset_kw)
         if dataset is not None and hasattr(dataset, "timeseries_df"):
             timeseries = dataset.timeseries_df
@@ -406,8 +435,18 @@ class TimeSeriesFigureManager(FigureManager):
                   timeseries[column].mean()))
                 print("stdev {0}: {1:6.3f}".format(column,
                   timeseries[column].std()))
-            plot = subplot.plot(timeseries.index.values, timeseries[column],
-                     **plot_kw)[0]
+            x = timeseries.index.values
+            y = timeseries[column].values
+            if decimate:
+                from .stats import decimate as decimate_func
+
+                if decimate is True:
+                    decimate = 2 * int(np.ceil(subplot.bbox.width))
+                if verbose >= 2:
+                    print("decimating {0} points to {1} using {2}".format(
+                      y.size, decimate, decimate_mode))
+                x, y = decimate_func(x, y, decimate, decimate_mode)
+            plot = subplot.plot(x, y, **plot_kw)[0]
             handle_kw = multi_get_copy("handle_kw", kwargs, {})
             handle_kw["mfc"] = plot.get_color()
             handle = subplot.plot([-10, -10], [-10, -10], **handle_kw)[0]
@@ -0,0 +1,496 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#   moldynplot.cache.py
+#
+#   Copyright (C) 2015-2016 Karl T Debiec
+#   All rights reserved.
+#
+#   This software may be modified and distributed under the terms of the
+#   BSD license. See the LICENSE file for details.
+"""
+Caches of processed datasets.
+"""
+################################### MODULES ###################################
+from __future__ import absolute_import,division,print_function,unicode_literals
+from collections import OrderedDict
+import numpy as np
+################################## FUNCTIONS ##################################
+#: Keyword arguments of datasets that do not affect their processed state,
+#: and are therefore excluded from keys of :class:`DiskCache`
+disk_cache_ignored = ["verbose", "debug", "interactive", "outfile",
+  "dataset_cache", "disk_cache", "disk_cache_size", "disk_cache_hash",
+  "n_threads", "infile", "infiles"]
+
+def get_infile_identity(infile, hash_infile=False):
+    """
+    Identifies the contents of an infile by its path, size, and
+    modification time.
+
+    Arguments:
+      infile (str): Path to input file and (for hdf5) optionally address
+        within the file in the form ``/path/to/file.h5:address``
+      hash_infile (bool): Identify infile by the SHA-1 digest of its
+        contents in place of its modification time, such that an infile
+        rewritten with the same contents is identified as before
+
+    Returns:
+      tuple: Absolute path, address, size, modification time (or None),
+      and digest (or None)
+    """
+    from os.path import abspath, expandvars, getmtime, getsize
+    from .formats import split_hdf5_address
+
+    infile = expandvars(infile)
+    path, address = split_hdf5_address(infile)
+    if path is None:
+        path = infile
+    path = abspath(path)
+    if hash_infile:
+        from .cpptraj2hdf5 import hash_infile as get_hash
+
+        return (path, address, getsize(path), None, get_hash(path))
+    return (path, address, getsize(path), getmtime(path), None)
+
+def get_digest(value):
+    """
+    Calculates a digest of a processing parameter.
+
+    Dictionaries are digested independent of the order of their keys,
+    arrays by their type, shape, and contents, and classes by their
+    module and name; other values by their representation.
+
+    Arguments:
+      value (object): Value to digest; may be nested
+
+    Returns:
+      str: Hexadecimal SHA-1 digest
+    """
+    import hashlib
+
+    def canonical(value):
+        if isinstance(value, dict):
+            return "{" + ",".join(sorted(canonical(k) + ":" + canonical(v)
+              for k, v in value.items())) + "}"
+        elif isinstance(value, (list, tuple)):
+            return "[" + ",".join(canonical(v) for v in value) + "]"
+        elif isinstance(value, np.ndarray):
+            return "array({0},{1},{2})".format(value.dtype.str, value.shape,
+              hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+        elif isinstance(value, type):
+            return "{0}.{1}".format(value.__module__, value.__name__)
+        return repr(value)
+
+    return hashlib.sha1(canonical(value).encode("utf-8")).hexdigest()
+
+class DiskCache(object):
+    """
+    Persistent cache of processed dataset state on disk.
+
+    Each entry holds attributes of a dataset (e.g. ``timeseries_df``,
+    ``sequence_df``, ``pdist_df``, ``hsqc_df``), pickled using the
+    highest protocol, under a file named by the digest of its key.
+    Keys combine the class of the dataset, the identity of each of its
+    infiles (see :func:`get_infile_identity`), and all processing
+    parameters, such that an entry is only reused if its infiles are
+    unchanged and it was processed identically. Once the size of the
+    cache exceeds its cap, least-recently-used entries are evicted.
+
+    Attributes:
+      path (str): Directory in which entries are stored
+      max_bytes (int): Size above which entries are evicted
+      hash_infiles (bool): Identify infiles by digest of their contents
+    """
+
+    #: Default size of cache above which entries are evicted
+    default_max_bytes = 2 ** 32
+
+    def __init__(self, path, max_bytes=None, hash_infiles=False):
+        """
+        Arguments:
+          path (str): Directory in which to store entries; may contain
+            environment variables and '~'; created if absent
+          max_bytes (int, optional): Size above which entries are
+            evicted; by default :attr:`default_max_bytes`
+          hash_infiles (bool): Identify infiles by size and SHA-1 digest
+            of their contents; otherwise by size and modification time
+        """
+        from os import makedirs
+        from os.path import expanduser, expandvars, isdir
+
+        self.path = expanduser(expandvars(path))
+        self.max_bytes = (max_bytes if max_bytes is not None
+                          else self.default_max_bytes)
+        self.hash_infiles = hash_infiles
+        if not isdir(self.path):
+            makedirs(self.path)
+
+    def get_key(self, cls, infiles, parameters):
+        """
+        Generates key of an entry.
+
+        Arguments:
+          cls (type): Class of dataset
+          infiles (list): Paths to input files
+          parameters (dict): Processing parameters; those named in
+            :data:`disk_cache_ignored` are disregarded
+
+        Returns:
+          str: Key, a hexadecimal digest
+        """
+        parameters = dict((k, v) for k, v in parameters.items()
+                          if k not in disk_cache_ignored)
+        return get_digest([cls, [get_infile_identity(infile,
+          self.hash_infiles) for infile in infiles], parameters])
+
+    def _get_entry_path(self, key):
+        from os.path import join
+
+        return join(self.path, "{0}.pkl".format(key))
+
+    def load(self, key):
+        """
+        Loads an entry, marking it as recently used.
+
+        Arguments:
+          key (str): Key of entry
+
+        Returns:
+          dict: Attributes of dataset, or None if entry is absent or
+          unreadable
+        """
+        import pickle
+        from os import utime
+        from os.path import isfile
+
+        entry_path = self._get_entry_path(key)
+        if not isfile(entry_path):
+            return None
+        try:
+            with open(entry_path, "rb") as entry_file:
+                state = pickle.load(entry_file)
+            utime(entry_path, None)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return state
+
+    def store(self, key, state):
+        """
+        Stores an entry, then evicts least-recently-used entries if the
+        cache exceeds its cap.
+
+        Failure to store the entry, for example due to permissions, is
+        not an error.
+
+        Arguments:
+          key (str): Key of entry
+          state (dict): Attributes of dataset
+
+        Returns:
+          bool: True if entry was stored
+        """
+        import pickle
+        from os import remove, rename
+        from os.path import isfile
+
+        entry_path = self._get_entry_path(key)
+        partial = entry_path + ".partial"
+        try:
+            with open(partial, "wb") as entry_file:
+                pickle.dump(state, entry_file, pickle.HIGHEST_PROTOCOL)
+            if isfile(entry_path):
+                remove(entry_path)
+            rename(partial, entry_path)
+        except (IOError, OSError, pickle.PicklingError, TypeError):
+            if isfile(partial):
+                remove(partial)
+            return False
+        self.evict(keep=key)
+        return True
+
+    def evict(self, keep=None):
+        """
+        Evicts least-recently-used entries until the cache does not
+        exceed its cap.
+
+        Arguments:
+          keep (str, optional): Key of entry not to evict, even if it
+            alone exceeds the cap
+
+        Returns:
+          int: Number of entries evicted
+        """
+        from glob import glob
+        from os import remove
+        from os.path import getmtime, getsize, join
+
+        entries = []
+        for entry_path in glob(join(self.path, "*.pkl")):
+            try:
+                entries.append((getmtime(entry_path), getsize(entry_path),
+                  entry_path))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        n_evicted = 0
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and entry_path == self._get_entry_path(keep):
+                continue
+            try:
+                remove(entry_path)
+            except OSError:
+                continue
+            total -= size
+            n_evicted += 1
+        return n_evicted
+
+def open_disk_cache(cls, parameters, disk_cache=None, disk_cache_size=None,
+    disk_cache_hash=False, **kwargs):
+    """
+    Opens the disk cache of a dataset and generates its key.
+
+    Arguments:
+      cls (type): Class of dataset
+      parameters (dict): Processing parameters passed to dataset
+        explicitly, in addition to *kwargs*
+      disk_cache (str, optional): Directory of :class:`DiskCache`; if
+        None, no cache is used
+      disk_cache_size (int, optional): Size of cache above which entries
+        are evicted
+      disk_cache_hash (bool): Identify infiles by SHA-1 digest of their
+        contents
+      infile{s} (list): Path(s) to input file(s); may contain
+        environment variables and wildcards
+      kwargs (dict): Additional keyword arguments; processing parameters
+
+    Returns:
+      tuple: DiskCache and key, or (None, None) if no cache is used or
+      infiles are not found
+    """
+    from .myplotspec import multi_pop_merged
+
+    if disk_cache is None:
+        return None, None
+    infiles = cls.process_infiles(infiles=multi_pop_merged(
+      ["infile", "infiles"], kwargs))
+    if infiles is None or len(infiles) == 0:
+        return None, None
+    cache = DiskCache(disk_cache, disk_cache_size, disk_cache_hash)
+    parameters = dict(kwargs, **parameters)
+
+    return cache, cache.get_key(cls, infiles, parameters)
+
+def get_nbytes(value, _seen=None):
+    """
+    Estimates the memory footprint of a dataset or other value.
+
+    Sums ``nbytes`` of the DataFrames, Series, and arrays held by
+    *value*, including those within the attributes of a dataset and
+    within nested dicts, lists, and tuples; other objects are not
+    counted. Each object is counted once, and datasets referenced by
+    *value* other than *value* itself are not counted, since they are
+    accounted for separately.
+
+    Arguments:
+      value (object): Dataset or other value
+
+    Returns:
+      int: Number of bytes
+    """
+    import pandas as pd
+
+    top_level = _seen is None
+    if top_level:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    elif isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    elif isinstance(value, pd.Index):
+        return int(value.memory_usage())
+    elif isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    elif isinstance(value, DatasetCache):
+        return 0
+    elif isinstance(value, dict):
+        return sum(get_nbytes(v, _seen) for v in value.values())
+    elif isinstance(value, (list, tuple)):
+        return sum(get_nbytes(v, _seen) for v in value)
+    elif top_level and hasattr(value, "__dict__"):
+        return sum(get_nbytes(v, _seen) for v in vars(value).values())
+    return 0
+
+class DatasetCache(OrderedDict):
+    """
+    In-memory cache of previously-loaded datasets, bounded in size.
+
+    Used in place of the dict ``dataset_cache`` shared by a figure
+    manager and its datasets. The memory footprint of each entry is
+    measured when it is stored (see :func:`get_nbytes`); once the
+    entries together exceed the cap, least-recently-used entries are
+    evicted, such that they are loaded again if needed. Entries are
+    marked as recently used when stored, retrieved, or looked up.
+
+    Lookups (``key in cache`` and :meth:`get`) are counted as hits or
+    misses.
+
+    Attributes:
+      max_bytes (int): Size above which entries are evicted
+      hits (int): Number of lookups of entries present
+      misses (int): Number of lookups of entries absent
+      evictions (int): Number of entries evicted
+      verbose (int): Level of verbose output
+    """
+
+    #: Default size of cache above which entries are evicted
+    default_max_bytes = 2 ** 32
+
+    def __init__(self, max_bytes=None, verbose=1, *args, **kwargs):
+        """
+        Arguments:
+          max_bytes (int, optional): Size above which entries are
+            evicted; by default :attr:`default_max_bytes`
+          verbose (int): Level of verbose output; if 2 or more, reuse,
+            storage, and eviction of entries is reported, along with
+            :meth:`report`
+          args (list): Additional arguments passed to OrderedDict
+          kwargs (dict): Additional keyword arguments passed to
+            OrderedDict
+        """
+        self.max_bytes = (max_bytes if max_bytes is not None
+                          else self.default_max_bytes)
+        self.verbose = verbose
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entry_nbytes = {}
+        super(DatasetCache, self).__init__(*args, **kwargs)
+
+    @property
+    def resident_bytes(self):
+        """
+        int: Summed memory footprint of entries
+        """
+        return sum(self.entry_nbytes.get(key, 0) for key in self)
+
+    def _touch(self, key):
+        value = OrderedDict.__getitem__(self, key)
+        OrderedDict.__delitem__(self, key)
+        OrderedDict.__setitem__(self, key, value)
+        return value
+
+    def __contains__(self, key):
+        if OrderedDict.__contains__(self, key):
+            self.hits += 1
+            value = self._touch(key)
+            if self.verbose >= 2:
+                from .myplotspec import wiprint
+
+                wiprint("Reused cached {0}; {1}".format(
+                  type(value).__name__, self.report()))
+            return True
+        self.misses += 1
+        return False
+
+    def __getitem__(self, key):
+        return self._touch(key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        if OrderedDict.__contains__(self, key):
+            OrderedDict.__delitem__(self, key)
+        OrderedDict.__setitem__(self, key, value)
+        self.entry_nbytes[key] = get_nbytes(value)
+        if self.verbose >= 2:
+            from .myplotspec import wiprint
+
+            wiprint("Cached {0} ({1:.1f} MiB); {2}".format(
+              type(value).__name__, self.entry_nbytes[key] / 2 ** 20,
+              self.report()))
+        self.evict(keep=key)
+
+    def __delitem__(self, key):
+        OrderedDict.__delitem__(self, key)
+        self.entry_nbytes.pop(key, None)
+
+    def evict(self, keep=None):
+        """
+        Evicts least-recently-used entries until the cache does not
+        exceed its cap.
+
+        Arguments:
+          keep (object, optional): Key of entry not to evict, even if it
+            alone exceeds the cap
+
+        Returns:
+          int: Number of entries evicted
+        """
+        resident_bytes = self.resident_bytes
+        n_evicted = 0
+        for key in list(OrderedDict.keys(self)):
+            if resident_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            resident_bytes -= self.entry_nbytes.get(key, 0)
+            value = OrderedDict.__getitem__(self, key)
+            del self[key]
+            n_evicted += 1
+            if self.verbose >= 2:
+                from .myplotspec import wiprint
+
+                wiprint("Evicted {0} from dataset cache".format(
+                  type(value).__name__))
+        self.evictions += n_evicted
+        return n_evicted
+
+    def report(self):
+        """
+        Summarizes use of the cache.
+
+        Returns:
+          str: Number of entries, resident and maximum size, hits,
+          misses, and evictions
+        """
+        return ("{0} entries, {1:.1f} of {2:.1f} MiB resident; {3} hits, "
+          "{4} misses, {5} evictions".format(len(self),
+          self.resident_bytes / 2 ** 20, self.max_bytes / 2 ** 20,
+          self.hits, self.misses, self.evictions))
+
+def use_dataset_cache(figure_manager, dataset_cache_size=None, verbose=1):
+    """
+    Bounds the in-memory dataset cache of a figure manager.
+
+    Replaces the figure manager's ``dataset_cache`` with a
+    :class:`DatasetCache`, retaining entries already present, if it is
+    not one already.
+
+    Arguments:
+      figure_manager (FigureManager): Figure manager
+      dataset_cache_size (int, optional): Size of cache in bytes above
+        which least-recently-used datasets are evicted
+      verbose (int): Level of verbose output
+
+    Returns:
+      DatasetCache: Dataset cache of *figure_manager*
+    """
+    dataset_cache = getattr(figure_manager, "dataset_cache", None)
+    if not isinstance(dataset_cache, DatasetCache):
+        dataset_cache = DatasetCache(dataset_cache_size, verbose,
+          dataset_cache or {})
+        figure_manager.dataset_cache = dataset_cache
+    elif dataset_cache_size is not None:
+        dataset_cache.max_bytes = dataset_cache_size
+    dataset_cache.verbose = verbose
+    dataset_cache.evict()
+
+    return dataset_cache
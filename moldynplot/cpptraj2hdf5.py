@@ -11,70 +11,1016 @@
 """
 ################################### MODULES ###################################
 from __future__ import absolute_import,division,print_function,unicode_literals
+if __name__ == "__main__":
+    __package__ = str("moldynplot")
+    import moldynplot
 import numpy as np
 import h5py
 ################################## FUNCTIONS ##################################
-def process_cpptraj(infile, outfile, address, dtype, scaleoffset,
-    verbose=1, **kwargs):
+#: Storage layouts of hdf5 datasets; 'chunk' may be 'frames' for chunks
+#: spanning all columns, suited to reading windows of frames; 'columns'
+#: for chunks spanning a single column, suited to reading individual
+#: columns; 'balanced' for chunks spanning up to 16 columns; or 'auto' to
+#: let h5py choose. 'scaleoffset', if present, overrides the quantization
+#: precision of the kind of data being stored.
+hdf5_layouts = {
+  "auto":     dict(chunk="auto",     shuffle=False, compression="gzip",
+                   compression_opts=4),
+  "frames":   dict(chunk="frames",   shuffle=True,  compression="gzip",
+                   compression_opts=4),
+  "columns":  dict(chunk="columns",  shuffle=True,  compression="gzip",
+                   compression_opts=4),
+  "balanced": dict(chunk="balanced", shuffle=True,  compression="gzip",
+                   compression_opts=4),
+  "compact":  dict(chunk="frames",   shuffle=True,  compression="gzip",
+                   compression_opts=9),
+  "fast":     dict(chunk="frames",   shuffle=True,  compression="lzf"),
+  "lossless": dict(chunk="frames",   shuffle=True,  compression="gzip",
+                   compression_opts=4, scaleoffset=None)}
+
+#: Data type, quantization precision, and default layout of each kind of
+#: cpptraj output
+cpptraj_kinds = {
+  "dihedral":   dict(dtype=np.float32, scaleoffset=4, layout="balanced"),
+  "hbond":      dict(dtype=np.uint8,   scaleoffset=1, layout="frames"),
+  "jcoupling":  dict(dtype=np.float32, scaleoffset=3, layout="balanced"),
+  "natcon":     dict(dtype=np.float32, scaleoffset=4, layout="frames"),
+  "perresrmsd": dict(dtype=np.float32, scaleoffset=4, layout="frames"),
+  "secstruct":  dict(dtype=np.uint8,   scaleoffset=3, layout="frames")}
+
+#: Patterns of file names matched to each kind of cpptraj output when
+#: converting a directory tree, in the order in which they are tried
+batch_patterns = [
+  ("perresrmsd", "*perresrmsd*"),
+  ("secstruct",  "*dssp*"),
+  ("secstruct",  "*secstruct*"),
+  ("dihedral",   "*dihedral*"),
+  ("hbond",      "*hbond*"),
+  ("jcoupling",  "*jcoupling*"),
+  ("natcon",     "*natcon*")]
+
+#: Default factors by which the levels of a multi-resolution pyramid are
+#: reduced relative to their full-resolution dataset; see
+#: :func:`write_pyramid`
+pyramid_factors = [10, 100, 1000]
+
+def get_hdf5_kw(layout, shape, dtype, scaleoffset=None, chunk_bytes=2**18):
+    """
+    Prepares keyword arguments for :meth:`create_dataset
+    <h5py.Group.create_dataset>` from a storage layout.
+
+    Arguments:
+      layout (str, dict): Name of layout in :data:`hdf5_layouts`, or
+        layout
+      shape (tuple): Shape of dataset; a first dimension of 0 indicates
+        a dataset that will be extended along frames
+      dtype (dtype): Data type
+      scaleoffset (int, optional): Number of decimal places to retain,
+        unless overridden by *layout*
+      chunk_bytes (int): Approximate uncompressed size of each chunk
+
+    Returns:
+      dict: Keyword arguments
+    """
+    import six
+
+    if isinstance(layout, six.string_types):
+        if layout not in hdf5_layouts:
+            raise ValueError("Layout '{0}' not understood; ".format(layout) +
+              "must be one of {0}".format(sorted(hdf5_layouts.keys())))
+        layout = hdf5_layouts[layout]
+    layout = layout.copy()
+    chunk = layout.pop("chunk", "auto")
+    scaleoffset = layout.pop("scaleoffset", scaleoffset)
+
+    # Determine chunk shape
+    n_rows = shape[0]
+    n_cols = shape[1] if len(shape) > 1 else 1
+    if chunk == "auto" or len(shape) != 2:
+        chunks = True
+    else:
+        if chunk == "frames":
+            chunk_cols = n_cols
+        elif chunk == "columns":
+            chunk_cols = 1
+        elif chunk == "balanced":
+            chunk_cols = min(n_cols, 16)
+        else:
+            raise ValueError("Chunk '{0}' not understood".format(chunk))
+        chunk_rows = max(1, chunk_bytes // (chunk_cols *
+          np.dtype(dtype).itemsize))
+        if n_rows > 0:
+            chunk_rows = min(chunk_rows, n_rows)
+        chunks = (chunk_rows, chunk_cols)
+
+    hdf5_kw = dict(chunks=chunks, dtype=dtype, **layout)
+    if scaleoffset is not None:
+        hdf5_kw["scaleoffset"] = scaleoffset
+    return hdf5_kw
+
+def read_hdf5_dataset(dataset, frames=slice(None), columns=None):
+    """
+    Reads a selection of frames and columns from an hdf5 dataset.
+
+    Only the span of columns containing the selection is read, or, if
+    the selection is sparse, only the selected columns. Datasets
+    bit-packed by :func:`process_cpptraj` are unpacked; only the bytes
+    spanning the selected columns are read.
+
+    Arguments:
+      dataset (Dataset): :class:`Dataset<h5py.Dataset>` from which to
+        read
+      frames (slice): Frames to read
+      columns (list, optional): Indexes of columns to read; by default
+        all columns are read
+
+    Returns:
+      ndarray: Selected data
+    """
+    if "packbits" not in dataset.attrs:
+        if columns is None:
+            return dataset[frames]
+        unique, inverse = np.unique(np.asarray(columns, np.int64),
+          return_inverse=True)
+        if unique.size == 0:
+            return dataset[frames, :0]
+        start, end = int(unique[0]), int(unique[-1]) + 1
+        if end - start <= 2 * unique.size:
+            return dataset[frames, start:end][:,unique[inverse] - start]
+        return dataset[frames, unique.tolist()][:,inverse]
+
+    n_fields = int(dataset.attrs["packbits"])
+    if columns is None:
+        columns = np.arange(n_fields)
+    columns = np.asarray(columns)
+    start = columns.min() // 8
+    end = columns.max() // 8 + 1
+    bits = np.unpackbits(dataset[frames, start:end], axis=1)
+    return bits[:,columns - start * 8]
+
+def get_pyramid_address(node):
+    """
+    Determines the address of the multi-resolution pyramid of an hdf5
+    time series.
+
+    The pyramid of a group containing 'index' and 'values' datasets is
+    stored within the group as 'pyramid'; that of a dataset is stored
+    alongside it, with the suffix '_pyramid'.
+
+    Arguments:
+      node (Group, Dataset): Group or dataset containing time series
+
+    Returns:
+      str: Address of pyramid
+    """
+    if isinstance(node, h5py.Group):
+        return node.name.rstrip("/") + "/pyramid"
+    return node.name + "_pyramid"
+
+def write_pyramid(node, factors=None, block_size=None, extend=False,
+    verbose=1):
+    """
+    Writes a multi-resolution pyramid of an hdf5 time series.
+
+    Each level of the pyramid is a group named for the factor by which
+    it is reduced, containing datasets 'index', 'mean', 'min', and
+    'max', each row of which summarizes one consecutive interval of
+    *factor* rows of the full-resolution time series; rows following
+    the last complete interval are omitted, as when downsampling. The
+    number of rows from which the pyramid was calculated is stored in
+    its attribute 'source_rows', such that pyramids left out of date by
+    appending may be recognized.
+
+    The time series is read in blocks spanning a whole number of
+    intervals of every level, such that memory use is bounded by
+    *block_size*. An existing pyramid is replaced, unless *extend* is
+    enabled and it has the same factors; it is then extended in place
+    to cover rows appended since it was written. Only intervals
+    overlapping the last chunk of the time series previously covered,
+    which may have been requantized when extended, are recalculated.
+
+    Arguments:
+      node (Group, Dataset): Group containing 'index' and 'values'
+        datasets, or dataset, including those bit-packed by
+        :func:`process_cpptraj`
+      factors (list, optional): Factors by which to reduce each level;
+        by default :data:`pyramid_factors`
+      block_size (int, optional): Approximate number of values to read
+        at once; by default 2^22
+      extend (bool): Extend existing pyramid, if possible, rather than
+        replacing it; only appropriate if rows have only been appended
+        to the time series since the pyramid was written
+      verbose (int): Level of verbose output
+    """
+    from functools import reduce
+    try:
+        from math import gcd
+    except ImportError:
+        from fractions import gcd
+
+    # Process arguments
+    if isinstance(node, h5py.Group):
+        values, index = node["values"], node["index"]
+    else:
+        values, index = node, None
+    n_rows = values.shape[0]
+    n_cols = int(values.attrs.get("packbits", values.shape[1]))
+    if factors is None:
+        factors = pyramid_factors
+    factors = sorted(set(int(f) for f in factors if 1 < int(f) <= n_rows))
+    if block_size is None:
+        block_size = 2 ** 22
+    if values.dtype.kind == "f":
+        mean_dtype = values.dtype
+    else:
+        mean_dtype = np.float64
+    if "packbits" in values.attrs:
+        dtype = np.uint8
+    else:
+        dtype = values.dtype
+
+    unit = reduce(lambda a, b: a * b // gcd(a, b), factors, 1)
+    statistics = ["index", "mean", "min", "max"]
+
+    # Determine row from which to extend existing pyramid, if possible
+    h5_file = node.file
+    address = get_pyramid_address(node)
+    first_row = 0
+    if extend and address in h5_file:
+        pyramid = h5_file[address]
+        extendable = (list(pyramid.attrs.get("factors", [])) == factors
+          and int(pyramid.attrs.get("source_rows", n_rows + 1)) <= n_rows)
+        for factor in factors:
+            for statistic in statistics:
+                name = "{0}/{1}".format(factor, statistic)
+                if (name not in pyramid
+                or pyramid[name].maxshape[0] is not None):
+                    extendable = False
+        if extendable:
+            # Last chunk of time series may have been requantized when
+            # it was extended; recalculate from its start
+            first_row = int(pyramid.attrs["source_rows"])
+            if values.chunks is not None:
+                first_row = first_row // values.chunks[0] * values.chunks[0]
+            first_row = first_row // unit * unit
+
+    # Prepare levels
+    levels = {}
+    if first_row > 0:
+        pyramid.attrs["source_rows"] = n_rows
+        for factor in factors:
+            level = pyramid[str(factor)]
+            for statistic in statistics:
+                level[statistic].resize(n_rows // factor, axis=0)
+            levels[factor] = level
+    else:
+        if address in h5_file:
+            del h5_file[address]
+        pyramid = h5_file.create_group(address)
+        pyramid.attrs["factors"] = np.array(factors, np.int64)
+        pyramid.attrs["source_rows"] = n_rows
+        for factor in factors:
+            level = pyramid.create_group(str(factor))
+            shape = (n_rows // factor, n_cols)
+            level.create_dataset("index", shape=shape[:1], maxshape=(None,),
+              **get_hdf5_kw("fast", (0,), np.float64))
+            level.create_dataset("mean", shape=shape,
+              maxshape=(None, n_cols),
+              **get_hdf5_kw("fast", (0, n_cols), mean_dtype))
+            for statistic in ["min", "max"]:
+                level.create_dataset(statistic, shape=shape,
+                  maxshape=(None, n_cols),
+                  **get_hdf5_kw("fast", (0, n_cols), dtype))
+            levels[factor] = level
+    if len(factors) == 0:
+        return
+
+    # Reduce blocks spanning whole intervals of every level
+    n_block = max(1, block_size // max(1, n_cols) // unit) * unit
+    for start in range(first_row, n_rows, n_block):
+        stop = min(start + n_block, n_rows)
+        block = read_hdf5_dataset(values, slice(start, stop))
+        if index is None:
+            block_index = np.arange(start, stop, dtype=np.float64)
+        else:
+            block_index = np.asarray(index[start:stop], np.float64)
+        for factor, level in levels.items():
+            n_reduced = block.shape[0] // factor
+            if n_reduced == 0:
+                continue
+            reduced = np.reshape(block[:n_reduced * factor],
+              (n_reduced, factor, n_cols))
+            rows = slice(start // factor, start // factor + n_reduced)
+            level["index"][rows] = np.reshape(
+              block_index[:n_reduced * factor], (n_reduced, factor)).mean(1)
+            level["mean"][rows] = reduced.mean(axis=1)
+            level["min"][rows] = reduced.min(axis=1)
+            level["max"][rows] = reduced.max(axis=1)
+
+    if verbose >= 1:
+        if first_row > 0:
+            print("Extended pyramid at '{0}' from row {1} to {2}".format(
+              address, first_row, n_rows))
+        else:
+            print("Wrote pyramid of {0} levels, reduced by {1}, to "
+              "'{2}'".format(len(factors), ", ".join(str(f) for f in factors),
+              address))
+
+def open_infile(infile):
+    """
+    Opens a text infile for reading in binary mode.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text, gzip, or xz
+
+    Returns:
+      file: Open file object
+    """
+    if infile.endswith(".gz"):
+        import gzip
+
+        return gzip.open(infile, "rb")
+    elif infile.endswith(".xz"):
+        try:
+            import lzma
+        except ImportError:
+            from backports import lzma
+
+        return lzma.open(infile, "rb")
+    else:
+        return open(infile, "rb")
+
+def read_cpptraj_fields(infile):
+    """
+    Reads field names from the header of cpptraj output.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text or gzip
+
+    Returns:
+      list: Field names, not including '#Frame'
+    """
+    with open_infile(infile) as open_file:
+        fields = open_file.readline().decode("utf-8").split()
+    if len(fields) == 0 or fields.pop(0) != "#Frame":
+        raise TypeError("cpptraj2hdf5 currently only supports input " +
+                        "in the form of '#Frame field_1 field_2 ...'")
+    return fields
+
+def parse_cpptraj_lines(lines, n_fields, dtype, infile="", columns=None):
+    """
+    Parses lines of cpptraj output using pandas' C parser.
+
+    Arguments:
+      lines (list): Lines to parse, in bytes
+      n_fields (int): Number of fields following '#Frame'
+      dtype (dtype): Output data type; if None, the type of each column
+        is inferred as by :func:`read_csv<pandas.read_csv>`, and data is
+        returned as a DataFrame. Values are parsed directly into a
+        floating-point *dtype*, and otherwise in double precision
+      infile (str, optional): Path to input file, for error messages
+      columns (list, optional): Indexes of fields to parse, in
+        increasing order; other fields are skipped by the parser
+
+    Returns:
+      tuple: Frame numbers (ndarray) and data (ndarray or DataFrame)
+    """
+    from io import BytesIO
+    import pandas as pd
+
+    usecols = None
+    if columns is not None:
+        usecols = [0] + [c + 1 for c in columns]
+    parse_dtype = None
+    if dtype is not None and np.dtype(dtype).kind == "f":
+        parse_dtype = dict((c, np.float64 if i == 0 else dtype) for i, c in
+          enumerate(usecols or range(n_fields + 1)))
+    elif dtype is not None:
+        parse_dtype = np.float64
+    block = pd.read_csv(BytesIO(b"".join(lines)), sep=r"\s+", header=None,
+      engine="c", usecols=usecols, dtype=parse_dtype)
+    n_parsed = n_fields if columns is None else len(columns)
+    if block.shape[1] != n_parsed + 1:
+        raise ValueError("Expected {0} fields in '{1}', ".format(
+          n_parsed + 1, infile) + "found {0}".format(block.shape[1]))
+    frames = np.array(block.iloc[:,0].values, np.int64)
+    if dtype is None:
+        return frames, block.iloc[:,1:]
+    return frames, block.iloc[:,1:].to_numpy(dtype)
+
+def select_cpptraj_lines(lines, first=None, last=None, stride=1, skip=0):
+    """
+    Selects lines of cpptraj output within a window of frames.
+
+    Frames are assumed to be in increasing order. The window is located
+    by bisection, reading the frame number of only as many lines as
+    needed, such that lines outside of it need not be parsed.
+
+    Arguments:
+      lines (list): Consecutive lines, in bytes
+      first (float, optional): First frame of window
+      last (float, optional): Last frame of window
+      stride (int): Interval between selected lines
+      skip (int): Number of lines within window to skip before the first
+        selected line; carried between consecutive blocks of lines
+
+    Returns:
+      tuple: Selected lines, number of lines to skip in next block, and
+      whether lines following the window were reached
     """
-    .. todo:
-        - Support multiple infiles
+    def search(frame, side):
+        low, high = 0, len(lines)
+        while low < high:
+            middle = (low + high) // 2
+            value = float(lines[middle].split(None, 1)[0])
+            if value < frame or (side == "right" and value == frame):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    start = 0 if first is None else search(first, "left")
+    stop = len(lines) if last is None else max(start, search(last, "right"))
+    selected = lines[start:stop][skip::stride]
+
+    return selected, (skip - (stop - start)) % stride, stop < len(lines)
+
+def iter_cpptraj_blocks(infile, n_fields, dtype, block_size=None,
+    offset=None, n_threads=1, window=None, columns=None, growing=False):
+    """
+    Parses cpptraj output in blocks of rows.
+
+    Each block is parsed by pandas' C parser, so that memory use is
+    bounded by *block_size* rather than by the length of *infile*. If
+    *infile* is *growing*, a final line lacking a newline is assumed to
+    still be being written by cpptraj, and is not parsed; otherwise it
+    is parsed like any other.
+
+    If *n_threads* is greater than 1, blocks are parsed concurrently by
+    a pool of threads while subsequent blocks are read (and
+    decompressed); no more than two blocks per thread are held in
+    memory at once, and blocks are yielded in order.
+
+    If *window* is provided, only rows within it are parsed, and
+    reading stops once it has passed; see
+    :func:`select_cpptraj_lines`.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text, gzip, or xz
+      n_fields (int): Number of fields following '#Frame'
+      dtype (dtype): Output data type; see :func:`parse_cpptraj_lines`
+      block_size (int, optional): Number of rows to parse at once; by
+        default chosen such that each block holds approximately 2^22
+        values
+      offset (int, optional): Byte offset from which to begin parsing;
+        by default parsing begins following the header
+      n_threads (int): Number of threads with which to parse blocks
+      window (tuple, optional): First and last frames to parse, either
+        of which may be None, and interval between parsed rows
+      columns (list, optional): Indexes of fields to parse, in
+        increasing order; see :func:`parse_cpptraj_lines`
+      growing (bool): *infile* may still be being written, such that
+        parsing is to be resumed later from the returned byte offset
+
+    Yields:
+      tuple: Frame numbers (ndarray), data (ndarray or DataFrame), and
+      byte offset following each block
+    """
+    from collections import deque
+    from itertools import islice
+
+    if block_size is None:
+        block_size = max(1, 2 ** 22 // (n_fields + 1))
+
+    if n_threads is not None and n_threads > 1:
+        from multiprocessing.pool import ThreadPool
+
+        pool = ThreadPool(n_threads)
+    else:
+        pool = None
+    pending = deque()
+    try:
+        with open_infile(infile) as open_file:
+            if offset is None:
+                offset = len(open_file.readline())
+            else:
+                open_file.seek(offset)
+            skip, done = 0, False
+            while not done:
+                lines = list(islice(open_file, block_size))
+                if (growing and len(lines) > 0
+                and not lines[-1].endswith(b"\n")):
+                    lines.pop()
+                if len(lines) == 0:
+                    break
+                offset += sum(len(line) for line in lines)
+                if window is not None:
+                    lines, skip, done = select_cpptraj_lines(lines,
+                      window[0], window[1], window[2] or 1, skip)
+                    if len(lines) == 0:
+                        continue
+                if pool is None:
+                    frames, block = parse_cpptraj_lines(lines, n_fields,
+                      dtype, infile, columns)
+                    yield frames, block, offset
+                    continue
+                pending.append((pool.apply_async(parse_cpptraj_lines,
+                  (lines, n_fields, dtype, infile, columns)), offset))
+                del lines
+                if len(pending) >= 2 * n_threads:
+                    result, block_offset = pending.popleft()
+                    yield result.get() + (block_offset,)
+        while len(pending) > 0:
+            result, block_offset = pending.popleft()
+            yield result.get() + (block_offset,)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+def iter_gnu_blocks(infile, block_size=None):
+    """
+    Parses cpptraj output in gnuplot format in blocks of rows.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text or gzip
+      block_size (int, optional): Number of rows to parse at once
+
+    Yields:
+      ndarray: Triplets of frame number, column number, and value
+    """
+    from io import BytesIO
+    from itertools import islice
+    import pandas as pd
+
+    if block_size is None:
+        block_size = 2 ** 20
+
+    with open_infile(infile) as open_file:
+        for i in range(13):
+            next(open_file)
+        while True:
+            lines = list(islice(open_file, block_size))
+            if len(lines) == 0:
+                break
+            text = b"".join(lines)
+            if len(text.strip()) == 0:
+                continue
+
+            # Footer lines ('end', 'pause -1') are coerced to NaN and dropped
+            block = pd.read_csv(BytesIO(text), sep=r"\s+", header=None,
+              names=[0, 1, 2], engine="c")
+            block = block.apply(pd.to_numeric, errors="coerce").dropna()
+            if block.shape[0] > 0:
+                yield block.values
+
+def read_gnu(infile, dtype, block_size=None):
+    """
+    Reads cpptraj output in gnuplot format into a dense grid.
+
+    Triplets are scattered into the grid one block at a time, growing
+    the grid as needed, so that the complete table of triplets is never
+    held in memory alongside the grid.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text or gzip
+      dtype (dtype): Output data type
+      block_size (int, optional): Number of rows to parse at once
+
+    Returns:
+      ndarray: Grid of shape (frames, columns)
+    """
+    data = np.zeros((0, 0), dtype)
+    n_rows = n_cols = 0
+    for block in iter_gnu_blocks(infile, block_size):
+        rows = np.array(block[:,0], np.int64) - 1
+        cols = np.array(block[:,1], np.int64) - 1
+        n_rows = max(n_rows, rows.max() + 1)
+        n_cols = max(n_cols, cols.max() + 1)
+
+        # Grow geometrically along frames to amortize copies
+        if n_rows > data.shape[0] or n_cols > data.shape[1]:
+            grown = np.zeros((max(n_rows, 2 * data.shape[0]), n_cols), dtype)
+            grown[:data.shape[0],:data.shape[1]] = data
+            data = grown
+        data[rows, cols] = np.array(block[:,2], dtype)
+
+    return data[:n_rows,:n_cols]
+
+def process_infiles(infiles):
     """
-    from os import devnull
-    from subprocess import Popen, PIPE
+    Expands environment variables and wildcards in paths to infiles.
 
-    if infile.endswith("gnu"):
-        raw = np.genfromtxt(infile, skip_header=13,
-                  skip_footer=2,invalid_raise=False,
-                  dtype=np.float64)
-        data = np.zeros((int(np.max(raw[:,0])), int(np.max(raw[:,1]))), dtype)
-        for frame in raw:
-            data[int(frame[0]) - 1, int(frame[1]) - 1] = dtype(frame[2])
+    Paths matching each wildcard are sorted naturally, such that
+    'seg_2.dat' precedes 'seg_10.dat'; the order of *infiles* is
+    otherwise preserved.
+
+    Arguments:
+      infiles (str, list): Path(s) to input file(s); may contain
+        environment variables and wildcards
+
+    Returns:
+      list: Paths to input files
+    """
+    from glob import glob
+    from os.path import expandvars
+    import re
+    import six
+
+    def natural_key(path):
+        return [int(s) if s.isdigit() else s
+                for s in re.split(r"(\d+)", path)]
+
+    if isinstance(infiles, six.string_types):
+        infiles = [infiles]
+    processed_infiles = []
+    for infile in infiles:
+        processed_infiles.extend(sorted(glob(expandvars(infile)),
+          key=natural_key))
+    return processed_infiles
+
+def parse_cpptraj_segment(arguments):
+    """
+    Parses a complete segment of cpptraj output; used by worker
+    processes.
+
+    Arguments:
+      arguments (tuple): Path to input file, number of fields, dtype,
+        block size, byte offset, and whether infile is growing, as
+        passed to :func:`iter_cpptraj_blocks`
+
+    Returns:
+      tuple: Frame numbers (ndarray), data (ndarray), and byte offset
+      following segment
+    """
+    infile, n_fields, dtype, block_size, offset, growing = arguments
+
+    blocks = list(iter_cpptraj_blocks(infile, n_fields, dtype, block_size,
+      offset, growing=growing))
+    if len(blocks) == 0:
+        return (np.zeros(0, np.int64), np.zeros((0, n_fields), dtype),
+                offset)
+    frames, data, offsets = zip(*blocks)
+    return np.concatenate(frames), np.concatenate(data), offsets[-1]
+
+def iter_cpptraj_segments(infiles, n_fields, dtype, block_size=None,
+    n_processes=1, offset=None, growing=False):
+    """
+    Parses a series of cpptraj output segments in order.
+
+    With a single process, each segment is streamed in blocks; with
+    more, whole segments are parsed concurrently by a pool of worker
+    processes and yielded in the order of *infiles*. No more than
+    *n_processes* segments are submitted ahead of the segment being
+    yielded, so that at most that many parsed segments are held in
+    memory at once.
+
+    Arguments:
+      infiles (list): Paths to input files
+      n_fields (int): Number of fields following '#Frame'
+      dtype (dtype): Output data type
+      block_size (int, optional): Number of rows to parse at once
+      n_processes (int): Number of worker processes
+      offset (int, optional): Byte offset from which to begin parsing
+        first infile
+      growing (bool): Last infile may still be being written; see
+        :func:`iter_cpptraj_blocks`
+
+    Yields:
+      tuple: Index of segment within *infiles*, frame numbers
+      (ndarray), data (ndarray), and byte offset following block
+    """
+    offsets = [offset] + [None] * (len(infiles) - 1)
+    if n_processes is None or n_processes <= 1 or len(infiles) <= 1:
+        for i, infile in enumerate(infiles):
+            for frames, data, offset in iter_cpptraj_blocks(infile, n_fields,
+              dtype, block_size, offsets[i],
+              growing=growing and i == len(infiles) - 1):
+                yield i, frames, data, offset
+    else:
+        from collections import deque
+        from multiprocessing import Pool
+
+        pool = Pool(n_processes)
+        try:
+            pending = deque()
+            for i, infile in enumerate(infiles):
+                pending.append(pool.apply_async(parse_cpptraj_segment,
+                  [(infile, n_fields, dtype, block_size, offsets[i],
+                    growing and i == len(infiles) - 1)]))
+                if len(pending) > n_processes:
+                    yield (i - n_processes,) + pending.popleft().get()
+            for i in range(len(infiles) - len(pending), len(infiles)):
+                yield (i,) + pending.popleft().get()
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+def process_cpptraj(infiles, outfile, address, dtype, scaleoffset,
+    layout="auto", block_size=None, n_processes=1, overlap=0, append=False,
+    packbits=False, pyramid=None, verbose=1, **kwargs):
+    """
+    Processes output of cpptraj into an hdf5 dataset.
+
+    Text is parsed in blocks of *block_size* rows, each of which is
+    appended to a resizable, chunked dataset; memory use is therefore
+    bounded by *block_size* rather than the length of the trajectory.
+
+    Multiple *infiles* are treated as consecutive segments of a single
+    trajectory and written to one dataset in order. Frames that
+    overlap at segment boundaries are dropped: if frame numbering
+    continues across segments, frames whose number does not exceed the
+    last frame written are skipped; if numbering restarts at 1 in each
+    segment, the first *overlap* frames of each segment after the first
+    are skipped.
+
+    The last infile, byte offset, and frame converted are stored in the
+    attributes 'infile', 'byte_offset', and 'last_frame' of the dataset,
+    alongside 'fields'. If *append* is enabled and the dataset already
+    exists, parsing resumes from this point, and the dataset is extended
+    in place with only the frames that have been added since. Since the
+    last infile may then still be being written, a final line lacking a
+    newline is left to be parsed by a later append.
+
+    If *packbits* is enabled, binary data such as hydrogen bonds is
+    stored with eight fields per byte; the number of fields is stored in
+    the attribute 'packbits', and the dataset may be read using
+    :func:`read_hdf5_dataset`.
+
+    If *pyramid* is provided, a multi-resolution pyramid is written
+    alongside the dataset; see :func:`write_pyramid`. When appending,
+    an existing pyramid is extended with its previous factors.
+
+    Arguments:
+      infiles (str, list): Path(s) to input file(s); may be plain text
+        or gzip, may contain environment variables and wildcards
+      outfile (str): Path to output hdf5 file, may contain environment
+        variables
+      address (str): Address within output hdf5 file at which to save
+        dataset
+      dtype (dtype): Output data type
+      scaleoffset (int): Number of decimal places to retain
+      layout (str, dict): Storage layout; see :data:`hdf5_layouts`
+      block_size (int, optional): Number of rows to parse at once
+      n_processes (int): Number of processes with which to parse
+        segments concurrently
+      overlap (int): Number of frames at the start of each segment that
+        repeat the end of the previous segment, when frame numbering
+        restarts in each segment
+      append (bool): Extend existing dataset with frames added to
+        infiles since it was last written
+      packbits (bool): Store nonzero values as set bits, packed eight
+        fields per byte
+      pyramid (list, optional): Factors by which to reduce each level
+        of multi-resolution pyramid; if empty, :data:`pyramid_factors`
+      verbose (int): Level of verbose output
+      kwargs (dict): Additional keyword arguments
+    """
+    from os.path import abspath, expandvars, getsize
+    from .formats import sniff_infile
+
+    # Process arguments
+    infile_args = infiles
+    infiles = process_infiles(infiles)
+    if len(infiles) == 0:
+        raise IOError("No infiles found matching '{0}'".format(infile_args))
+    outfile = expandvars(outfile)
+
+    if sniff_infile(infiles[0]) == "gnu":
+        if len(infiles) > 1:
+            raise TypeError("cpptraj2hdf5 currently only supports a single "
+                            "infile in gnuplot format")
+        if verbose >= 1:
+            print("Loading gnuplot grid from '{0}'".format(infiles[0]))
+        data = read_gnu(infiles[0], dtype, block_size)
 
         # Open hdf5 file
-        with h5py.File(outfile) as hdf5_file:
-            hdf5_file.create_dataset(address, data=data, dtype=dtype,
-              chunks=True, compression="gzip", scaleoffset=scaleoffset)
+        with h5py.File(outfile, "a") as hdf5_file:
+            hdf5_file.create_dataset(address, data=data,
+              **get_hdf5_kw(layout, data.shape, dtype, scaleoffset))
+            if verbose >= 1:
+                print("Wrote {0} x {1} grid to '{2}[{3}]'".format(
+                  data.shape[0], data.shape[1], outfile, address))
 
     else:
-        # Determine dimensions of dataset
-        with open(devnull, "w") as fnull:
-
-            # Determine field names and prepare dtype
-            command = "head -n 1 {0}".format(infile)
-            process = Popen(command, stdout=PIPE, stderr=fnull, shell=True)
-            fields = process.stdout.read().split()
-            if fields.pop(0) != "#Frame":
-                raise TypeError("cpptraj2hdf5 currently only supports input " +
-                                "in the form of '#Frame field_1 field_2 ...'")
-            n_fields = len(fields)
+        # Determine field names and confirm they are consistent
+        fields = read_cpptraj_fields(infiles[0])
+        for infile in infiles[1:]:
+            if read_cpptraj_fields(infile) != fields:
+                raise ValueError("Fields of '{0}' do not ".format(infile) +
+                  "match those of '{0}'".format(infiles[0]))
+        n_fields = len(fields)
+        if verbose >= 1:
+            print("Loading {0} fields from {1} infiles, ".format(n_fields,
+              len(infiles)) + "starting with '{0}'".format(infiles[0]))
 
         # Open hdf5 file
-        with h5py.File(outfile) as hdf5_file:
-            def iter_func():
-                with open(infile, "r") as open_file:
-                    next(open_file)
-                    for line in open_file:
-                        line = line.split()[1:]
-                        for item in line:
-                            yield dtype(item)
-
-            data = np.fromiter(iter_func(), dtype=dtype)
-            data = data.reshape((-1, n_fields))
-            print(data.shape)
-            print(np.mean(data, axis=0))
-            hdf5_file.create_dataset(address, data=data, dtype=dtype,
-              chunks=True, compression="gzip", scaleoffset=scaleoffset)
-            hdf5_file[address].attrs["fields"] = list(fields)
+        with h5py.File(outfile, "a") as hdf5_file:
+            segment = None
+            continuous = False
+            skip = 0
+            last_frame = 0
+            offset = None
+            resumed = False
+
+            # Resume from end of existing dataset
+            if append and address in hdf5_file:
+                dataset = hdf5_file[address]
+                attrs = dataset.attrs
+                if [f.decode("utf-8") if isinstance(f, bytes) else f
+                    for f in attrs["fields"]] != fields:
+                    raise ValueError("Fields of '{0}' do not match ".format(
+                      infiles[0]) + "those of '{0}[{1}]'".format(outfile,
+                      address))
+                if "byte_offset" not in attrs:
+                    raise ValueError("'{0}[{1}]' does not ".format(outfile,
+                      address) + "record byte offset; cannot append")
+                infile = attrs["infile"]
+                if isinstance(infile, bytes):
+                    infile = infile.decode("utf-8")
+                abs_infiles = [abspath(f) for f in infiles]
+                if infile not in abs_infiles:
+                    raise ValueError("'{0}', last converted ".format(infile) +
+                      "into '{0}[{1}]', is not among infiles".format(outfile,
+                      address))
+                infiles = infiles[abs_infiles.index(infile):]
+                offset = int(attrs["byte_offset"])
+                if (not infiles[0].endswith(".gz")
+                and getsize(infiles[0]) < offset):
+                    raise ValueError("'{0}' is shorter than ".format(
+                      infiles[0]) + "previously converted; cannot append")
+                last_frame = int(attrs["last_frame"])
+                segment = 0
+                continuous = True
+                resumed = True
+                if verbose >= 1:
+                    print("Appending to {0} frames in '{1}[{2}]', ".format(
+                      dataset.shape[0], outfile, address) + "following " +
+                      "frame {0} of '{1}'".format(last_frame, infiles[0]))
+            elif packbits:
+                n_bytes = (n_fields + 7) // 8
+                dataset = hdf5_file.create_dataset(address,
+                  shape=(0, n_bytes), maxshape=(None, n_bytes),
+                  **get_hdf5_kw(layout, (0, n_bytes), np.uint8))
+                dataset.attrs["fields"] = np.array(fields, np.bytes_)
+                dataset.attrs["packbits"] = n_fields
+            else:
+                dataset = hdf5_file.create_dataset(address,
+                  shape=(0, n_fields), maxshape=(None, n_fields),
+                  **get_hdf5_kw(layout, (0, n_fields), dtype, scaleoffset))
+                dataset.attrs["fields"] = np.array(fields, np.bytes_)
+            packed = "packbits" in dataset.attrs
+
+            # Parse and append blocks
+            for i, frames, block, offset in iter_cpptraj_segments(infiles,
+              n_fields, dtype, block_size, n_processes, offset, append):
+
+                # Drop frames overlapping previous segment
+                if i != segment and frames.size > 0:
+                    segment = i
+                    continuous = (frames[0] > 1)
+                    skip = overlap if i > 0 and not continuous else 0
+                if continuous:
+                    keep = frames > last_frame
+                    frames, block = frames[keep], block[keep]
+                elif skip > 0:
+                    n_skip = min(skip, frames.size)
+                    frames, block = frames[n_skip:], block[n_skip:]
+                    skip -= n_skip
+                if frames.size > 0:
+                    if packed:
+                        block = np.packbits(block != 0, axis=1)
+                    last_frame = frames[-1]
+                    n_frames = dataset.shape[0]
+                    dataset.resize(n_frames + block.shape[0], axis=0)
+                    dataset[n_frames:] = block
+                    if verbose >= 2:
+                        print("Wrote frames {0}-{1} of '{2}'".format(
+                          frames[0], frames[-1], infiles[i]))
+
+                # Record position from which to resume
+                dataset.attrs["infile"] = abspath(infiles[i])
+                dataset.attrs["byte_offset"] = offset
+                dataset.attrs["last_frame"] = last_frame
+            if verbose >= 1:
+                print("Wrote {0} frames to '{1}[{2}]'".format(
+                  dataset.shape[0], outfile, address))
+
+            # Write multi-resolution pyramid
+            pyramid_address = get_pyramid_address(dataset)
+            if pyramid is None and pyramid_address in hdf5_file:
+                pyramid = hdf5_file[pyramid_address].attrs["factors"]
+            if pyramid is not None:
+                write_pyramid(dataset, list(pyramid) or None,
+                  block_size * n_fields if block_size else None,
+                  extend=resumed, verbose=verbose)
+
+def read_saxs(package, infile):
+    """
+    Reads SAXS profile(s) calculated using saxs_md, crysol, or foxs.
+
+    Arguments:
+      package (str): Program used to calculate profile; may be
+        'saxs_md', 'crysol', or 'foxs'
+      infile (str): Path to input file
+
+    Returns:
+      tuple: q (ndarray) and intensity (ndarray) of shape (frames, q)
+    """
+    if package == "saxs_md":
+        datum = np.loadtxt(infile, skiprows=3)
+        return datum[:,0], datum[np.newaxis,:,1]
+    elif package == "crysol" or package == "foxs":
+        datum = np.loadtxt(infile, comments=["#","D"])
+        q = np.unique(datum[:,0])
+        if datum.shape[0] % q.size != 0:
+            raise ValueError("Number of rows in '{0}' is not ".format(infile) +
+              "a multiple of the number of q points ({0})".format(q.size))
+        return q, np.reshape(datum[:,1], (-1, q.size))
+    else:
+        raise ValueError("SAXS package '{0}' not understood".format(package))
+
+def scan_saxs_infile(arguments):
+    """
+    Determines the number of frames in a SAXS infile by counting its
+    rows of data, without loading them; used by worker processes.
+
+    Arguments:
+      arguments (tuple): Package, path to input file, and number of q
+        points
+
+    Returns:
+      int: Number of frames in infile
+    """
+    package, infile, n_q = arguments
+
+    if package == "saxs_md":
+        skiprows, comments = 3, (b"#",)
+    else:
+        skiprows, comments = 0, (b"#", b"D")
+    n_rows = 0
+    with open(infile, "rb") as open_file:
+        for i, line in enumerate(open_file):
+            line = line.lstrip()
+            if (i >= skiprows and len(line) > 0
+            and not line.startswith(comments)):
+                n_rows += 1
+    if package == "saxs_md":
+        if n_rows != n_q:
+            raise ValueError("Number of rows in '{0}' does not ".format(
+              infile) + "match the number of q points ({0})".format(n_q))
+        return 1
+    if n_rows % n_q != 0:
+        raise ValueError("Number of rows in '{0}' is not ".format(infile) +
+          "a multiple of the number of q points ({0})".format(n_q))
+    return n_rows // n_q
+
+def parse_saxs_infile(arguments):
+    """
+    Parses a SAXS infile and writes its intensity directly into a
+    preallocated memory-mapped array; used by worker processes.
+
+    Arguments:
+      arguments (tuple): Index of infile, package, path to input file,
+        q, path to memory-mapped intensity array, and row offset at
+        which to write
+
+    Returns:
+      int: Index of infile
+    """
+    i, package, infile, q, intensity_path, offset = arguments
+
+    datum_q, datum_intensity = read_saxs(package, infile)
+    if datum_q.shape != q.shape or not (datum_q == q).all():
+        raise ValueError("q of '{0}' does not match that ".format(infile) +
+          "of first infile")
+    intensity = np.load(intensity_path, mmap_mode="r+")
+    intensity[offset:offset+datum_intensity.shape[0]] = datum_intensity
+    intensity.flush()
+    del intensity
+
+    return i
 
 def process_saxs(package, infiles, outfile, address, dtype, scaleoffset,
-    verbose=1, **kwargs):
+    layout="auto", n_processes=1, verbose=1, **kwargs):
     """
     Processes SAXS data calcualted from MD simulations using saxs_md,
     crysol, and foxs
 
+    Infiles are first scanned to determine the number of frames in
+    each, which sizes a memory-mapped intensity array. Infiles are then
+    parsed, optionally by a pool of worker processes, each of which
+    writes directly into the array. Progress is recorded alongside
+    *outfile*; if processing is interrupted, a subsequent run with the
+    same infiles resumes from the infiles not yet parsed. Once all
+    infiles are parsed, the array is copied into *outfile*.
+
     Arguments:
-      package (str):
+      package (str, optional): Program used to calculate profiles; may
+        be 'saxs_md', 'crysol', or 'foxs'; by default identified from
+        the header of the first infile using :func:`sniff_infile
+        <moldynplot.formats.sniff_infile>`, or 'saxs_md' if not
+        identified
       infiles (list): Path(s) to input file(s), may contain environment
         variables and wildcards
       outfile (str): Path to output hdf5 file, may contain environment
@@ -83,81 +1029,120 @@ def process_saxs(package, infiles, outfile, address, dtype, scaleoffset,
         dataset
       dtype (dtype): Output data type
       scaleoffset (int): Number of decimal places to retain
+      layout (str, dict): Storage layout of intensity; see
+        :data:`hdf5_layouts`
+      n_processes (int): Number of processes with which to parse infiles
+        concurrently
       verbose (int): Level of verbose output
       kwargs (dict): Additional keyword arguments
     """
-    from glob import glob
-    from os.path import expandvars
+    from os import remove
+    from os.path import expandvars, isfile
+    import json
+    from .formats import sniff_infile
 
     # Process arguments
-    processed_infiles = []
-    for infile in infiles:
-        processed_infiles.extend(sorted(glob(expandvars(infile))))
-    if len(processed_infiles) == 0:
-        print("No infiles found matching '{0}', exiting".format(infiles))
+    infile_args = infiles
+    infiles = process_infiles(infiles)
+    if len(infiles) == 0:
+        print("No infiles found matching '{0}', exiting".format(infile_args))
         return
-    infiles = processed_infiles
+    if package is None:
+        package = sniff_infile(infiles[0])
+        if package not in ["saxs_md", "crysol", "foxs"]:
+            package = "saxs_md"
     if verbose >= 1:
         print("Loading SAXS data from {0} infiles, ".format(len(infiles)) +
-              "starting with '{0}'".format(infiles[0]))
+              "starting with '{0}', ".format(infiles[0]) +
+              "as output of '{0}'".format(package))
     outfile = expandvars(outfile)
+    partial = "{0}.{1}.partial".format(outfile,
+      address.strip("/").replace("/", "_"))
+    intensity_path = partial + ".npy"
+    done_path = partial + "_done.npy"
+    state_path = partial + ".json"
 
-    # Load data from saxs_md
-    if package == "saxs_md":
-        q = None
-        data = None
-        for i, infile in enumerate(infiles):
-            if verbose >= 2:
-                print("Loading SAXS data from {0}".format(infile))
-            datum = np.loadtxt(infile, skiprows=3)
-            if q is None:
-                q = datum[:,0]
-                if verbose >= 1:
-                    print("q contains {0} points ".format(q.size) +
-                          "ranging from {0} to {1} Å^-1".format(q[0], q[-1]))
-                if verbose >= 2:
-                    print("q:\n{0}".format(q))
-            else:
-                if not (datum[:,0] == q).all():
-                    raise()
-            if data is None:
-                data = np.zeros((len(infiles), q.size))
-            data[i,:] = datum[:,1]
+    # Determine q from first infile
+    q = read_saxs(package, infiles[0])[0]
+    if verbose >= 1:
+        print("q contains {0} points ".format(q.size) +
+              "ranging from {0} to {1} Å^-1".format(q[0], q[-1]))
+    if verbose >= 2:
+        print("q:\n{0}".format(q))
 
-    # Load data from crysol or foxs
-    elif package == "crysol" or package == "foxs":
-        q = None
-        data = None
-        j = 0
-        for infile in infiles:
+    if n_processes is not None and n_processes > 1:
+        from multiprocessing import Pool
+
+        pool = Pool(n_processes)
+        map_func, imap_func = pool.map, pool.imap_unordered
+    else:
+        pool = None
+        map_func, imap_func = map, map
+    try:
+
+        # Resume from previous run, if applicable
+        state = None
+        if isfile(state_path) and isfile(intensity_path) and isfile(done_path):
+            with open(state_path, "r") as state_file:
+                state = json.load(state_file)
+            if state["package"] != package or state["infiles"] != infiles:
+                state = None
+        if state is not None:
+            n_frames = np.array(state["n_frames"], np.int64)
+            done = np.load(done_path, mmap_mode="r+")
+            if verbose >= 1:
+                print("Resuming; {0} of {1} infiles ".format(done.sum(),
+                  len(infiles)) + "previously loaded")
+
+        # Otherwise scan infiles and preallocate intensity
+        else:
+            n_frames = np.array(list(map_func(scan_saxs_infile,
+              [(package, infile, q.size) for infile in infiles])), np.int64)
+            np.lib.format.open_memmap(intensity_path, mode="w+", dtype=dtype,
+              shape=(int(n_frames.sum()), q.size))
+            done = np.lib.format.open_memmap(done_path, mode="w+",
+              dtype=np.bool_, shape=(len(infiles),))
+            with open(state_path, "w") as state_file:
+                json.dump(dict(package=package, infiles=infiles,
+                  n_frames=n_frames.tolist()), state_file)
+        offsets = np.concatenate(([0], np.cumsum(n_frames)[:-1]))
+
+        # Parse infiles into intensity
+        pending = [(i, package, infiles[i], q, intensity_path, offsets[i])
+                   for i in np.where(~done)[0]]
+        n_done = done.sum()
+        interval = max(1, len(infiles) // 10)
+        for i in imap_func(parse_saxs_infile, pending):
+            done[i] = True
+            n_done += 1
             if verbose >= 2:
-                print("Loading SAXS data from {0}".format(infile))
-            datum = np.loadtxt(infile, comments=["#","D"])
-            if q is None:
-                q = np.unique(datum[:,0])
+                print("Loaded SAXS data from {0}".format(infiles[i]))
+            if n_done % interval == 0 or n_done == len(infiles):
+                done.flush()
                 if verbose >= 1:
-                    print("q contains {0} points ".format(q.size) +
-                          "ranging from {0} to {1} Å^-1".format(q[0], q[-1]))
-                if verbose >= 2:
-                    print("q:\n{0}".format(q))
-            else:
-                if not (np.unique(datum[:,0]) == q).all():
-                    raise()
-            n_frames = datum.shape[0] / q.size
-            if data is None:
-                data = np.zeros((n_frames*len(infiles), q.size))
-            intensity = np.reshape(datum[:,1], (n_frames, q.size))
-            data[j:j+n_frames,:] = intensity
-            j += n_frames
+                    print("Loaded {0} of {1} infiles".format(n_done,
+                      len(infiles)))
+        done.flush()
+        if pool is not None:
+            pool.close()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
 
+    intensity = np.load(intensity_path, mmap_mode="r")
     if verbose >= 1:
-        print("Loaded {0} intensity datasets".format(data.shape[0]))
+        print("Loaded {0} intensity datasets".format(intensity.shape[0]))
     if verbose >= 2:
-        print("Intensity:\n{0}".format(data))
-        print(data.shape)
+        print("Intensity:\n{0}".format(intensity))
+        print(intensity.shape)
 
     # Open hdf5 file
-    with h5py.File(outfile) as hdf5_file:
+    # Datasets may remain from a run interrupted while writing them
+    with h5py.File(outfile, "a") as hdf5_file:
+        for name in [address + "/q", address + "/intensity"]:
+            if name in hdf5_file:
+                del hdf5_file[name]
         if verbose >= 1:
             print("Writing q to '{0}[{1}/q]'".format(outfile, address))
         hdf5_file.create_dataset(address + "/q", data=q, dtype=dtype,
@@ -165,9 +1150,371 @@ def process_saxs(package, infiles, outfile, address, dtype, scaleoffset,
         if verbose >= 1:
             print("Writing intensity to '{0}[{1}/intensity]'".format(outfile,
               address))
-        hdf5_file.create_dataset(address + "/intensity", data=data,
-          dtype=dtype, chunks=True, compression="gzip",
-          scaleoffset=scaleoffset)
+        dataset = hdf5_file.create_dataset(address + "/intensity",
+          shape=intensity.shape,
+          **get_hdf5_kw(layout, intensity.shape, dtype, scaleoffset))
+        block_size = max(1, 2 ** 22 // q.size)
+        for i in range(0, intensity.shape[0], block_size):
+            dataset[i:i+block_size] = intensity[i:i+block_size]
+    del intensity, done
+
+    # Clean up
+    for path in [intensity_path, done_path, state_path]:
+        remove(path)
+
+def hash_infile(infile, block_size=2**20):
+    """
+    Calculates the SHA-1 digest of the contents of an infile.
+
+    Arguments:
+      infile (str): Path to input file
+      block_size (int): Number of bytes to read at once
+
+    Returns:
+      str: Hexadecimal digest
+    """
+    import hashlib
+
+    digest = hashlib.sha1()
+    with open(infile, "rb") as open_file:
+        for block in iter(lambda: open_file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def find_batch_infiles(inputs, outdir=None):
+    """
+    Determines the infiles, kinds, and outfiles of a batch conversion.
+
+    Each input may be a directory, which is searched recursively for
+    cpptraj output whose file name matches one of
+    :data:`batch_patterns`, or a manifest, each line of which contains
+    the path to an infile, its kind, and optionally the path to its
+    outfile. If a line contains only the path to an infile, its kind is
+    determined from :data:`batch_patterns`. Relative paths are relative
+    to the directory or to the directory containing the manifest.
+    Unless specified by the manifest, each outfile is placed at the same
+    relative path as its infile, within *outdir* if provided, with its
+    extension replaced by '.h5'.
+
+    Arguments:
+      inputs (str, list): Path(s) to directories and/or manifests; may
+        contain environment variables
+      outdir (str, optional): Directory in which to place outfiles
+
+    Returns:
+      list: Tuples of path to infile, kind, and path to outfile
+    """
+    from fnmatch import fnmatch
+    from os import walk
+    from os.path import (abspath, basename, dirname, expandvars, isabs,
+      isdir, join, relpath, splitext)
+    import six
+    from .formats import sniff_infile
+
+    if isinstance(inputs, six.string_types):
+        inputs = [inputs]
+
+    def get_outfile(infile, root):
+        if infile.endswith(".gz"):
+            infile = infile[:-3]
+        outfile = splitext(relpath(infile, root))[0] + ".h5"
+        return abspath(join(root if outdir is None else expandvars(outdir),
+          outfile))
+
+    batch = []
+    for path in inputs:
+        path = abspath(expandvars(path))
+        if isdir(path):
+            for directory, _, file_names in walk(path):
+                for file_name in sorted(file_names):
+                    for kind, pattern in batch_patterns:
+                        if fnmatch(file_name, pattern):
+                            break
+                    else:
+                        continue
+                    infile = join(directory, file_name)
+                    if sniff_infile(infile) not in ["cpptraj", "gnu"]:
+                        continue
+                    batch.append((infile, kind, get_outfile(infile, path)))
+        else:
+            root = dirname(path)
+            with open(path, "r") as manifest:
+                for i, line in enumerate(manifest, 1):
+                    fields = line.split("#")[0].split()
+                    if len(fields) == 0:
+                        continue
+                    if len(fields) == 1:
+                        for kind, pattern in batch_patterns:
+                            if fnmatch(basename(fields[0]), pattern):
+                                fields.append(kind)
+                                break
+                        else:
+                            raise ValueError("Kind of '{0}' on line ".format(
+                              fields[0]) + "{0} of '{1}' ".format(i, path) +
+                              "not specified and could not be determined")
+                    if fields[1] not in cpptraj_kinds:
+                        raise ValueError("Kind '{0}' of '{1}' on line ".format(
+                          fields[1], fields[0]) + "{0} of '{1}' ".format(i,
+                          path) + "not understood")
+                    infile = expandvars(fields[0])
+                    if not isabs(infile):
+                        infile = join(root, infile)
+                    if len(fields) >= 3:
+                        outfile = expandvars(fields[2])
+                        if not isabs(outfile):
+                            outfile = join(root, outfile)
+                    else:
+                        outfile = get_outfile(infile, root)
+                    batch.append((abspath(infile), fields[1],
+                      abspath(outfile)))
+
+    outfiles = [outfile for _, _, outfile in batch]
+    for outfile in set(outfiles):
+        if outfiles.count(outfile) > 1:
+            raise ValueError("Multiple infiles would be converted to "
+                             "'{0}'".format(outfile))
+
+    return batch
+
+def convert_batch_infile(arguments):
+    """
+    Converts one infile of a batch, unless its outfile is up to date;
+    used by worker processes.
+
+    An outfile is up to date if it is newer than its infile, or if the
+    SHA-1 digest of the infile matches that stored in the 'sha1'
+    attribute of the dataset. Conversion is to a temporary file, which
+    replaces the outfile only once complete.
+
+    Arguments:
+      arguments (tuple): Path to infile, kind, path to outfile, layout,
+        and whether to convert even if outfile is up to date
+
+    Returns:
+      tuple: Path to infile, kind, path to outfile, status ('converted'
+      or 'skipped'), size of infile in bytes, number of frames, and
+      time elapsed in seconds
+    """
+    from os import makedirs, remove, rename, utime
+    from os.path import dirname, getmtime, getsize, isdir, isfile
+    from time import time
+
+    infile, kind, outfile, layout, force = arguments
+    start = time()
+    size = getsize(infile)
+
+    # Skip if up to date
+    digest = None
+    if not force and isfile(outfile):
+        n_frames = stored = None
+        with h5py.File(outfile, "r") as hdf5_file:
+            if kind in hdf5_file:
+                n_frames = hdf5_file[kind].shape[0]
+                stored = hdf5_file[kind].attrs.get("sha1")
+        if n_frames is not None:
+            if getmtime(outfile) >= getmtime(infile):
+                return (infile, kind, outfile, "skipped", size, n_frames,
+                  time() - start)
+            digest = hash_infile(infile)
+            if isinstance(stored, bytes):
+                stored = stored.decode("utf-8")
+            if stored == digest:
+                utime(outfile, None)
+                return (infile, kind, outfile, "skipped", size, n_frames,
+                  time() - start)
+
+    # Convert to temporary file and replace outfile
+    if not isdir(dirname(outfile)):
+        try:
+            makedirs(dirname(outfile))
+        except OSError:
+            if not isdir(dirname(outfile)):
+                raise
+    partial = outfile + ".partial"
+    if isfile(partial):
+        remove(partial)
+    kind_kw = cpptraj_kinds[kind]
+    process_cpptraj(infiles=infile, outfile=partial, address=kind,
+      dtype=kind_kw["dtype"], scaleoffset=kind_kw["scaleoffset"],
+      layout=kind_kw["layout"] if layout is None else layout, verbose=0)
+    if digest is None:
+        digest = hash_infile(infile)
+    with h5py.File(partial, "a") as hdf5_file:
+        hdf5_file[kind].attrs["sha1"] = digest
+        n_frames = hdf5_file[kind].shape[0]
+    if isfile(outfile):
+        remove(outfile)
+    rename(partial, outfile)
+
+    return (infile, kind, outfile, "converted", size, n_frames,
+      time() - start)
+
+def process_batch(inputs, outdir=None, layout=None, n_processes=1,
+    force=False, summary=None, verbose=1, **kwargs):
+    """
+    Converts a batch of cpptraj output into hdf5 files.
+
+    Infiles are converted concurrently, each to its own outfile, at an
+    address named for its kind. Outfiles that are up to date are
+    skipped; see :func:`convert_batch_infile`.
+
+    Arguments:
+      inputs (str, list): Path(s) to directories and/or manifests; see
+        :func:`find_batch_infiles`
+      outdir (str, optional): Directory in which to place outfiles
+      layout (str, dict, optional): Storage layout of datasets; by
+        default the layout of each kind in :data:`cpptraj_kinds`
+      n_processes (int): Number of infiles to convert concurrently
+      force (bool): Convert infiles even if outfiles are up to date
+      summary (str, optional): Path to text file to which to write
+        summary of throughput
+      verbose (int): Level of verbose output
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: Status and throughput of each infile
+    """
+    from time import time
+    import pandas as pd
+
+    batch = find_batch_infiles(inputs, outdir)
+    if verbose >= 1:
+        print("Converting {0} infiles using {1} processes".format(len(batch),
+          n_processes))
+
+    if n_processes is not None and n_processes > 1:
+        from multiprocessing import Pool
+
+        pool = Pool(n_processes)
+        imap_func = pool.imap_unordered
+    else:
+        pool = None
+        imap_func = map
+    start = time()
+    try:
+        results = []
+        for result in imap_func(convert_batch_infile,
+          [(infile, kind, outfile, layout, force)
+          for infile, kind, outfile in batch]):
+            results.append(result)
+            if verbose >= 2 or (verbose >= 1 and result[3] == "converted"):
+                print("{0} '{1}' ({2} frames) to '{3}[{4}]'".format(
+                  result[3].capitalize(), result[0], result[5], result[2],
+                  result[1]))
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finally:
+        if pool is not None:
+            pool.terminate()
+    elapsed = time() - start
+
+    # Summarize throughput
+    results = pd.DataFrame([r[1:] for r in results],
+      index=[r[0] for r in results], columns=["kind", "outfile", "status",
+      "size (MB)", "frames", "time (s)"])
+    results.index.name = "infile"
+    results["size (MB)"] /= 2 ** 20
+    results["MB/s"] = results["size (MB)"] / results["time (s)"]
+    results["frames/s"] = results["frames"] / results["time (s)"]
+    results = results.loc[[infile for infile, _, _ in batch]]
+    converted = results[results["status"] == "converted"]
+    if summary is not None:
+        with open(summary, "w") as summary_file:
+            summary_file.write(results.to_string() + "\n")
+    if verbose >= 1:
+        print("Converted {0} and skipped {1} infiles in {2:.1f} s".format(
+          converted.shape[0], results.shape[0] - converted.shape[0], elapsed))
+        if converted.shape[0] > 0:
+            print("Overall throughput {0:.1f} MB/s, {1:.0f} frames/s".format(
+              converted["size (MB)"].sum() / elapsed,
+              converted["frames"].sum() / elapsed))
+
+    return results
+
+def benchmark_layouts(infile, dtype=np.float32, scaleoffset=None,
+    layouts=None, n_repeats=3, verbose=1, **kwargs):
+    """
+    Measures the performance of storage layouts on a sample of data.
+
+    For each layout, times writing the sample to a temporary hdf5 file,
+    reading the complete dataset, reading a single column, and reading
+    a window of 10% of frames; reads are timed as the best of
+    *n_repeats*.
+
+    Arguments:
+      infile (str): Path to sample cpptraj output; may be in '#Frame'
+        or gnuplot format, and may contain environment variables
+      dtype (dtype): Data type
+      scaleoffset (int, optional): Number of decimal places to retain
+      layouts (list, optional): Names of layouts in
+        :data:`hdf5_layouts` to measure; by default all are measured
+      n_repeats (int): Number of times to repeat each read
+      verbose (int): Level of verbose output
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: Size and timings of each layout
+    """
+    from os import close, remove
+    from os.path import getsize
+    from tempfile import mkstemp
+    from time import time
+    import pandas as pd
+    from .formats import sniff_infile
+
+    # Load sample
+    infile = process_infiles(infile)[0]
+    if sniff_infile(infile) == "gnu":
+        data = read_gnu(infile, dtype)
+    else:
+        n_fields = len(read_cpptraj_fields(infile))
+        data = np.concatenate([block for _, block, _ in
+          iter_cpptraj_blocks(infile, n_fields, dtype)])
+    if verbose >= 1:
+        print("Benchmarking layouts using {0} x {1} sample ".format(
+          data.shape[0], data.shape[1]) + "from '{0}'".format(infile))
+    if layouts is None:
+        layouts = sorted(hdf5_layouts.keys())
+    column = data.shape[1] // 2
+    window = slice(data.shape[0] * 9 // 20, data.shape[0] * 11 // 20)
+
+    # Measure
+    results = []
+    for layout in layouts:
+        handle, path = mkstemp(suffix=".h5")
+        close(handle)
+        try:
+            start = time()
+            with h5py.File(path, "w") as hdf5_file:
+                hdf5_file.create_dataset("data", data=data,
+                  **get_hdf5_kw(layout, data.shape, dtype, scaleoffset))
+            write = time() - start
+            size = getsize(path) / 2 ** 20
+
+            def time_read(selection):
+                best = None
+                for i in range(n_repeats):
+                    start = time()
+                    with h5py.File(path, "r") as hdf5_file:
+                        hdf5_file["data"][selection]
+                    elapsed = time() - start
+                    if best is None or elapsed < best:
+                        best = elapsed
+                return best
+
+            results.append((write, size, time_read(np.s_[:]),
+              time_read(np.s_[:, column]), time_read(np.s_[window])))
+        finally:
+            remove(path)
+
+    results = pd.DataFrame(results, index=layouts, columns=["write (s)",
+      "size (MB)", "full read (s)", "column read (s)", "window read (s)"])
+    results.index.name = "layout"
+    if verbose >= 1:
+        print(results)
+
+    return results
 
 #################################### MAIN #####################################
 if __name__ == "__main__":
@@ -190,21 +1537,22 @@ if __name__ == "__main__":
       "-s", "--saxs_md",
       action   = "store_const",
       const    = "saxs_md",
-      default  = "saxs_md",
+      default  = None,
       dest     = "package",
-      help     = "parse output from AmberTools' 'saxs_md' program (default)")
+      help     = "parse output from AmberTools' 'saxs_md' program (default "
+                 "if program is not identified from header of first infile)")
     saxs_package.add_argument(
       "-c", "--crysol",
       action   = "store_const",
       const    = "crysol",
-      default  = "saxs_md",
+      default  = None,
       dest     = "package",
       help     = "parse output from 'crysol' program")
     saxs_package.add_argument(
       "-f", "--foxs",
       action   = "store_const",
       const    = "foxs",
-      default  = "saxs_md",
+      default  = None,
       dest     = "package",
       help     = "parse output from 'FOXS' program")
     saxs_parser.add_argument(
@@ -217,24 +1565,69 @@ if __name__ == "__main__":
       "outfile",
       type     = str,
       help     = "HDF5 file to which to dataset will be output")
+    saxs_parser.add_argument(
+      "-n_processes",
+      type     = int,
+      default  = 1,
+      help     = "number of processes with which to parse infiles "
+                 "concurrently (default: %(default)s)")
     saxs_parser.set_defaults(
       function    = process_saxs,
       address     = "saxs",
       dtype       = np.float32,
-      scaleoffset = 3)
+      scaleoffset = 3,
+      layout      = "frames")
 
     # Cpptraj
     cpptraj_parser = argparse.ArgumentParser(add_help=False)
     cpptraj_parser.add_argument(
-      "infile",
+      "infiles",
+      nargs    = "+",
       type     = str,
       metavar  = "infile",
-      help     = "file from which to load cpptraj output; "
-                 "may be plain text or gzip")
+      help     = "file(s) from which to load cpptraj output; may be plain "
+                 "text or gzip; multiple files are treated as consecutive "
+                 "segments of one trajectory")
     cpptraj_parser.add_argument(
       "outfile",
       type     = str,
       help     = "HDF5 file to which to dataset will be output")
+    cpptraj_parser.add_argument(
+      "-block_size",
+      type     = int,
+      help     = "number of rows to parse and write at once; bounds memory "
+                 "usage (default: approximately 2^22 values per block)")
+    cpptraj_parser.add_argument(
+      "-n_processes",
+      type     = int,
+      default  = 1,
+      help     = "number of processes with which to parse infiles "
+                 "concurrently (default: %(default)s)")
+    cpptraj_parser.add_argument(
+      "-overlap",
+      type     = int,
+      default  = 0,
+      help     = "number of frames at the start of each segment that repeat "
+                 "the end of the previous segment, if frame numbering "
+                 "restarts in each segment (default: %(default)s)")
+    cpptraj_parser.add_argument(
+      "-packbits",
+      action   = "store_true",
+      help     = "store binary data, such as hydrogen bonds, packed eight "
+                 "fields per byte")
+    cpptraj_parser.add_argument(
+      "-pyramid",
+      type     = int,
+      nargs    = "*",
+      metavar  = "factor",
+      help     = "store a multi-resolution pyramid of levels reduced by each "
+                 "factor, alongside the dataset (default factors: "
+                 "{0})".format(" ".join(str(f) for f in pyramid_factors)))
+    cpptraj_parser.add_argument(
+      "-append",
+      action   = "store_true",
+      help     = "extend existing dataset with only the frames added to "
+                 "infiles since it was last written")
     cpptraj_parser.set_defaults(
       function = process_cpptraj)
 
@@ -243,22 +1636,19 @@ if __name__ == "__main__":
       parents     = [cpptraj_parser],
       help        = "cpptraj's 'dihedral' or 'multidihedral'").set_defaults(
       address     = "dihedral",
-      dtype       = np.float32,
-      scaleoffset = 4)
+      **cpptraj_kinds["dihedral"])
     kind_subparser.add_parser(
       name        = "hbond",
       parents     = [cpptraj_parser],
       help        = "cpptraj's 'hbond'").set_defaults(
       address     = "hbond",
-      dtype       = np.uint8,
-      scaleoffset = 1)
+      **cpptraj_kinds["hbond"])
     kind_subparser.add_parser(
       name        = "jcoupling",
       parents     = [cpptraj_parser],
       help        = "cpptraj's 'jcoupling'").set_defaults(
       address     = "jcoupling",
-      dtype       = np.float32,
-      scaleoffset = 3)
+      **cpptraj_kinds["jcoupling"])
     kind_subparser.add_parser(
       name        = "natcon",
       parents     = [cpptraj_parser],
@@ -266,30 +1656,104 @@ if __name__ == "__main__":
                     "distances, not cpptraj's 'nativecontacts' command, which "
                     "does not appear to work").set_defaults(
       address     = "natcon",
-      dtype       = np.float32,
-      scaleoffset = 4)
+      **cpptraj_kinds["natcon"])
     kind_subparser.add_parser(
       name        = "perresrmsd",
       parents     = [cpptraj_parser],
       help        = "cpptraj's 'rms' with 'perres' option").set_defaults(
       address     = "perresrmsd",
-      dtype       = np.float32,
-      scaleoffset = 4)
+      **cpptraj_kinds["perresrmsd"])
     kind_subparser.add_parser(
       name        = "secstruct",
       parents     = [cpptraj_parser],
       help        = "cpptraj's 'secstruct'").set_defaults(
       address     = "secstruct",
-      dtype       = np.uint8,
-      scaleoffset = 3)
+      **cpptraj_kinds["secstruct"])
 
-    # Verbosity
-    for p in kind_subparser.choices.values():
+    # Batch
+    batch_parser = kind_subparser.add_parser(
+      name     = "batch",
+      help     = "convert each file of cpptraj output found in a directory "
+                 "tree or listed in a manifest")
+    batch_parser.add_argument(
+      "inputs",
+      nargs    = "+",
+      type     = str,
+      metavar  = "input",
+      help     = "directory to search for files named after their kind of "
+                 "output (e.g. 'perresrmsd.dat'), or manifest listing "
+                 "'infile kind [outfile]' on each line")
+    batch_parser.add_argument(
+      "-outdir",
+      type     = str,
+      help     = "directory in which to place outfiles, at the same relative "
+                 "paths as their infiles (default: alongside infiles)")
+    batch_parser.add_argument(
+      "-n_processes",
+      type     = int,
+      default  = 1,
+      help     = "number of infiles to convert concurrently (default: "
+                 "%(default)s)")
+    batch_parser.add_argument(
+      "-force",
+      action   = "store_true",
+      help     = "convert infiles even if outfiles are up to date")
+    batch_parser.add_argument(
+      "-summary",
+      type     = str,
+      help     = "text file to which to write throughput of each infile")
+    batch_parser.set_defaults(
+      function = process_batch)
+
+    # Benchmark
+    benchmark_parser = kind_subparser.add_parser(
+      name     = "benchmark",
+      help     = "measure write, full read, column read, and window read "
+                 "performance of each storage layout on a sample file")
+    benchmark_parser.add_argument(
+      "infile",
+      type     = str,
+      help     = "sample cpptraj output")
+    benchmark_parser.add_argument(
+      "-kind",
+      type     = str,
+      default  = "perresrmsd",
+      choices  = sorted(cpptraj_kinds.keys()),
+      help     = "kind of cpptraj output, from which data type and precision "
+                 "are taken (default: %(default)s)")
+    benchmark_parser.add_argument(
+      "-layouts",
+      nargs    = "+",
+      type     = str,
+      choices  = sorted(hdf5_layouts.keys()),
+      help     = "layouts to measure (default: all)")
+    benchmark_parser.add_argument(
+      "-n_repeats",
+      type     = int,
+      default  = 3,
+      help     = "number of times to repeat each read (default: "
+                 "%(default)s)")
+    benchmark_parser.set_defaults(
+      function = benchmark_layouts)
+
+    # Layout
+    for name, p in kind_subparser.choices.items():
+        if name == "benchmark":
+            continue
         p.add_argument(
-          "-address",
+          "-layout",
           type     = str,
-          help     = "Address within HDF5 file at which to output dataset: "
-                     "(default: /%(default)s)")
+          choices  = sorted(hdf5_layouts.keys()),
+          help     = "storage layout of dataset (default: %(default)s)")
+
+    # Verbosity
+    for name, p in kind_subparser.choices.items():
+        if name not in ["batch", "benchmark"]:
+            p.add_argument(
+              "-address",
+              type     = str,
+              help     = "Address within HDF5 file at which to output "
+                         "dataset: (default: /%(default)s)")
         verbosity = p.add_mutually_exclusive_group()
         verbosity.add_argument(
           "-v", "--verbose",
@@ -306,4 +1770,8 @@ if __name__ == "__main__":
 
     # Parse arguments
     kwargs = vars(parser.parse_args())
+    if "kind" in kwargs:
+        kind = kwargs.pop("kind")
+        kwargs["dtype"] = cpptraj_kinds[kind]["dtype"]
+        kwargs["scaleoffset"] = cpptraj_kinds[kind]["scaleoffset"]
     kwargs.pop("function")(**kwargs)
@@ -0,0 +1,1102 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#   moldynplot.formats.py
+#
+#   Copyright (C) 2015-2016 Karl T Debiec
+#   All rights reserved.
+#
+#   This software may be modified and distributed under the terms of the
+#   BSD license. See the LICENSE file for details.
+"""
+Identifies and reads the input formats supported by moldynplot.
+
+Each format registers a sniffer, which determines from the path and
+first line of an infile whether the infile is in that format, and a
+reader. Sniffers that need only the path are tried first, such that no
+file is opened when the path decides; the remaining sniffers are then
+tried on the infile's first line, each group in order of registration.
+Results of the latter are cached per path along with its modification
+time, such that each infile's header is read at most once, in-process.
+"""
+################################### MODULES ###################################
+from __future__ import absolute_import,division,print_function,unicode_literals
+import re
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .cpptraj2hdf5 import (open_infile, read_cpptraj_fields,
+  iter_cpptraj_blocks, read_gnu, get_pyramid_address, read_hdf5_dataset,
+  read_saxs)
+################################## FUNCTIONS ##################################
+#: Registered formats, in the order in which they are sniffed; each
+#: value is a dict containing 'sniff', a function accepting the path to
+#: an infile and its first line and returning True if the infile is in
+#: the format, 'read', a function accepting the path to an infile and
+#: returning its contents, and 'path_only', whether 'sniff' needs only
+#: the path
+formats = OrderedDict()
+
+#: Cache of formats sniffed from headers, keyed by path; each value is
+#: a tuple of modification time and name of format
+sniff_cache = {}
+
+re_hdf5 = re.compile(
+  r"^(?P<path>(.+)\.(h5|hdf5))((:)?(/)?(?P<address>.+))?$",
+  flags=re.UNICODE)
+re_t1t2noe = re.compile(
+  r"^#Vec\s+[\w_]+\[T1\]\s+[\w_]+\[T2\]\s+[\w_]+\[NOE\]$",
+  flags=re.UNICODE)
+re_s2 = re.compile(
+  r"^#Vec\s+[\w_]+\[S2\]$",
+  flags=re.UNICODE)
+re_crysol = re.compile(
+  r"^#?\s*Dif/Atom/Excl/Shell\b",
+  flags=re.UNICODE)
+re_foxs = re.compile(
+  r"^#\s*SAXS profile: number of points\s*=",
+  flags=re.UNICODE)
+re_saxs_md = re.compile(
+  r"^#.*\bsaxs_md\b",
+  flags=re.UNICODE)
+
+def register_format(name, sniff, read=None, path_only=False):
+    """
+    Registers a format.
+
+    Arguments:
+      name (str): Name of format; registering an existing name replaces
+        the existing format, retaining its position in the order in
+        which formats are sniffed
+      sniff (function): Function accepting path to infile and its first
+        line, and returning True if the infile is in this format
+      read (function, optional): Function accepting path to infile and
+        additional keyword arguments, and returning its contents
+      path_only (bool): Sniffer determines format from path alone, and
+        is passed None in place of first line
+    """
+    formats[name] = dict(sniff=sniff, read=read, path_only=path_only)
+    sniff_cache.clear()
+
+def split_hdf5_address(infile):
+    """
+    Splits a path in the form ``/path/to/file.h5:address``.
+
+    Arguments:
+      infile (str): Path to hdf5 file, optionally followed by address
+        within the file
+
+    Returns:
+      tuple: Path to hdf5 file and address within the file, which is
+      None if not specified; or (None, None) if *infile* is not an hdf5
+      path
+    """
+    match = re_hdf5.match(infile)
+    if match is None:
+        return None, None
+    return match.group("path"), match.group("address")
+
+def get_hdf5_node(h5_file, address=None):
+    """
+    Locates a time series within an open hdf5 file.
+
+    Arguments:
+      h5_file (File): Open hdf5 file
+      address (str, optional): Address of group or dataset; if not
+        specified, the root group if it contains a 'values' dataset, or
+        otherwise the only group or dataset in the file, disregarding
+        multi-resolution pyramids (see
+        :func:`write_pyramid<moldynplot.cpptraj2hdf5.write_pyramid>`)
+
+    Returns:
+      Group, Dataset: Group or dataset containing time series
+    """
+    if address is None and "values" not in h5_file:
+        keys = [k for k in h5_file.keys()
+                if k != "pyramid" and not k.endswith("_pyramid")]
+        if len(keys) == 1:
+            address = keys[0]
+    return h5_file[address] if address is not None else h5_file
+
+def read_header(infile, n_bytes=4096):
+    """
+    Reads the first line of an infile.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text or gzip
+      n_bytes (int): Maximum number of bytes to read
+
+    Returns:
+      str: First line of *infile*, stripped of whitespace; empty if
+      *infile* cannot be read
+    """
+    try:
+        with open_infile(infile) as open_file:
+            header = open_file.readline(n_bytes)
+    except (IOError, OSError):
+        return ""
+    return header.decode("utf-8", "replace").strip()
+
+def sniff_infile(infile):
+    """
+    Identifies the format of an infile.
+
+    Arguments:
+      infile (str): Path to input file; may contain environment
+        variables
+
+    Returns:
+      str: Name of the first registered format whose sniffer accepts
+      *infile*, or 'other' if none do
+    """
+    from os.path import expandvars, getmtime
+
+    infile = expandvars(infile)
+
+    # Sniff from path alone
+    for name, fmt in formats.items():
+        if fmt["path_only"] and fmt["sniff"](infile, None):
+            return name
+
+    # Sniff from header, unless unmodified since last sniffed
+    try:
+        mtime = getmtime(infile)
+    except OSError:
+        mtime = None
+    if mtime is not None and sniff_cache.get(infile, (None,))[0] == mtime:
+        return sniff_cache[infile][1]
+    header = read_header(infile)
+    for name, fmt in formats.items():
+        if not fmt["path_only"] and fmt["sniff"](infile, header):
+            break
+    else:
+        name = "other"
+    if mtime is not None:
+        sniff_cache[infile] = (mtime, name)
+
+    return name
+
+def read_infile(infile, kind=None, **kwargs):
+    """
+    Reads an infile using the reader of its format.
+
+    Arguments:
+      infile (str): Path to input file; may contain environment
+        variables
+      kind (str, optional): Name of format; sniffed if not provided
+      kwargs (dict): Additional keyword arguments passed to reader
+
+    Returns:
+      object: Contents of *infile*; a DataFrame for all formats
+      registered by moldynplot
+    """
+    from os.path import expandvars
+
+    infile = expandvars(infile)
+    if kind is None:
+        kind = sniff_infile(infile)
+    if kind not in formats or formats[kind]["read"] is None:
+        raise TypeError("No reader available for '{0}' ".format(infile) +
+          "in format '{0}'".format(kind))
+
+    return formats[kind]["read"](infile, **kwargs)
+
+def read_hdf5(infile, **kwargs):
+    """
+    Reads DataFrame from hdf5.
+
+    Supports groups containing 'index' and 'values' datasets, with
+    column names stored in the attribute 'columns', and datasets with
+    field names stored in the attribute 'fields', including those
+    bit-packed by
+    :func:`process_cpptraj<moldynplot.cpptraj2hdf5.process_cpptraj>`.
+
+    Arguments:
+      infile (str): Path to input hdf5 file and (optionally) address
+        within the file in the form ``/path/to/file.h5:address``
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: DataFrame
+    """
+    import h5py
+
+    def decode(names):
+        return [n.decode("utf-8") if isinstance(n, bytes) else n
+                for n in names]
+
+    path, address = split_hdf5_address(infile)
+    with h5py.File(path, "r") as h5_file:
+        node = get_hdf5_node(h5_file, address)
+
+        if isinstance(node, h5py.Dataset):
+            df = pd.DataFrame(data=read_hdf5_dataset(node),
+              columns=decode(node.attrs["fields"]))
+            df.index.name = "frame"
+        else:
+            df = pd.DataFrame(data=node["values"][...],
+              index=node["index"][...], columns=decode(node.attrs["columns"]))
+            if "index_name" in node.attrs:
+                df.index.name = decode([node.attrs["index_name"]])[0]
+            if "dtypes" in node.attrs:
+                df = df.astype(dict(zip(df.columns,
+                  decode(node.attrs["dtypes"]))))
+
+    return df
+
+class HDF5TimeSeries(object):
+    """
+    Time series DataFrame backed by an open hdf5 dataset.
+
+    Provides the subset of the :class:`DataFrame<pandas.DataFrame>`
+    interface used to plot and analyze time series, deferring reads
+    until data is accessed. Selecting columns, selecting a window of
+    time using :attr:`loc`, or selecting rows using :attr:`iloc`
+    returns a new view without reading data; accessing :attr:`values`,
+    a single column, or :meth:`load` reads only the hyperslab of the
+    selected rows and columns. Scaling and shifting of the index (e.g.
+    conversion from frames to time) are stored as metadata and applied
+    when the index is accessed.
+
+    Supports the same layouts as :func:`read_hdf5`; datasets lacking
+    an index are indexed by frame number, starting from 0. If the
+    dataset has an up-to-date multi-resolution pyramid (see
+    :func:`write_pyramid<moldynplot.cpptraj2hdf5.write_pyramid>`), its
+    levels are available through :meth:`get_level`.
+
+    Attributes:
+      columns (Index): Names of selected columns
+      index_name (str): Name of index
+      pyramid_factors (list): Factors by which each level of pyramid is
+        reduced; empty if dataset has no pyramid
+    """
+
+    def __init__(self, infile):
+        """
+        Arguments:
+          infile (str): Path to input hdf5 file and (optionally) address
+            within the file in the form ``/path/to/file.h5:address``;
+            may contain environment variables
+        """
+        import h5py
+        from os.path import expandvars
+
+        def decode(names):
+            return [n.decode("utf-8") if isinstance(n, bytes) else n
+                    for n in names]
+
+        path, address = split_hdf5_address(expandvars(infile))
+        self._file = h5py.File(path, "r")
+        node = get_hdf5_node(self._file, address)
+
+        if isinstance(node, h5py.Dataset):
+            self._values = node
+            self._index = None
+            self.columns = pd.Index(decode(node.attrs["fields"]))
+            self.index_name = "frame"
+        else:
+            self._values = node["values"]
+            self._index = node["index"]
+            self.columns = pd.Index(decode(node.attrs["columns"]))
+            self.index_name = decode([node.attrs.get("index_name",
+              "index")])[0]
+        self._column_indexes = np.arange(self.columns.size)
+        self._rows = slice(0, self._values.shape[0], 1)
+        self._scale = 1.0
+        self._offset = 0.0
+
+        # Pyramids left out of date by appending are disregarded
+        self._pyramid = self._file.get(get_pyramid_address(node))
+        self.pyramid_factors = []
+        if (self._pyramid is not None and self._pyramid.attrs.get(
+        "source_rows") == self._values.shape[0]):
+            self.pyramid_factors = sorted(int(f)
+              for f in self._pyramid.attrs["factors"])
+
+    def _view(self, **attributes):
+        """
+        Prepares a view of this time series.
+
+        Arguments:
+          attributes (dict): Attributes of view to change
+
+        Returns:
+          HDF5TimeSeries: View
+        """
+        from copy import copy
+
+        view = copy(self)
+        for key, value in attributes.items():
+            setattr(view, key, value)
+        return view
+
+    def _raw_index(self, rows):
+        """
+        Reads the index of rows, without scaling or shifting.
+
+        Arguments:
+          rows (slice): Absolute rows
+
+        Returns:
+          ndarray: Index
+        """
+        if self._index is None:
+            return np.arange(rows.start, rows.stop, rows.step)
+        return self._index[rows]
+
+    def _label(self, position):
+        """
+        Determines the index label of one row of this view.
+
+        Arguments:
+          position (int): Position of row within view
+
+        Returns:
+          float: Label
+        """
+        row = self._rows.start + position * self._rows.step
+        raw = row if self._index is None else self._index[row]
+        return raw * self._scale + self._offset
+
+    def _search(self, label, side="left"):
+        """
+        Finds the position of an index label by bisection, reading one
+        element of the index per step.
+
+        Arguments:
+          label (float): Index label
+          side (str): 'left' to find the first row whose label is
+            greater than or equal to *label*; 'right' to find the first
+            row whose label is greater than *label*
+
+        Returns:
+          int: Position within view
+        """
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            value = self._label(middle)
+            if value < label or (side == "right" and value == label):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _select_rows(self, start, stop, step=None):
+        """
+        Selects positions of rows within this view.
+
+        Arguments:
+          start (int): First position, or None
+          stop (int): Position following last, or None
+          step (int, optional): Interval between rows
+
+        Returns:
+          HDF5TimeSeries: View
+        """
+        start, stop, step = slice(start, stop, step).indices(len(self))
+        if step < 1:
+            raise ValueError("Rows of HDF5TimeSeries may only be selected "
+                             "in increasing order")
+        stop = max(start, stop)
+        rows = slice(self._rows.start + start * self._rows.step,
+          self._rows.start + stop * self._rows.step, self._rows.step * step)
+        return self._view(_rows=rows)
+
+    def _select_columns(self, columns):
+        """
+        Selects columns of this view.
+
+        Arguments:
+          columns (list): Names of columns
+
+        Returns:
+          HDF5TimeSeries: View
+        """
+        positions = self.columns.get_indexer(columns)
+        if (positions < 0).any():
+            raise KeyError("Columns {0} not found".format(
+              [c for c, p in zip(columns, positions) if p < 0]))
+        return self._view(columns=self.columns[positions],
+          _column_indexes=self._column_indexes[positions])
+
+    def __len__(self):
+        return len(range(self._rows.start, self._rows.stop, self._rows.step))
+
+    def __getitem__(self, key):
+        if isinstance(key, (list, tuple, np.ndarray, pd.Index)):
+            return self._select_columns(list(key))
+        elif isinstance(key, slice):
+            return self.loc[key]
+        position = self.columns.get_loc(key)
+        return pd.Series(self._read(self._column_indexes[[position]])[:,0],
+          index=self.index, name=key)
+
+    def __repr__(self):
+        return "<{0} of {1} rows x {2} columns from '{3}[{4}]'>".format(
+          type(self).__name__, self.shape[0], self.shape[1],
+          self._file.filename, self._values.name)
+
+    def _read(self, column_indexes):
+        """
+        Reads selected rows of columns.
+
+        Arguments:
+          column_indexes (ndarray): Indexes of columns in dataset
+
+        Returns:
+          ndarray: Data
+        """
+        from .cpptraj2hdf5 import read_hdf5_dataset
+
+        if len(self) == 0:
+            return np.zeros((0, len(column_indexes)), self._values.dtype)
+        return read_hdf5_dataset(self._values, self._rows, column_indexes)
+
+    @property
+    def shape(self):
+        return (len(self), self.columns.size)
+
+    @property
+    def index(self):
+        raw = self._raw_index(self._rows)
+        return pd.Index(raw * self._scale + self._offset
+          if self._scale != 1.0 or self._offset != 0.0 else raw,
+          name=self.index_name)
+
+    @property
+    def values(self):
+        return self._read(self._column_indexes)
+
+    @property
+    def loc(self):
+        """
+        Selects a window of time by label, and optionally columns, as in
+        ``series.loc[start:stop]`` or ``series.loc[start:stop, columns]``;
+        as for DataFrame, *stop* is inclusive.
+        """
+        series = self
+
+        class LocIndexer(object):
+            def __getitem__(self, key):
+                columns = None
+                if isinstance(key, tuple):
+                    key, columns = key
+                if not isinstance(key, slice):
+                    raise TypeError("HDF5TimeSeries.loc supports only "
+                                    "slices of rows")
+                start = stop = None
+                if key.start is not None:
+                    start = series._search(key.start, "left")
+                if key.stop is not None:
+                    stop = series._search(key.stop, "right")
+                view = series._select_rows(start, stop, key.step)
+                if columns is not None:
+                    if isinstance(columns, slice):
+                        columns = list(view.columns[
+                          view.columns.slice_indexer(columns.start,
+                          columns.stop, columns.step)])
+                    view = view[columns]
+                return view
+
+        return LocIndexer()
+
+    @property
+    def iloc(self):
+        """
+        Selects rows by position, and optionally columns, as in
+        ``series.iloc[start:stop]`` or
+        ``series.iloc[start:stop, columns]``.
+        """
+        series = self
+
+        class ILocIndexer(object):
+            def __getitem__(self, key):
+                columns = None
+                if isinstance(key, tuple):
+                    key, columns = key
+                if not isinstance(key, slice):
+                    raise TypeError("HDF5TimeSeries.iloc supports only "
+                                    "slices of rows")
+                view = series._select_rows(key.start, key.stop, key.step)
+                if columns is not None:
+                    view = view[list(np.atleast_1d(view.columns[columns]))]
+                return view
+
+        return ILocIndexer()
+
+    def scale_index(self, factor, name=None):
+        """
+        Scales index, as when converting frame numbers to time.
+
+        Arguments:
+          factor (float): Factor by which to multiply index
+          name (str, optional): New name of index
+
+        Returns:
+          HDF5TimeSeries: View
+        """
+        if factor <= 0:
+            raise ValueError("Index may only be scaled by a positive factor")
+        return self._view(_scale=self._scale * factor,
+          _offset=self._offset * factor,
+          index_name=self.index_name if name is None else name)
+
+    def shift_index(self, offset):
+        """
+        Shifts index.
+
+        Arguments:
+          offset (float): Offset to add to index
+
+        Returns:
+          HDF5TimeSeries: View
+        """
+        return self._view(_offset=self._offset + offset)
+
+    def get_level(self, downsample, statistic="mean"):
+        """
+        Selects the coarsest level of pyramid from which time series
+        may be downsampled by a given interval.
+
+        A level may be used if its factor divides *downsample*. Its rows
+        each summarize an interval of *factor* rows beginning at a
+        multiple of *factor*; those within the rows of this view are
+        selected. Levels are only used by views whose rows are
+        consecutive and begin at a multiple of the level's factor, such
+        that intervals are aligned to the start of the view, as when
+        downsampling at full resolution.
+
+        Arguments:
+          downsample (int): Interval by which time series is to be
+            downsampled
+          statistic (str): Statistic of level; may be 'mean', 'min', or
+            'max'
+
+        Returns:
+          tuple: View of level, or this view if no level may be used,
+          and interval by which it remains to be downsampled
+        """
+        if statistic not in ["mean", "min", "max"]:
+            raise ValueError("statistic '{0}' not understood, ".format(
+              statistic) + "must be one of 'mean', 'min', 'max'")
+        factors = [f for f in self.pyramid_factors if downsample % f == 0
+                   and self._rows.start % f == 0]
+        if len(factors) == 0 or self._rows.step != 1:
+            return self, downsample
+
+        factor = max(factors)
+        level = self._pyramid[str(factor)]
+        start = self._rows.start // factor
+        stop = max(start, self._rows.stop // factor)
+        view = self._view(_values=level[statistic], _index=level["index"],
+          _rows=slice(start, stop, 1), _pyramid=None, pyramid_factors=[])
+        return view, downsample // factor
+
+    def iter_blocks(self, multiple=1, block_size=None):
+        """
+        Iterates over consecutive blocks of rows.
+
+        Blocks are aligned to the chunks of the hdf5 dataset where
+        possible, such that each chunk is read once.
+
+        Arguments:
+          multiple (int): Number of rows of which the length of each
+            block, other than the last, is a multiple
+          block_size (int, optional): Approximate number of values per
+            block; by default 2^22
+
+        Yields:
+          HDF5TimeSeries: View of block
+        """
+        try:
+            from math import gcd
+        except ImportError:
+            from fractions import gcd
+
+        if block_size is None:
+            block_size = 2 ** 22
+        target = max(1, block_size // max(1, self.shape[1]))
+        chunk = 1
+        if self._values.chunks is not None:
+            chunk = max(1, self._values.chunks[0] // self._rows.step)
+        unit = multiple * chunk // gcd(multiple, chunk)
+        if unit > target:
+            unit = multiple
+        n_rows = max(1, target // unit) * unit
+        for start in range(0, len(self), n_rows):
+            yield self.iloc[start:start + n_rows]
+
+    def items(self):
+        """
+        Iterates over columns, reading one at a time.
+
+        Yields:
+          tuple: Column name and Series
+        """
+        for column in self.columns:
+            yield column, self[column]
+
+    iteritems = items
+
+    def load(self):
+        """
+        Reads the selected rows and columns into a DataFrame.
+
+        Returns:
+          DataFrame: DataFrame
+        """
+        return pd.DataFrame(self.values, index=self.index,
+          columns=self.columns)
+
+    def close(self):
+        """
+        Closes hdf5 file.
+        """
+        self._file.close()
+
+def get_sidecar_path(infile):
+    """
+    Determines the path of the hdf5 sidecar of a text infile.
+
+    Sidecars are hidden files alongside their infiles, named such that
+    they are not matched by wildcards matching the infiles.
+
+    Arguments:
+      infile (str): Path to input file
+
+    Returns:
+      str: Path to sidecar
+    """
+    from os.path import basename, dirname, join
+
+    return join(dirname(infile), ".{0}.h5".format(basename(infile)))
+
+def read_sidecar(infile):
+    """
+    Reads DataFrame from the hdf5 sidecar of a text infile, if the
+    sidecar is up to date.
+
+    A sidecar is up to date if the size and modification time of its
+    infile match those stored when it was written.
+
+    Arguments:
+      infile (str): Path to input file
+
+    Returns:
+      DataFrame: DataFrame, or None if sidecar is absent or out of date
+    """
+    import h5py
+    from os.path import getmtime, getsize, isfile
+
+    sidecar = get_sidecar_path(infile)
+    if not isfile(sidecar):
+        return None
+    try:
+        with h5py.File(sidecar, "r") as h5_file:
+            if (h5_file.attrs.get("source_size") != getsize(infile)
+            or  h5_file.attrs.get("source_mtime") != getmtime(infile)):
+                return None
+    except (IOError, OSError):
+        return None
+    return read_hdf5(sidecar)
+
+def write_sidecar(infile, df):
+    """
+    Writes DataFrame to the hdf5 sidecar of a text infile.
+
+    The sidecar is compressed losslessly using lzf, and stores the size
+    and modification time of *infile*. Failure to write the sidecar, for
+    example due to permissions, is not an error.
+
+    Arguments:
+      infile (str): Path to input file
+      df (DataFrame): DataFrame read from *infile*
+
+    Returns:
+      bool: True if sidecar was written
+    """
+    import h5py
+    from os import remove, rename
+    from os.path import getmtime, getsize, isfile
+    from .cpptraj2hdf5 import get_hdf5_kw
+
+    sidecar = get_sidecar_path(infile)
+    partial = sidecar + ".partial"
+    values = df.values
+    try:
+        with h5py.File(partial, "w") as h5_file:
+            h5_file.create_dataset("index", data=df.index.values,
+              **get_hdf5_kw("fast", df.index.shape, df.index.dtype))
+            h5_file.create_dataset("values", data=values,
+              **get_hdf5_kw("fast", values.shape, values.dtype))
+            h5_file.attrs["columns"] = np.array(
+              [str(c) for c in df.columns], np.bytes_)
+            h5_file.attrs["dtypes"] = np.array(
+              [str(d) for d in df.dtypes], np.bytes_)
+            if df.index.name is not None:
+                h5_file.attrs["index_name"] = str(df.index.name)
+            h5_file.attrs["source_size"] = getsize(infile)
+            h5_file.attrs["source_mtime"] = getmtime(infile)
+        if isfile(sidecar):
+            remove(sidecar)
+        rename(partial, sidecar)
+    except (IOError, OSError):
+        if isfile(partial):
+            remove(partial)
+        return False
+    return True
+
+def select_window(df, first=None, last=None, stride=None):
+    """
+    Selects rows of a time series within a window of its index.
+
+    Time series backed by hdf5 are selected without reading data, such
+    that only the selected hyperslab is read when data is accessed.
+
+    Arguments:
+      df (DataFrame, HDF5TimeSeries): Time series, in increasing order
+        of index
+      first (float, optional): First label of window
+      last (float, optional): Last label of window
+      stride (float, optional): Interval between selected rows, in units
+        of index; converted to a number of rows using the spacing of the
+        first two rows of window
+
+    Returns:
+      DataFrame, HDF5TimeSeries: Selected rows
+    """
+    if first is not None or last is not None:
+        df = df.loc[first:last]
+    if stride is not None and len(df) > 1:
+        index = df.iloc[:2].index.values
+        step = int(round(float(stride) / (index[1] - index[0])))
+        if step > 1:
+            df = df.iloc[::step]
+    return df
+
+def select_residues(names, residues):
+    """
+    Selects names of residues matching a selection.
+
+    Arguments:
+      names (Index, list): Names, generally of residues in the form
+        ``XAA:#``
+      residues (int, str, list): Selection; may be a residue number, a
+        range of residue numbers in the form 'first-last' (inclusive),
+        a name in the form 'XAA:#', or a regular expression matched
+        against the whole of each name; or a list of any of these
+
+    Returns:
+      list: Selected names, in their original order
+    """
+    import six
+
+    if isinstance(residues, (six.string_types, six.integer_types)):
+        residues = [residues]
+    re_res = re.compile(r"^[a-zA-Z]+:?([0-9]+)$")
+    numbers = []
+    for name in names:
+        match = re_res.match(str(name))
+        numbers.append(int(match.group(1)) if match is not None else None)
+
+    selected = np.zeros(len(names), np.bool_)
+    for residue in residues:
+        residue = str(residue).strip()
+        match = re.match(r"^([0-9]+)(?:-([0-9]+))?$", residue)
+        if match is not None:
+            first = int(match.group(1))
+            last = int(match.group(2) or first)
+            selected |= [n is not None and first <= n <= last
+                         for n in numbers]
+        elif residue in names:
+            selected |= [str(n) == residue for n in names]
+        else:
+            pattern = re.compile("(?:{0})$".format(residue))
+            selected |= [pattern.match(str(n)) is not None for n in names]
+
+    return [n for n, s in zip(names, selected) if s]
+
+def get_dtype(dtype):
+    """
+    Resolves the data type in which to hold values of a dataset.
+
+    Arguments:
+      dtype (str, dtype, optional): Data type (e.g. 'float32'), or kind
+        of cpptraj output, in which case the data type of that kind (see
+        :data:`cpptraj_kinds<moldynplot.cpptraj2hdf5.cpptraj_kinds>`):
+        float32 for continuous kinds and uint8 for categorical kinds
+        such as 'secstruct' and 'hbond'
+
+    Returns:
+      dtype: Data type, or None if *dtype* is None
+
+    Raises:
+      ValueError: *dtype* is neither a data type nor a kind of cpptraj
+      output
+    """
+    from .cpptraj2hdf5 import cpptraj_kinds
+
+    if dtype is None:
+        return None
+    if str(dtype) in cpptraj_kinds:
+        return np.dtype(cpptraj_kinds[str(dtype)]["dtype"])
+    try:
+        return np.dtype(dtype)
+    except TypeError:
+        raise ValueError("dtype '{0}' not understood, ".format(dtype) +
+          "must be a data type or one of {0}".format(
+          sorted(cpptraj_kinds.keys())))
+
+def cast_dtype(df, dtype):
+    """
+    Casts values of a DataFrame to a data type, without copying values
+    already of that type.
+
+    Only columns whose values are numeric are cast, and to an integer
+    *dtype* only if their values are integral and within its range,
+    such that values are not truncated.
+
+    Arguments:
+      df (DataFrame): DataFrame
+      dtype (str, dtype, optional): Data type, or kind of cpptraj
+        output; see :func:`get_dtype`
+
+    Returns:
+      DataFrame: DataFrame of *dtype*, or *df* if *dtype* is None or
+      values are already of *dtype*
+    """
+    dtype = get_dtype(dtype)
+    if dtype is None:
+        return df
+    columns = []
+    for column, column_dtype in df.dtypes.items():
+        if column_dtype == dtype or column_dtype.kind not in "biuf":
+            continue
+        if dtype.kind in "iu":
+            values = df[column].values
+            info = np.iinfo(dtype)
+            if (values.size > 0 and (values.min() < info.min
+            or values.max() > info.max
+            or (column_dtype.kind == "f" and (values % 1 != 0).any()))):
+                continue
+        columns.append(column)
+    if len(columns) == 0:
+        return df
+    if len(columns) == df.shape[1]:
+        return df.astype(dtype)
+    return df.astype(dict((column, dtype) for column in columns))
+
+def read_cpptraj(infile, dtype=None, n_threads=1, sidecar=False, frames=None,
+    columns=None, **kwargs):
+    """
+    Reads DataFrame from cpptraj output in '#Frame' format.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text, gzip, or xz
+      dtype (dtype, optional): Data type; by default the type of each
+        column is inferred as by :func:`read_csv<pandas.read_csv>`
+      n_threads (int): Number of threads with which to parse
+      sidecar (bool): Read from hdf5 sidecar if up to date; otherwise
+        parse text and write sidecar
+      frames (tuple, optional): First and last frames to read, either
+        of which may be None, and interval between frames; rows outside
+        of window are not parsed, and no sidecar is written
+      columns (list, optional): Names of columns to read; other fields
+        are not parsed, and no sidecar is written
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: DataFrame indexed by frame
+    """
+    if sidecar:
+        df = read_sidecar(infile)
+        if df is not None:
+            if frames is not None:
+                df = select_window(df, *frames)
+            if columns is not None:
+                df = df[list(columns)]
+            return df
+    if frames is not None:
+        sidecar = False
+        if frames[2] is not None:
+            frames = (frames[0], frames[1], max(1, int(round(frames[2]))))
+
+    fields = read_cpptraj_fields(infile)
+    n_fields = len(fields)
+    positions = None
+    if columns is not None:
+        sidecar = False
+        positions = pd.Index(fields).get_indexer(list(columns))
+        if (positions < 0).any():
+            raise KeyError("Columns {0} not found in '{1}'".format(
+              [c for c, p in zip(columns, positions) if p < 0], infile))
+        order = np.argsort(positions)
+        fields = [fields[p] for p in positions[order]]
+        positions = positions[order].tolist()
+    index = [np.zeros(0, np.int64)]
+    blocks = []
+    for frames_i, block, _ in iter_cpptraj_blocks(infile, n_fields, dtype,
+      n_threads=n_threads, window=frames, columns=positions):
+        index.append(frames_i)
+        blocks.append(block)
+    if dtype is None:
+        if len(blocks) == 0:
+            df = pd.DataFrame(columns=fields, dtype=np.float64)
+        else:
+            df = pd.concat(blocks, ignore_index=True)
+            df.columns = fields
+        df.index = np.concatenate(index)
+    else:
+        if len(blocks) == 1:
+            data = blocks[0]
+        else:
+            data = np.concatenate([np.zeros((0, len(fields)), dtype)]
+              + blocks)
+        df = pd.DataFrame(columns=fields, index=np.concatenate(index),
+          data=data)
+    df.index.name = "frame"
+    if columns is not None:
+        df = df[list(columns)]
+
+    if sidecar:
+        write_sidecar(infile, df)
+
+    return df
+
+def read_cpptraj_gnu(infile, dtype=np.float64, **kwargs):
+    """
+    Reads DataFrame from cpptraj output in gnuplot format.
+
+    Arguments:
+      infile (str): Path to input file; may be plain text or gzip
+      dtype (dtype): Data type
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: DataFrame indexed by frame, with columns numbered from
+      1
+    """
+    data = read_gnu(infile, dtype)
+    df = pd.DataFrame(data=data, index=np.arange(1, data.shape[0] + 1),
+      columns=np.arange(1, data.shape[1] + 1))
+    df.index.name = "frame"
+
+    return df
+
+def read_ired_relax(infile, read_csv_kw=None, **kwargs):
+    """
+    Reads DataFrame of relaxation rates from iRED T1/T2/NOE output.
+
+    Arguments:
+      infile (str): Path to input file
+      read_csv_kw (dict, optional): Keyword arguments passed to
+        :func:`read_csv<pandas.read_csv>`
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: DataFrame containing columns 'r1', 'r2', and 'noe'
+    """
+    if read_csv_kw is None:
+        read_csv_kw = dict(sep=r"\s+", header=0, index_col=0,
+          names=["r1", "r2", "noe"])
+    df = pd.read_csv(infile, **read_csv_kw)
+    df["r1"] = 1 / df["r1"]
+    df["r2"] = 1 / df["r2"]
+
+    return df
+
+def read_ired_order(infile, read_csv_kw=None, **kwargs):
+    """
+    Reads DataFrame of order parameters from iRED S2 output.
+
+    Arguments:
+      infile (str): Path to input file
+      read_csv_kw (dict, optional): Keyword arguments passed to
+        :func:`read_csv<pandas.read_csv>`
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: DataFrame containing column 's2'
+    """
+    if read_csv_kw is None:
+        read_csv_kw = dict(sep=r"\s+", header=0, index_col=0, names=["s2"])
+
+    return pd.read_csv(infile, **read_csv_kw)
+
+def read_nmrpipe(infile, **kwargs):
+    """
+    Reads DataFrame from two-dimensional nmrPipe spectrum.
+
+    Arguments:
+      infile (str): Path to input file
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: DataFrame of intensity indexed by 1H and 15N chemical
+      shift
+    """
+    import nmrglue
+
+    parameters, intensity = nmrglue.pipe.read(infile)
+    hydrogen  = nmrglue.pipe.make_uc(parameters, intensity,
+                   dim=1).ppm_scale()
+    nitrogen  = nmrglue.pipe.make_uc(parameters, intensity,
+                    dim=0).ppm_scale()
+
+    index = pd.MultiIndex.from_product([nitrogen, hydrogen],
+      names=["15N", "1H"])
+    df = pd.DataFrame(data=intensity.flatten(), index=index,
+      columns=["intensity"])
+    df = df.swaplevel(0, 1)
+    df = df.sort_index()
+
+    return df
+
+def read_saxs_infile(infile, package, **kwargs):
+    """
+    Reads DataFrame from SAXS profile(s).
+
+    Arguments:
+      infile (str): Path to input file
+      package (str): Program used to calculate profile; may be
+        'saxs_md', 'crysol', or 'foxs'
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: DataFrame of intensity indexed by q, with one column
+      per frame
+    """
+    q, intensity = read_saxs(package, infile)
+    df = pd.DataFrame(data=intensity.T, index=q)
+    df.index.name = "q"
+    df.columns.name = "frame"
+
+    return df
+
+register_format("hdf5",
+  lambda infile, header: re_hdf5.match(infile) is not None,
+  read_hdf5, path_only=True)
+register_format("nmrpipe",
+  lambda infile, header: infile.endswith(".ft"),
+  read_nmrpipe, path_only=True)
+register_format("gnu",
+  lambda infile, header: infile.endswith(("gnu", "gnu.gz")),
+  read_cpptraj_gnu, path_only=True)
+register_format("cpptraj",
+  lambda infile, header: header.split()[:1] == ["#Frame"],
+  read_cpptraj)
+register_format("ired_relax",
+  lambda infile, header: re_t1t2noe.match(header) is not None,
+  read_ired_relax)
+register_format("ired_order",
+  lambda infile, header: re_s2.match(header) is not None,
+  read_ired_order)
+register_format("crysol",
+  lambda infile, header: re_crysol.match(header) is not None,
+  lambda infile, **kwargs: read_saxs_infile(infile, "crysol"))
+register_format("foxs",
+  lambda infile, header: re_foxs.match(header) is not None,
+  lambda infile, **kwargs: read_saxs_infile(infile, "foxs"))
+register_format("saxs_md",
+  lambda infile, header: re_saxs_md.match(header) is not None,
+  lambda infile, **kwargs: read_saxs_infile(infile, "saxs_md"))
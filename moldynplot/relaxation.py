@@ -12,6 +12,9 @@ Processes NMR relaxation and related data
 """
 ################################### MODULES ###################################
 from __future__ import absolute_import,division,print_function,unicode_literals
+if __name__ == "__main__":
+    __package__ = str("moldynplot")
+    import moldynplot
 ################################## FUNCTIONS ##################################
 def spawn(function):
     """
@@ -147,36 +150,23 @@ def multiprocess_map(function, arguments, n_processes=1):
 def process_ired(infiles, outfile, indexfile=None, **kwargs):
     """
     """
-    from os import devnull
-    import re
-    from subprocess import Popen, PIPE
     import pandas as pd
     import numpy as np
+    from .formats import read_infile, sniff_infile
 
     r1r2noe_datasets = []
     s2_datasets = []
 
     # Load data
     for i, infile in enumerate(infiles):
-        with open(devnull, "w") as fnull:
-            fields = Popen("head -n 1 {0}".format(infile),
-              stdout=PIPE, stderr=fnull, shell=True).stdout.read().strip()
-        re_t1t2noe = re.compile(
-          "^#Vec\s+[\w_]+\[T1\]\s+[\w_]+\[\T2\]\s+[\w_]+\[NOE\]$")
-        re_s2 = re.compile("^#Vec\s+[\w_]+\[S2\]$")
-        if re.match(re_t1t2noe, fields):
-            raw_data = np.loadtxt(infile, dtype=np.float32)
-            read_csv_kw = kwargs.get("read_csv_kw", dict(delim_whitespace=True,
-              header=0, index_col=0, names=["r1","r2","noe"]))
-            raw_data = pd.read_csv(infile, **read_csv_kw)
-            raw_data["r1"] = 1 / raw_data["r1"]
-            raw_data["r2"] = 1 / raw_data["r2"]
+        kind = sniff_infile(infile)
+        if kind == "ired_relax":
+            raw_data = read_infile(infile, kind,
+              read_csv_kw=kwargs.get("read_csv_kw"))
             r1r2noe_datasets.append(raw_data)
-        elif re.match(re_s2, fields):
-            raw_data = np.loadtxt(infile, dtype=np.float32)
-            read_csv_kw = kwargs.get("read_csv_kw", dict(delim_whitespace=True,
-              header=0, index_col=0, names=["s2"]))
-            raw_data = pd.read_csv(infile, **read_csv_kw)
+        elif kind == "ired_order":
+            raw_data = read_infile(infile, kind,
+              read_csv_kw=kwargs.get("read_csv_kw"))
             s2_datasets.append(raw_data)
         else:
             raise Exception()
@@ -0,0 +1,955 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#   moldynplot.stats.py
+#
+#   Copyright (C) 2015-2016 Karl T Debiec
+#   All rights reserved.
+#
+#   This software may be modified and distributed under the terms of the
+#   BSD license. See the LICENSE file for details.
+"""
+Vectorized statistical reductions of time series.
+"""
+################################### MODULES ###################################
+from __future__ import absolute_import,division,print_function,unicode_literals
+import numpy as np
+################################## FUNCTIONS ##################################
+#: Kernels supported by :func:`binned_kde`, as named by
+#: :class:`KernelDensity<sklearn.neighbors.KernelDensity>`; each value is
+#: an unnormalized function of distance in units of bandwidth, and the
+#: distance in units of bandwidth beyond which it is neglected
+kde_kernels = {
+  "gaussian":     (lambda u: np.exp(-0.5 * u ** 2),                   6.0),
+  "tophat":       (lambda u: (np.abs(u) < 1).astype(np.float64),      1.0),
+  "epanechnikov": (lambda u: np.clip(1 - u ** 2, 0, None),            1.0),
+  "exponential":  (lambda u: np.exp(-np.abs(u)),                     30.0),
+  "linear":       (lambda u: np.clip(1 - np.abs(u), 0, None),         1.0),
+  "cosine":       (lambda u: np.where(np.abs(u) < 1,
+                     np.cos(np.pi / 2 * u), 0.0),                     1.0)}
+
+#: Columns of values shared with worker processes by
+#: :func:`calc_pdists`; set in each worker by :func:`init_shared_values`
+shared_values = None
+
+def block_mode(blocks, max_alphabet=2**16, max_counts=2**24):
+    """
+    Calculates the mode of each column within each block.
+
+    Values are coded as integers indexing their sorted alphabet (for
+    integer data, simply offset by the minimum value), and the
+    occurrences of each code within each block and column are counted
+    with a single offset :func:`bincount<numpy.bincount>`.
+    Ties are resolved in favor of the smallest value, as by
+    :func:`scipy.stats.mstats.mode`. Suited to categorical data drawn
+    from a small alphabet, such as DSSP codes or native contacts; if
+    the alphabet is larger than *max_alphabet*, falls back to
+    :func:`scipy.stats.mstats.mode`.
+
+    Arguments:
+      blocks (ndarray): Values of shape (blocks, block size, columns)
+      max_alphabet (int): Maximum number of distinct values to count
+      max_counts (int): Maximum number of counts to hold in memory at
+        once; bounds the number of blocks processed together
+
+    Returns:
+      ndarray: Mode of shape (blocks, columns)
+    """
+    n_blocks, block_size, n_columns = blocks.shape
+
+    # Code values; integers are offset directly, avoiding a sort
+    alphabet = codes = None
+    if blocks.dtype.kind in "biu" and blocks.size > 0:
+        low, high = int(blocks.min()), int(blocks.max())
+        if high - low < max_alphabet:
+            alphabet = np.arange(low, high + 1).astype(blocks.dtype)
+            codes = blocks.astype(np.intp) - low
+    else:
+        alphabet, codes = np.unique(blocks, return_inverse=True)
+    if alphabet is None or alphabet.size > max_alphabet:
+        from scipy.stats.mstats import mode
+
+        return np.reshape(np.ma.filled(mode(blocks, axis=1)[0], np.nan),
+          (n_blocks, n_columns))
+    codes = np.reshape(codes, blocks.shape)
+    n_codes = max(1, alphabet.size)
+
+    result = np.zeros((n_blocks, n_columns), alphabet.dtype)
+    step = max(1, max_counts // (n_columns * n_codes))
+    for start in range(0, n_blocks, step):
+        chunk = codes[start:start + step]
+        n_chunk = chunk.shape[0]
+
+        # Offset each code by its block and column
+        offsets = (np.arange(n_chunk)[:, np.newaxis, np.newaxis] * n_columns
+          + np.arange(n_columns)[np.newaxis, np.newaxis, :]) * n_codes
+        counts = np.bincount((chunk + offsets).ravel(),
+          minlength=n_chunk * n_columns * n_codes)
+        counts = np.reshape(counts, (n_chunk, n_columns, n_codes))
+        result[start:start + n_chunk] = alphabet[counts.argmax(axis=2)]
+
+    return result
+
+def decimate(x, y, n_points, mode="minmax"):
+    """
+    Decimates a time series for plotting, preserving its appearance.
+
+    Unlike downsampling by averaging, extrema are retained, such that
+    the decimated series looks the same at figure resolution while the
+    number of points to be drawn is independent of its length.
+
+    Arguments:
+      x (ndarray): Time
+      y (ndarray): Values
+      n_points (int): Approximate number of points to retain; series
+        of this length or shorter are returned unchanged
+      mode (str): Method of decimation; may be 'minmax', retaining the
+        minimum and maximum of each of *n_points* / 2 buckets (as well
+        as the first and last points), or 'lttb', retaining the point
+        of each of *n_points* - 2 buckets forming the largest triangle
+        with its neighbors (Steinarsson, 2013)
+
+    Returns:
+      tuple: Decimated time and values
+    """
+    if mode not in ["minmax", "lttb"]:
+        raise ValueError("decimate mode '{0}' not understood, ".format(mode)
+          + "must be one of 'minmax', 'lttb'")
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n_points = int(n_points)
+    if y.size <= n_points or n_points < 3:
+        return x, y
+
+    if mode == "minmax":
+        indexes = _decimate_minmax(y, n_points)
+    elif mode == "lttb":
+        indexes = _decimate_lttb(x, y, n_points)
+    return x[indexes], y[indexes]
+
+def _decimate_minmax(y, n_points):
+    """
+    Selects the minimum and maximum of each bucket.
+
+    Arguments:
+      y (ndarray): Values
+      n_points (int): Approximate number of points to retain
+
+    Returns:
+      ndarray: Sorted indexes of retained points
+    """
+    n = y.size
+    size = int(np.ceil(n / max(1, n_points // 2)))
+    n_buckets = int(np.ceil(n / size))
+
+    # Pad final bucket with last value; padded indexes are clipped
+    padded = np.empty(n_buckets * size, y.dtype)
+    padded[:n] = y
+    padded[n:] = y[-1]
+    padded = np.reshape(padded, (n_buckets, size))
+    offsets = np.arange(n_buckets) * size
+    indexes = np.concatenate(([0, n - 1],
+      padded.argmin(axis=1) + offsets, padded.argmax(axis=1) + offsets))
+
+    return np.unique(np.clip(indexes, 0, n - 1))
+
+def _decimate_lttb(x, y, n_points):
+    """
+    Selects points using largest-triangle-three-buckets.
+
+    Arguments:
+      x (ndarray): Time
+      y (ndarray): Values
+      n_points (int): Number of points to retain
+
+    Returns:
+      ndarray: Sorted indexes of retained points
+    """
+    n = y.size
+    x = np.asarray(x, np.float64)
+    y = np.asarray(y, np.float64)
+
+    # First and last points are retained; remainder divided into buckets
+    edges = np.linspace(1, n - 1, n_points - 1).astype(np.intp)
+    indexes = np.zeros(n_points, np.intp)
+    indexes[-1] = n - 1
+
+    selected = 0
+    for i in range(n_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < edges.size:
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[selected] - next_x) * (y[start:end] - y[selected])
+          - (x[selected] - x[start:end]) * (next_y - y[selected]))
+        selected = start + area.argmax()
+        indexes[i + 1] = selected
+
+    return indexes
+
+def binned_kde(values, grid, bandwidth, kernel="gaussian", max_bins=2**16):
+    """
+    Calculates a kernel density estimate using linear binning and FFT
+    convolution.
+
+    Values are distributed between the two nearest points of a uniform
+    mesh spanning *grid* (extended by the reach of the kernel), the
+    binned counts are convolved with the kernel using
+    :func:`fftconvolve<scipy.signal.fftconvolve>`, and the density is
+    interpolated onto *grid*. Cost scales with the number of values plus
+    the size of the mesh, rather than with their product as when
+    evaluating each kernel at each grid point. The mesh spacing is at
+    most one tenth of *bandwidth*, unless limited by *max_bins*. Values
+    that are not finite are disregarded.
+
+    Arguments:
+      values (ndarray): Values
+      grid (ndarray): Points at which to evaluate density
+      bandwidth (float): Bandwidth of kernel
+      kernel (str): Kernel; see :data:`kde_kernels`
+      max_bins (int): Maximum number of points in mesh
+
+    Returns:
+      ndarray: Probability density at each point of *grid*
+    """
+    from scipy.signal import fftconvolve
+
+    if kernel not in kde_kernels:
+        raise ValueError("kernel '{0}' not understood, ".format(kernel) +
+          "must be one of {0}".format(sorted(kde_kernels.keys())))
+    if not bandwidth > 0:
+        raise ValueError("bandwidth must be positive")
+    values = np.asarray(values, np.float64).ravel()
+    values = values[np.isfinite(values)]
+    grid = np.asarray(grid, np.float64)
+    if values.size == 0:
+        return np.zeros_like(grid)
+    function, cutoff = kde_kernels[kernel]
+
+    # Prepare mesh
+    reach = cutoff * bandwidth
+    low, high = grid.min() - reach, grid.max() + reach
+    step = bandwidth / 10.0
+    n_bins = int(np.ceil((high - low) / step)) + 1
+    if n_bins > max_bins:
+        n_bins = max_bins
+        step = (high - low) / (n_bins - 1)
+    mesh = low + step * np.arange(n_bins)
+
+    # Distribute each value between its two nearest mesh points
+    position = (values - low) / step
+    position = position[(position >= 0) & (position <= n_bins - 1)]
+    left = np.minimum(np.floor(position).astype(np.intp), n_bins - 2)
+    weight = position - left
+    counts = (np.bincount(left, 1 - weight, n_bins)
+            + np.bincount(left + 1, weight, n_bins))
+
+    # Convolve with kernel, normalized on mesh
+    n_half = min(int(np.ceil(reach / step)), n_bins - 1)
+    weights = function(np.arange(-n_half, n_half + 1) * step / bandwidth)
+    weights /= weights.sum() * step
+    density = fftconvolve(counts, weights, mode="same") / values.size
+
+    return np.interp(grid, mesh, np.clip(density, 0, None))
+
+def histogram(values, grid):
+    """
+    Calculates a probability density using a histogram.
+
+    Each bin is centered on a point of *grid* and extends halfway to its
+    neighbors. Values that are not finite are disregarded.
+
+    Arguments:
+      values (ndarray): Values
+      grid (ndarray): Centers of bins, in increasing order
+
+    Returns:
+      ndarray: Probability density within each bin
+    """
+    values = np.asarray(values, np.float64).ravel()
+    values = values[np.isfinite(values)]
+    grid = np.asarray(grid, np.float64)
+    if grid.size < 2:
+        raise ValueError("grid must contain at least two points")
+    edges = np.concatenate(([1.5 * grid[0] - 0.5 * grid[1]],
+      (grid[1:] + grid[:-1]) / 2, [1.5 * grid[-1] - 0.5 * grid[-2]]))
+    counts, _ = np.histogram(values, edges)
+
+    return counts / max(1, values.size) / np.diff(edges)
+
+def norm_kde(values, grid, bandwidth, max_values=2**22):
+    """
+    Calculates a kernel density estimate by summing the probability
+    density functions of normal distributions centered on each value.
+
+    The densities of a block of values at every point of *grid* are
+    evaluated at once by broadcasting, with blocks sized such that no
+    more than *max_values* densities are held in memory. Values that
+    are not finite, or whose bandwidth is not finite and positive, are
+    masked out.
+
+    Arguments:
+      values (ndarray): Values
+      grid (ndarray): Points at which to evaluate density
+      bandwidth (float, ndarray): Standard deviation of distributions;
+        either one for all values, or one for each value (e.g. its
+        standard error)
+      max_values (int): Maximum number of densities to hold in memory
+        at once
+
+    Returns:
+      ndarray: Summed density at each point of *grid*
+    """
+    values = np.asarray(values, np.float64).ravel()
+    bandwidth = np.broadcast_to(np.asarray(bandwidth, np.float64),
+      values.shape)
+    mask = np.isfinite(values) & np.isfinite(bandwidth) & (bandwidth > 0)
+    values, bandwidth = values[mask], bandwidth[mask]
+    grid = np.asarray(grid, np.float64)
+
+    pdf = np.zeros_like(grid)
+    step = max(1, max_values // max(1, grid.size))
+    for start in range(0, values.size, step):
+        block = values[np.newaxis, start:start + step]
+        scale = bandwidth[np.newaxis, start:start + step]
+        z = (grid[:, np.newaxis] - block) / scale
+        pdf += (np.exp(-0.5 * z * z) / scale).sum(axis=1)
+
+    return pdf / np.sqrt(2 * np.pi)
+
+def calc_pdist(values, grid, bandwidth=None, mode="kde", kde_kw=None):
+    """
+    Calculates the probability distribution of one column.
+
+    Arguments:
+      values (ndarray): Values
+      grid (ndarray): Points at which to calculate probability
+      bandwidth (float, ndarray, optional): Bandwidth of kernel
+        density estimate; not used by mode 'hist'; mode 'norm' also
+        accepts one bandwidth for each value
+      mode (str): Method of calculating probability distribution; may
+        be 'kde' (see :func:`binned_kde`), 'sklearn' (see
+        :class:`KernelDensity<sklearn.neighbors.KernelDensity>`),
+        'norm' (see :func:`norm_kde`), or 'hist' (see
+        :func:`histogram`)
+      kde_kw (dict, optional): Keyword arguments passed to
+        :class:`KernelDensity<sklearn.neighbors.KernelDensity>`; of
+        these only 'kernel' is used by mode 'kde'
+
+    Returns:
+      ndarray: Probability at each point of *grid*, normalized to sum
+      to one
+    """
+    if kde_kw is None:
+        kde_kw = {}
+    if mode == "kde":
+        pdf = binned_kde(values, grid, bandwidth,
+          kde_kw.get("kernel", "gaussian"))
+    elif mode == "sklearn":
+        from sklearn.neighbors import KernelDensity
+
+        kde = KernelDensity(bandwidth=bandwidth, **kde_kw)
+        kde.fit(np.asarray(values)[:, np.newaxis])
+        pdf = np.exp(kde.score_samples(np.asarray(grid)[:, np.newaxis]))
+    elif mode == "norm":
+        pdf = norm_kde(values, grid, bandwidth)
+    elif mode == "hist":
+        pdf = histogram(values, grid)
+    else:
+        raise ValueError("pdist mode '{0}' not understood, ".format(mode) +
+          "must be one of 'kde', 'sklearn', 'norm', 'hist'")
+
+    return pdf / pdf.sum()
+
+def init_shared_values(buffer, shape, dtype=np.float64):
+    """
+    Attaches columns of values in shared memory; used as initializer of
+    worker processes.
+
+    Arguments:
+      buffer (RawArray): Shared memory containing values, stored one
+        column after another
+      shape (tuple): Number of columns and rows
+      dtype (dtype): Data type of values
+    """
+    global shared_values
+
+    shared_values = np.frombuffer(buffer, dtype)[
+      :shape[0] * shape[1]].reshape(shape)
+
+def calc_shared_pdist(arguments):
+    """
+    Calculates the probability distribution of one column of values in
+    shared memory; used by worker processes.
+
+    Arguments:
+      arguments (tuple): Index of column, followed by arguments passed
+        to :func:`calc_pdist`
+
+    Returns:
+      ndarray: Probability at each point of grid
+    """
+    i = arguments[0]
+
+    return calc_pdist(shared_values[i], *arguments[1:])
+
+def calc_pdists(values, grids, bandwidths=None, mode="kde", kde_kw=None,
+    n_processes=1):
+    """
+    Calculates the probability distribution of each column, in parallel.
+
+    Values are copied once into shared memory, from which each worker
+    process reads the columns it is assigned, rather than receiving
+    them pickled. Single-precision values are shared as such, and
+    converted to double precision one column at a time within
+    :func:`calc_pdist`; other values are shared in double precision.
+
+    Arguments:
+      values (ndarray): Values of shape (rows, columns)
+      grids (list): Points at which to calculate probability, for each
+        column
+      bandwidths (list, optional): Bandwidth for each column
+      mode (str): Method of calculating probability distribution; see
+        :func:`calc_pdist`
+      kde_kw (dict, optional): Keyword arguments passed to
+        :class:`KernelDensity<sklearn.neighbors.KernelDensity>`
+      n_processes (int): Number of worker processes
+
+    Returns:
+      list: Probability at each point of grid, for each column, in order
+    """
+    from multiprocessing import Pool, RawArray
+
+    values = np.asarray(values)
+    n_rows, n_columns = values.shape
+    if bandwidths is None:
+        bandwidths = [None] * n_columns
+    arguments = [(i, grids[i], bandwidths[i], mode, kde_kw)
+                 for i in range(n_columns)]
+
+    # Copy values into shared memory, one column after another
+    if values.dtype == np.float32:
+        typecode, dtype = str("f"), np.float32
+    else:
+        typecode, dtype = str("d"), np.float64
+    buffer = RawArray(typecode, max(1, n_rows * n_columns))
+    columns = np.frombuffer(buffer, dtype)[:n_rows * n_columns]
+    columns = columns.reshape((n_columns, n_rows))
+    columns[:] = values.T
+
+    pool = Pool(n_processes, initializer=init_shared_values,
+      initargs=(buffer, (n_columns, n_rows), dtype))
+    try:
+        pdists = list(pool.imap(calc_shared_pdist, arguments))
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return pdists
+
+def blocking_se(blocks, alpha=0.01):
+    """
+    Calculates the standard error of the mean of each column using
+    Flyvbjerg-Petersen blocking.
+
+    The time series is repeatedly coarsened by averaging consecutive
+    pairs of rows, using reshape-and-reduce across all columns at once.
+    The variance and lag-one autocovariance of each level are
+    accumulated from blocks of rows as they are provided, carrying
+    unpaired rows between blocks, such that the time series need not be
+    held in memory. The level at which the blocked means become
+    uncorrelated is selected for each column using the automated
+    criterion of Jonsson (Phys. Rev. E 98, 043304, 2018); if no level
+    satisfies the criterion, the coarsest is used and a warning issued.
+
+    Arguments:
+      blocks (iterable): Consecutive blocks of rows, each an ndarray of
+        shape (rows, columns); an in-memory time series may be provided
+        as a single block
+      alpha (float): Significance level of criterion
+
+    Returns:
+      ndarray: Standard error of the mean of each column
+    """
+    from warnings import warn
+    from scipy.stats import chi2
+
+    # Accumulate moments of each level, relative to its first row
+    levels = []
+    for block in blocks:
+        x = np.asarray(block, np.float64)
+        level = 0
+        while x.shape[0] > 0:
+            if level == len(levels):
+                levels.append(dict(n=0, shift=x[0].copy(), sum=0.0,
+                  sumsq=0.0, lag=0.0, first=None, last=None, carry=None))
+            moments = levels[level]
+            y = x - moments["shift"]
+            moments["n"] += y.shape[0]
+            moments["sum"] = moments["sum"] + y.sum(axis=0)
+            moments["sumsq"] = moments["sumsq"] + (y * y).sum(axis=0)
+            moments["lag"] = moments["lag"] + (y[1:] * y[:-1]).sum(axis=0)
+            if moments["last"] is None:
+                moments["first"] = y[0]
+            else:
+                moments["lag"] = moments["lag"] + moments["last"] * y[0]
+            moments["last"] = y[-1]
+
+            # Average consecutive pairs into next level
+            if moments["carry"] is not None:
+                x = np.concatenate((moments["carry"][np.newaxis], x))
+            n_pairs = x.shape[0] // 2
+            moments["carry"] = x[-1].copy() if x.shape[0] % 2 else None
+            x = np.reshape(x[:2 * n_pairs],
+              (n_pairs, 2, x.shape[1])).mean(axis=1)
+            level += 1
+    levels = [moments for moments in levels if moments["n"] >= 2]
+    if len(levels) == 0:
+        raise ValueError("At least two rows are required to calculate "
+                         "standard error")
+
+    # Calculate variance and lag-one autocorrelation of each level
+    n = np.array([moments["n"] for moments in levels], np.float64)[:, None]
+    mean = np.array([moments["sum"] for moments in levels]) / n
+    var = np.array([moments["sumsq"] for moments in levels]) / n - mean ** 2
+    var = np.clip(var, 0, None)
+    ends = np.array([2 * moments["sum"] - moments["first"] - moments["last"]
+                     for moments in levels])
+    gamma = (np.array([moments["lag"] for moments in levels])
+      - mean * ends + (n - 1) * mean ** 2) / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = np.where(var > 0, gamma / var, 0.0)
+
+    # Select first level at which remaining levels are uncorrelated
+    statistic = np.cumsum((n * rho ** 2)[::-1], axis=0)[::-1]
+    n_terms = np.arange(len(levels), 0, -1)[:, None]
+    passed = statistic < chi2.ppf(1 - alpha, n_terms)
+    selected = np.where(passed.any(axis=0), passed.argmax(axis=0),
+      len(levels) - 1)
+    if not passed.any(axis=0).all():
+        warn("blocking did not converge for {0} of {1} columns; ".format(
+          (~passed.any(axis=0)).sum(), passed.shape[1]) + "standard error "
+          "may be underestimated; more data are needed")
+    columns = np.arange(var.shape[1])
+
+    return np.sqrt(var[selected, columns] / n[selected, 0])
+
+def autocorrelation_se(values):
+    """
+    Calculates the standard error of the mean of each column from its
+    statistical inefficiency.
+
+    The autocorrelation function of all columns is calculated at once
+    using the FFT. The statistical inefficiency g = 1 + 2 sum_t (1 - t /
+    n) C(t) is summed until the autocorrelation C(t) first falls to zero,
+    and the standard error is sqrt(g var / n).
+
+    Arguments:
+      values (ndarray): Values of shape (rows, columns)
+
+    Returns:
+      ndarray: Standard error of the mean of each column
+    """
+    values = np.asarray(values, np.float64)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    n = values.shape[0]
+    if n < 2:
+        raise ValueError("At least two rows are required to calculate "
+                         "standard error")
+
+    # Calculate autocovariance, padding to avoid circular correlation
+    deviation = values - values.mean(axis=0)
+    size = 2 ** int(np.ceil(np.log2(2 * n)))
+    transform = np.fft.rfft(deviation, size, axis=0)
+    autocov = np.fft.irfft(transform * np.conj(transform), size,
+      axis=0)[:n] / n
+    var = autocov[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        autocorr = np.where(var > 0, autocov[1:] / var, 0.0)
+
+    # Sum autocorrelation until it first falls to zero
+    positive = np.cumprod(autocorr > 0, axis=0).astype(bool)
+    lags = np.arange(1, n, dtype=np.float64)[:, np.newaxis]
+    inefficiency = 1 + 2 * ((1 - lags / n) * autocorr * positive).sum(axis=0)
+    inefficiency = np.clip(inefficiency, 1, None)
+
+    return np.sqrt(var * inefficiency / n)
+
+def calc_se(df, method="blocking", block_size=None):
+    """
+    Calculates the standard error of the mean of each column of a time
+    series.
+
+    Time series backed by hdf5 are streamed rather than read at once:
+    for blocking, blocks of rows aligned to the chunks of the dataset;
+    for autocorrelation, which requires each column in full, groups of
+    columns.
+
+    Arguments:
+      df (DataFrame, HDF5TimeSeries): Time series
+      method (str): Method of calculating standard error; may be
+        'blocking' (see :func:`blocking_se`) or 'autocorrelation' (see
+        :func:`autocorrelation_se`)
+      block_size (int, optional): Approximate number of values to read
+        at once from hdf5; by default 2^22
+
+    Returns:
+      Series: Standard error of the mean of each column
+    """
+    import pandas as pd
+    from .formats import HDF5TimeSeries
+
+    if method not in ["blocking", "autocorrelation"]:
+        raise ValueError("error method '{0}' not understood, ".format(method)
+          + "must be one of 'blocking', 'autocorrelation'")
+    if block_size is None:
+        block_size = 2 ** 22
+
+    if method == "blocking":
+        if isinstance(df, HDF5TimeSeries):
+            blocks = (block.values for block in df.iter_blocks(
+              block_size=block_size))
+        else:
+            blocks = [df.values]
+        se = blocking_se(blocks)
+    elif method == "autocorrelation":
+        if isinstance(df, HDF5TimeSeries):
+            step = max(1, block_size // max(1, len(df)))
+            se = np.concatenate([autocorrelation_se(
+              df[list(df.columns[i:i + step])].values)
+              for i in range(0, df.shape[1], step)])
+        else:
+            se = autocorrelation_se(df.values)
+
+    return pd.Series(se, index=df.columns, name="se")
+
+def summarize(values, columns=None):
+    """
+    Calculates the count, mean, sum of squared deviations, minimum, and
+    maximum of each column of a block of rows.
+
+    Summaries are mergeable using :func:`merge_summaries`, such that a
+    time series may be summarized in a single pass over blocks read in
+    turn, over files, or by worker processes. Non-finite values are
+    disregarded.
+
+    Arguments:
+      values (ndarray, DataFrame): Values of shape (rows, columns)
+      columns (Index, optional): Names of columns; by default taken from
+        *values* if a DataFrame
+
+    Returns:
+      dict: Summary, including 'columns' and 'count', 'mean', 'm2',
+      'min', and 'max' of each column
+    """
+    import pandas as pd
+
+    if columns is None and isinstance(values, pd.DataFrame):
+        columns = values.columns
+    x = np.asarray(values, np.float64)
+    if x.ndim == 1:
+        x = x[:, np.newaxis]
+    if columns is None:
+        columns = pd.RangeIndex(x.shape[1])
+    elif not isinstance(columns, pd.Index):
+        columns = pd.Index(columns)
+
+    finite = np.isfinite(x)
+    count = finite.sum(axis=0)
+    x = np.where(finite, x, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 0, x.sum(axis=0) / count, np.nan)
+    m2 = (np.where(finite, x - np.nan_to_num(mean), 0.0) ** 2).sum(axis=0)
+    if x.shape[0] > 0:
+        minimum = np.where(count > 0, np.where(finite, x, np.inf).min(axis=0),
+          np.nan)
+        maximum = np.where(count > 0, np.where(finite, x, -np.inf).max(
+          axis=0), np.nan)
+    else:
+        minimum = maximum = np.full(x.shape[1], np.nan)
+
+    return dict(columns=columns, count=count.astype(np.int64),
+      mean=mean, m2=m2, min=minimum, max=maximum)
+
+def merge_summaries(summaries):
+    """
+    Merges summaries of consecutive or separate blocks of rows.
+
+    Means and sums of squared deviations are combined using the pairwise
+    update of Chan et al. (Am. Stat. 37, 242, 1983), which unlike
+    accumulation of sums of squares does not lose precision when the
+    mean is large relative to the standard deviation.
+
+    Arguments:
+      summaries (iterable): Summaries of the same columns, as returned
+        by :func:`summarize`
+
+    Returns:
+      dict: Merged summary
+    """
+    merged = None
+    for summary in summaries:
+        if merged is None:
+            merged = dict(summary)
+            continue
+        if not merged["columns"].equals(summary["columns"]):
+            raise ValueError("Summaries to be merged must be of the same "
+                             "columns")
+        n_a, n_b = merged["count"], summary["count"]
+        count = n_a + n_b
+        delta = np.nan_to_num(summary["mean"]) - np.nan_to_num(
+          merged["mean"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(count > 0, n_b / count, 0.0)
+        merged["mean"] = np.where(count > 0, np.nan_to_num(merged["mean"])
+          + delta * weight, np.nan)
+        merged["m2"] = merged["m2"] + summary["m2"] + delta ** 2 * n_a * weight
+        merged["count"] = count
+        merged["min"] = np.fmin(merged["min"], summary["min"])
+        merged["max"] = np.fmax(merged["max"], summary["max"])
+    if merged is None:
+        raise ValueError("At least one summary is required")
+
+    return merged
+
+def summary_to_df(summary, se=None):
+    """
+    Prepares a DataFrame of summary statistics.
+
+    Arguments:
+      summary (dict): Summary, as returned by :func:`summarize` or
+        :func:`merge_summaries`
+      se (Series, ndarray, optional): Standard error of the mean of each
+        column, such as from :func:`calc_se`; by default calculated
+        assuming values are uncorrelated, which for time series
+        underestimates standard error
+
+    Returns:
+      DataFrame: Count, mean, standard deviation, standard error,
+      minimum, and maximum, indexed by column
+    """
+    import pandas as pd
+
+    count = summary["count"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.where(count > 1, summary["m2"] / (count - 1),
+          np.nan))
+        if se is None:
+            se = std / np.sqrt(count)
+    if isinstance(se, pd.Series):
+        se = se.reindex(summary["columns"]).values
+
+    return pd.DataFrame(dict(count=count, mean=summary["mean"], std=std,
+      se=np.asarray(se, np.float64), min=summary["min"], max=summary["max"]),
+      index=summary["columns"],
+      columns=["count", "mean", "std", "se", "min", "max"])
+
+def summary_to_sequence_df(summary, se=None, name="value"):
+    """
+    Prepares a sequence DataFrame of the mean and standard error of each
+    residue from a summary of per-residue time series.
+
+    Arguments:
+      summary (dict): Summary, as returned by :func:`summarize` or
+        :func:`merge_summaries`
+      se (Series, ndarray, optional): Standard error of the mean of each
+        column; see :func:`summary_to_df`
+      name (str): Name of quantity if columns are residues; if columns
+        are a MultiIndex of residue and quantity, quantities are named by
+        the second level
+
+    Returns:
+      DataFrame: Mean and standard error of each quantity, in columns
+      '<quantity>' and '<quantity> se', indexed by residue
+    """
+    import pandas as pd
+
+    df = summary_to_df(summary, se)[["mean", "se"]]
+    if isinstance(df.index, pd.MultiIndex):
+        quantities = list(pd.unique(df.index.get_level_values(1)))
+        df = df.unstack(level=1)
+        df.columns = ["{0} se".format(q) if s == "se" else q
+                      for s, q in df.columns]
+        df = df[[c for q in quantities for c in [q, "{0} se".format(q)]]]
+        df = df.loc[list(pd.unique(summary["columns"].get_level_values(0)))]
+    else:
+        df.columns = [name, "{0} se".format(name)]
+    df.index.name = "residue"
+
+    return df
+
+def summarize_infile(arguments):
+    """
+    Summarizes a time series infile in a single pass over blocks of rows;
+    used by worker processes of :func:`calc_summary`.
+
+    Arguments:
+      arguments (tuple): Path to infile and approximate number of values
+        to read at once
+
+    Returns:
+      dict: Summary of infile, as returned by :func:`summarize`
+    """
+    import pandas as pd
+    from .formats import HDF5TimeSeries, read_infile, sniff_infile
+
+    infile, block_size = arguments
+    kind = sniff_infile(infile)
+    if kind == "hdf5":
+        df = HDF5TimeSeries(infile)
+        try:
+            return merge_summaries(summarize(block.values, df.columns)
+              for block in df.iter_blocks(block_size=block_size))
+        finally:
+            df.close()
+    elif kind == "cpptraj":
+        from .cpptraj2hdf5 import iter_cpptraj_blocks, read_cpptraj_fields
+
+        columns = pd.Index(read_cpptraj_fields(infile))
+        return merge_summaries([summarize(np.empty((0, columns.size)),
+          columns)] + [summarize(block, columns) for _, block, _ in
+          iter_cpptraj_blocks(infile, columns.size, np.float64,
+          max(1, block_size // (columns.size + 1)))])
+    else:
+        return summarize(read_infile(infile))
+
+def calc_summary(df, block_size=None, n_processes=1):
+    """
+    Calculates summary statistics of each column of a time series in a
+    single pass.
+
+    Time series backed by hdf5 and infiles are read in blocks of rows,
+    each of which is summarized and merged in turn, such that the time
+    series need not be held in memory; multiple infiles are summarized
+    separately, optionally in parallel, and merged.
+
+    Arguments:
+      df (DataFrame, HDF5TimeSeries, str, list): Time series, or path(s)
+        to infile(s) of the same columns
+      block_size (int, optional): Approximate number of values to read
+        at once; by default 2^22
+      n_processes (int): Number of processes with which to summarize
+        infiles
+
+    Returns:
+      dict: Summary; see :func:`summary_to_df` and
+      :func:`summary_to_sequence_df`
+    """
+    import six
+    from .formats import HDF5TimeSeries
+
+    if block_size is None:
+        block_size = 2 ** 22
+
+    if isinstance(df, HDF5TimeSeries):
+        return merge_summaries(summarize(block.values, df.columns)
+          for block in df.iter_blocks(block_size=block_size))
+    elif isinstance(df, six.string_types):
+        return summarize_infile((df, block_size))
+    elif isinstance(df, (list, tuple)):
+        arguments = [(infile, block_size) for infile in df]
+        if n_processes is not None and n_processes > 1 and len(df) > 1:
+            from multiprocessing import Pool
+
+            pool = Pool(min(n_processes, len(df)))
+            try:
+                return merge_summaries(pool.imap(summarize_infile,
+                  arguments))
+            finally:
+                pool.terminate()
+                pool.join()
+        return merge_summaries(summarize_infile(a) for a in arguments)
+    else:
+        return summarize(df)
+
+def benchmark_block_mode(n_blocks=1000, block_size=100, n_columns=20,
+    n_values=8, n_repeats=3, verbose=1, **kwargs):
+    """
+    Compares the performance of :func:`block_mode` with
+    :func:`scipy.stats.mstats.mode` on random categorical data.
+
+    Arguments:
+      n_blocks (int): Number of blocks
+      block_size (int): Number of values per block
+      n_columns (int): Number of columns
+      n_values (int): Size of alphabet from which values are drawn
+      n_repeats (int): Number of times to repeat each calculation
+      verbose (int): Level of verbose output
+      kwargs (dict): Additional keyword arguments
+
+    Returns:
+      DataFrame: Best time of each method, and whether results match
+    """
+    from time import time
+    import pandas as pd
+    from scipy.stats.mstats import mode
+
+    blocks = np.random.RandomState(0).randint(0, n_values,
+      (n_blocks, block_size, n_columns)).astype(np.uint8)
+
+    def scipy_mode(blocks):
+        return np.reshape(np.ma.filled(mode(blocks, axis=1)[0], np.nan),
+          (blocks.shape[0], blocks.shape[2]))
+
+    results = []
+    for name, function in [("scipy", scipy_mode), ("bincount", block_mode)]:
+        best = None
+        for i in range(n_repeats):
+            start = time()
+            result = function(blocks)
+            elapsed = time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        results.append((name, best, result))
+    match = np.array_equal(results[0][2], results[1][2])
+
+    results = pd.DataFrame([(best, match) for _, best, _ in results],
+      index=[name for name, _, _ in results], columns=["time (s)", "match"])
+    results.index.name = "method"
+    results["speedup"] = results["time (s)"]["scipy"] / results["time (s)"]
+    if verbose >= 1:
+        print("Mode of {0} blocks of {1} x {2} values drawn from {3}".format(
+          n_blocks, block_size, n_columns, n_values))
+        print(results)
+
+    return results
+
+#################################### MAIN #####################################
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+      description = "Compares the performance of block_mode with "
+                    "scipy.stats.mstats.mode")
+    parser.add_argument(
+      "-n_blocks",
+      type     = int,
+      default  = 1000,
+      help     = "number of blocks (default: %(default)s)")
+    parser.add_argument(
+      "-block_size",
+      type     = int,
+      default  = 100,
+      help     = "number of values per block (default: %(default)s)")
+    parser.add_argument(
+      "-n_columns",
+      type     = int,
+      default  = 20,
+      help     = "number of columns (default: %(default)s)")
+    parser.add_argument(
+      "-n_values",
+      type     = int,
+      default  = 8,
+      help     = "size of alphabet from which values are drawn (default: "
+                 "%(default)s)")
+    parser.add_argument(
+      "-n_repeats",
+      type     = int,
+      default  = 3,
+      help     = "number of times to repeat each calculation (default: "
+                 "%(default)s)")
+
+    benchmark_block_mode(**vars(parser.parse_args()))
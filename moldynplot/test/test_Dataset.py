@@ -92,7 +92,220 @@ def test_dssp():
 
     # Write hdf5
 
+def test_downsample():
+    for infile, downsample_mode in [("data/p53/perresrmsd.h5", "mean"),
+                                    ("data/p53/dssp.h5", "mode")]:
+        # Downsample in memory
+        eager_df = TimeSeriesDataset(
+          infile=infile,
+          downsample=7,
+          downsample_mode=downsample_mode).timeseries_df
+
+        # Downsample out-of-core
+        lazy_df = TimeSeriesDataset(
+          infile=infile,
+          downsample=7,
+          downsample_mode=downsample_mode,
+          lazy=True).timeseries_df
+
+        # Compare
+        assert_frame_equal(eager_df, lazy_df, check_exact=True)
+
+def test_pyramid(tmpdir):
+    outfile = str(tmpdir.join("perresrmsd.h5"))
+
+    # Write with pyramid
+    TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      outfile=outfile,
+      pyramid=[10, 100])
+
+    # Downsample from full resolution and from pyramid
+    eager_df = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      max_points=100).timeseries_df
+    pyramid_df = TimeSeriesDataset(
+      infile=outfile,
+      max_points=100).timeseries_df
+
+    # Compare
+    assert eager_df.shape[0] <= 100
+    assert_frame_equal(eager_df, pyramid_df, check_exact=False, rtol=1e-5)
+
+    # Downsample window not aligned to intervals of pyramid
+    eager_df = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      tmin=0.5,
+      downsample=10).timeseries_df
+    pyramid_df = TimeSeriesDataset(
+      infile=outfile,
+      tmin=0.5,
+      downsample=10).timeseries_df
+    assert eager_df.shape[0] == 999
+    assert_frame_equal(eager_df, pyramid_df, check_exact=False, rtol=1e-5)
+
+def test_pdist():
+    # Calculate using sklearn
+    sklearn_pdist = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      calc_pdist=True,
+      pdist_kw=dict(mode="sklearn", bandwidth=0.1)).pdist_df
+
+    # Calculate using binned kernel density estimate
+    kde_pdist = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      calc_pdist=True,
+      pdist_kw=dict(bandwidth=0.1)).pdist_df
+
+    # Calculate in parallel
+    parallel_pdist = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      calc_pdist=True,
+      pdist_kw=dict(bandwidth=0.1, n_processes=2)).pdist_df
+
+    # Compare
+    assert list(parallel_pdist.keys()) == list(kde_pdist.keys())
+    for column, pdist in sklearn_pdist.items():
+        assert_frame_equal(pdist, kde_pdist[column], check_exact=False,
+          atol=1e-4)
+        assert_frame_equal(parallel_pdist[column], kde_pdist[column])
+
+def test_window():
+    # Read window of cpptraj, parsing only selected lines
+    cpptraj_df = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.cpptraj",
+      dt=0.1,
+      toffset=-0.1,
+      tmin=100.0,
+      tmax=500.0,
+      stride=0.7).timeseries_df
+
+    # Read hyperslab of hdf5, eagerly and lazily
+    hdf5_df = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      tmin=100.0,
+      tmax=500.0,
+      stride=0.7).timeseries_df
+    lazy_df = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5",
+      tmin=100.0,
+      tmax=500.0,
+      stride=0.7,
+      lazy=True).timeseries_df.load()
+
+    # Compare
+    full_df = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5").timeseries_df
+    assert_frame_equal(hdf5_df, full_df.loc[100.0:500.0].iloc[::7])
+    assert_frame_equal(lazy_df, hdf5_df)
+    assert_frame_equal(cpptraj_df, hdf5_df, check_exact=False, atol=1e-4,
+      check_dtype=False)
+
+def test_residues():
+    from numpy.testing import assert_allclose
+
+    full_df = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.h5").timeseries_df
+    for infile in ["data/p53/perresrmsd.cpptraj", "data/p53/perresrmsd.h5",
+                   "data/p53/perresrmsd_legacy.h5"]:
+        df = TimeSeriesDataset(
+          infile=infile,
+          residues=["2-4", "PRO:12"]).timeseries_df
+        assert list(df.columns) == ["GLU:2", "THR:3", "PHE:4", "PRO:12"]
+        assert_allclose(df.values, full_df[df.columns].values, atol=1e-4)
+
+def test_disk_cache(tmpdir):
+    disk_cache = str(tmpdir.join("cache"))
+
+    # Process and store
+    processed = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.cpptraj",
+      dt=0.1,
+      downsample=10,
+      calc_pdist=True,
+      pdist_kw=dict(bandwidth=0.1),
+      disk_cache=disk_cache)
+    assert len(tmpdir.join("cache").listdir()) == 1
+
+    # Restore
+    restored = TimeSeriesDataset(
+      infile="data/p53/perresrmsd.cpptraj",
+      dt=0.1,
+      downsample=10,
+      calc_pdist=True,
+      pdist_kw=dict(bandwidth=0.1),
+      disk_cache=disk_cache)
+    assert_frame_equal(restored.timeseries_df, processed.timeseries_df)
+    for column, pdist in processed.pdist_df.items():
+        assert_frame_equal(restored.pdist_df[column], pdist)
+    assert len(tmpdir.join("cache").listdir()) == 1
+
+    # Process again with different parameters
+    TimeSeriesDataset(
+      infile="data/p53/perresrmsd.cpptraj",
+      dt=0.1,
+      downsample=5,
+      disk_cache=disk_cache)
+    assert len(tmpdir.join("cache").listdir()) == 2
+
+def test_dtype(tmpdir):
+    import numpy as np
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+
+    # Write cpptraj output of many frames
+    infile = str(tmpdir.join("perresrmsd.cpptraj"))
+    values = np.random.RandomState(0).rand(100000, 20)
+    with open(infile, "w") as outfile:
+        outfile.write("#Frame " + " ".join("ALA:{0}".format(i + 1)
+          for i in range(values.shape[1])) + "\n")
+        np.savetxt(outfile, np.column_stack((np.arange(1, values.shape[0]
+          + 1), values)), fmt=["%d"] + ["%.3f"] * values.shape[1])
+
+    # Hold single precision through reading and downsampling; measure
+    # peak memory where supported (Python 3)
+    peaks, dfs = {}, {}
+    for dtype in [None, "float32"]:
+        if tracemalloc is not None:
+            tracemalloc.start()
+        dfs[dtype] = TimeSeriesDataset(
+          infile=infile,
+          dt=0.1,
+          dtype=dtype,
+          downsample=10,
+          calc_pdist=True).timeseries_df
+        if tracemalloc is not None:
+            peaks[dtype] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    assert (dfs[None].dtypes == np.float64).all()
+    assert (dfs["float32"].dtypes == np.float32).all()
+    assert dfs["float32"].values.nbytes * 2 == dfs[None].values.nbytes
+    assert_frame_equal(dfs["float32"], dfs[None], check_dtype=False,
+      check_exact=False, atol=1e-6)
+    if tracemalloc is not None:
+        assert peaks["float32"] < peaks[None] - values.nbytes / 4
+
+    # Hold categorical kinds as uint8
+    dssp_df = TimeSeriesDataset(
+      infile="data/p53/dssp.cpptraj",
+      dtype="secstruct",
+      downsample=10,
+      downsample_mode="mode").timeseries_df
+    assert (dssp_df.dtypes == np.uint8).all()
+
 if __name__ == "__main__":
+    from tempfile import mkdtemp
+    import py
+
     test_rmsd()
     test_perresrmsd()
     test_dssp()
+    test_downsample()
+    test_pyramid(py.path.local(mkdtemp()))
+    test_pdist()
+    test_window()
+    test_residues()
+    test_disk_cache(py.path.local(mkdtemp()))
+    test_dtype(py.path.local(mkdtemp()))
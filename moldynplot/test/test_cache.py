@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#   test_cache.py
+#
+#   Copyright (C) 2015-2016 Karl T Debiec
+#   All rights reserved.
+#
+#   This software may be modified and distributed under the terms of the
+#   BSD license. See the LICENSE file for details.
+################################### MODULES ###################################
+import os
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from moldynplot.cache import DatasetCache, DiskCache, get_digest, get_nbytes
+################################## FUNCTIONS ##################################
+def test_digest():
+    assert get_digest(dict(a=1, b=[2, 3])) == get_digest(dict(b=[2, 3], a=1))
+    assert get_digest(dict(a=1)) != get_digest(dict(a=2))
+    assert (get_digest(np.linspace(0, 10, 1000))
+         == get_digest(np.linspace(0, 10, 1000)))
+    assert (get_digest(np.linspace(0, 10, 1000))
+         != get_digest(np.linspace(0, 10, 1001)))
+
+def test_disk_cache(tmpdir):
+    infile = str(tmpdir.join("rmsd.dat"))
+    with open(infile, "w") as open_file:
+        open_file.write("#Frame rmsd\n1 0.5\n")
+    cache = DiskCache(str(tmpdir.join("cache")), max_bytes=2 ** 20)
+
+    # Keyed by infile identity and parameters
+    key = cache.get_key(DiskCache, [infile], dict(dt=0.1, verbose=1))
+    assert key == cache.get_key(DiskCache, [infile], dict(dt=0.1))
+    assert key != cache.get_key(DiskCache, [infile], dict(dt=0.2))
+    df = pd.DataFrame(np.random.RandomState(0).rand(1000, 10))
+    assert cache.load(key) is None
+    assert cache.store(key, dict(timeseries_df=df))
+    assert_frame_equal(cache.load(key)["timeseries_df"], df)
+    os.utime(infile, (0, 0))
+    assert cache.get_key(DiskCache, [infile], dict(dt=0.1)) != key
+    hash_cache = DiskCache(cache.path, hash_infiles=True)
+    hash_key = hash_cache.get_key(DiskCache, [infile], {})
+    os.utime(infile, (1, 1))
+    assert hash_cache.get_key(DiskCache, [infile], {}) == hash_key
+
+    # Least-recently-used entries evicted above cap
+    keys = ["{0:040x}".format(i) for i in range(3)]
+    for i, k in enumerate(keys):
+        cache.store(k, dict(timeseries_df=df))
+        os.utime(os.path.join(cache.path, k + ".pkl"), (i + 1, i + 1))
+    os.utime(os.path.join(cache.path, key + ".pkl"), (0, 0))
+    assert cache.load(keys[0]) is not None
+    cache.max_bytes = int(2.5 * os.path.getsize(os.path.join(cache.path,
+      key + ".pkl")))
+    assert cache.evict() == 2
+    assert cache.load(key) is None
+    assert cache.load(keys[1]) is None
+    assert cache.load(keys[0]) is not None
+    assert cache.load(keys[2]) is not None
+
+def test_dataset_cache():
+    class Dataset(object):
+        pass
+
+    # Footprint summed over DataFrames and arrays of dataset
+    dataset = Dataset()
+    dataset.timeseries_df = pd.DataFrame(np.zeros((1000, 10)))
+    dataset.pdist = dict(a=np.zeros(500), b=[np.zeros(500)])
+    dataset.label = "label"
+    assert get_nbytes(dataset) == (80000 + 4000 + 4000
+      + dataset.timeseries_df.index.memory_usage())
+
+    # Least-recently-used entries evicted above cap
+    cache = DatasetCache(max_bytes=3 * get_nbytes(dataset), verbose=0)
+    for key in "abc":
+        cache[key] = dataset
+    assert "a" in cache
+    assert "d" not in cache
+    cache["d"] = dataset
+    assert list(cache.keys()) == ["c", "a", "d"]
+    assert cache.resident_bytes == 3 * get_nbytes(dataset)
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 1)
+    cache.max_bytes = get_nbytes(dataset)
+    assert cache.evict() == 2
+    assert list(cache.keys()) == ["d"]
+    assert cache.get("c") is None
+    assert cache.get("d") is dataset
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 2, 3)
+
+if __name__ == "__main__":
+    from tempfile import mkdtemp
+    import py
+
+    test_digest()
+    test_disk_cache(py.path.local(mkdtemp()))
+    test_dataset_cache()
@@ -0,0 +1,335 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#   test_cpptraj2hdf5.py
+#
+#   Copyright (C) 2015-2016 Karl T Debiec
+#   All rights reserved.
+#
+#   This software may be modified and distributed under the terms of the
+#   BSD license. See the LICENSE file for details.
+################################### MODULES ###################################
+import os
+import shutil
+import h5py
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal, assert_allclose
+from moldynplot.cpptraj2hdf5 import (find_batch_infiles, process_batch,
+  process_cpptraj, process_saxs, read_hdf5_dataset)
+################################## FUNCTIONS ##################################
+def test_perresrmsd(tmpdir):
+    outfile = str(tmpdir.join("perresrmsd.h5"))
+
+    # Convert in small blocks
+    process_cpptraj(infiles="data/p53/perresrmsd.cpptraj", outfile=outfile,
+      address="perresrmsd", dtype=np.float32, scaleoffset=4, block_size=999,
+      verbose=0)
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        with h5py.File("data/p53/perresrmsd_legacy.h5", "r") as lgcy_h5:
+            assert_array_equal(out_h5["perresrmsd"].attrs["fields"],
+              lgcy_h5["perresrmsd"].attrs["fields"])
+            assert_allclose(out_h5["perresrmsd"][:],
+              lgcy_h5["perresrmsd"][:], atol=1e-4)
+
+def test_dssp(tmpdir):
+    outfile = str(tmpdir.join("dssp.h5"))
+
+    # Convert
+    process_cpptraj(infiles="data/p53/dssp.cpptraj", outfile=outfile,
+      address="secstruct", dtype=np.uint8, scaleoffset=3, verbose=0)
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        with h5py.File("data/p53/dssp_legacy.h5", "r") as lgcy_h5:
+            assert_array_equal(out_h5["secstruct"][:],
+              lgcy_h5["secstruct"][:])
+
+def test_segments(tmpdir):
+    outfile = str(tmpdir.join("perresrmsd.h5"))
+
+    # Split into segments whose boundary frames overlap
+    with open("data/p53/perresrmsd.cpptraj", "r") as infile:
+        lines = infile.readlines()
+    for i, (start, end) in enumerate([(1, 3001), (3000, 7001), (7000, None)]):
+        with open(str(tmpdir.join("seg_{0}.dat".format(i+1))), "w") as seg:
+            seg.writelines([lines[0]] + lines[start:end])
+
+    # Convert in parallel
+    process_cpptraj(infiles=str(tmpdir.join("seg_*.dat")), outfile=outfile,
+      address="perresrmsd", dtype=np.float32, scaleoffset=4, n_processes=2,
+      verbose=0)
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        with h5py.File("data/p53/perresrmsd_legacy.h5", "r") as lgcy_h5:
+            assert_allclose(out_h5["perresrmsd"][:],
+              lgcy_h5["perresrmsd"][:], atol=1e-4)
+
+def test_gnu(tmpdir):
+    infile = str(tmpdir.join("dssp.gnu"))
+    outfile = str(tmpdir.join("dssp.h5"))
+
+    # Write in gnuplot format
+    dssp = np.loadtxt("data/p53/dssp.cpptraj", skiprows=1)[:,1:]
+    with open(infile, "w") as gnu:
+        gnu.write("#\n" * 13)
+        for i, frame in enumerate(dssp, 1):
+            for j, value in enumerate(frame, 1):
+                gnu.write("{0} {1} {2}\n".format(i, j, value))
+            gnu.write("\n")
+        gnu.write("end\npause -1\n")
+
+    # Convert in small blocks
+    process_cpptraj(infiles=infile, outfile=outfile, address="secstruct",
+      dtype=np.uint8, scaleoffset=3, block_size=1000, verbose=0)
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        with h5py.File("data/p53/dssp_legacy.h5", "r") as lgcy_h5:
+            assert_array_equal(out_h5["secstruct"][:],
+              lgcy_h5["secstruct"][:])
+
+def test_saxs(tmpdir):
+    outfile = str(tmpdir.join("saxs.h5"))
+
+    # Write crysol-format infiles containing differing numbers of frames
+    q = np.linspace(0.0, 0.5, 51)
+    intensity = np.random.RandomState(0).random_sample((10, q.size))
+    for i, (start, end) in enumerate([(0, 1), (1, 4), (4, 10)]):
+        with open(str(tmpdir.join("frame_{0}.dat".format(i))), "w") as saxs:
+            saxs.write(" Dif/Atom/Excl/Shell frame.pdb\n")
+            for frame in intensity[start:end]:
+                for q_i, intensity_i in zip(q, frame):
+                    saxs.write("{0:.5f} {1:.8f}\n".format(q_i, intensity_i))
+
+    # Convert in parallel, identifying program from header
+    process_saxs(package=None, infiles=[str(tmpdir.join("frame_*.dat"))],
+      outfile=outfile, address="saxs", dtype=np.float32, scaleoffset=6,
+      n_processes=2, verbose=0)
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        assert_allclose(out_h5["saxs/q"][:], q, atol=1e-5)
+        assert_allclose(out_h5["saxs/intensity"][:], intensity, atol=1e-5)
+    assert len(tmpdir.listdir()) == 4
+
+def test_saxs_resume(tmpdir, monkeypatch):
+    import moldynplot.cpptraj2hdf5
+    infile = str(tmpdir.join("saxs.dat"))
+    outfile = str(tmpdir.join("saxs.h5"))
+
+    # Write crysol-format infile
+    q = np.linspace(0.0, 0.5, 51)
+    intensity = np.random.RandomState(0).random_sample((10, q.size))
+    with open(infile, "w") as saxs:
+        saxs.write("# Dummy header\n")
+        for frame in intensity:
+            for q_i, intensity_i in zip(q, frame):
+                saxs.write("{0:.5f} {1:.8f}\n".format(q_i, intensity_i))
+
+    # Interrupt after parsing, once q has been written to outfile
+    def interrupt(*args, **kwargs):
+        raise KeyboardInterrupt()
+    with monkeypatch.context() as patch:
+        patch.setattr(moldynplot.cpptraj2hdf5, "get_hdf5_kw", interrupt)
+        try:
+            process_saxs(package="crysol", infiles=infile, outfile=outfile,
+              address="saxs", dtype=np.float32, scaleoffset=6, verbose=0)
+        except KeyboardInterrupt:
+            pass
+    assert len(tmpdir.listdir()) == 5
+
+    # Resume
+    process_saxs(package="crysol", infiles=infile, outfile=outfile,
+      address="saxs", dtype=np.float32, scaleoffset=6, verbose=0)
+    with h5py.File(outfile, "r") as out_h5:
+        assert_allclose(out_h5["saxs/q"][:], q, atol=1e-5)
+        assert_allclose(out_h5["saxs/intensity"][:], intensity, atol=1e-5)
+    assert len(tmpdir.listdir()) == 2
+
+def test_append(tmpdir):
+    infile = str(tmpdir.join("perresrmsd.dat"))
+    outfile = str(tmpdir.join("perresrmsd.h5"))
+    with open("data/p53/perresrmsd.cpptraj", "r") as cpptraj:
+        lines = cpptraj.readlines()
+
+    # Convert partially-written infile, ending in an incomplete line
+    with open(infile, "w") as partial:
+        partial.writelines(lines[:4001])
+        partial.write(lines[4001][:20])
+    process_cpptraj(infiles=infile, outfile=outfile, address="perresrmsd",
+      dtype=np.float32, scaleoffset=4, append=True, verbose=0)
+    with h5py.File(outfile, "r") as out_h5:
+        assert out_h5["perresrmsd"].shape == (4000, 15)
+        assert out_h5["perresrmsd"].attrs["last_frame"] == 4000
+
+    # Complete infile and append
+    with open(infile, "w") as complete:
+        complete.writelines(lines)
+    process_cpptraj(infiles=infile, outfile=outfile, address="perresrmsd",
+      dtype=np.float32, scaleoffset=4, append=True, verbose=0)
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        with h5py.File("data/p53/perresrmsd_legacy.h5", "r") as lgcy_h5:
+            assert_allclose(out_h5["perresrmsd"][:],
+              lgcy_h5["perresrmsd"][:], atol=1e-4)
+
+def test_final_line(tmpdir):
+    from moldynplot.formats import read_cpptraj
+
+    infile = str(tmpdir.join("perresrmsd.dat"))
+    outfile = str(tmpdir.join("perresrmsd.h5"))
+    with open("data/p53/perresrmsd.cpptraj", "r") as cpptraj:
+        text = cpptraj.read()
+
+    # Parse final line of complete infile lacking final newline
+    with open(infile, "w") as complete:
+        complete.write(text.rstrip("\n"))
+    df = read_cpptraj("data/p53/perresrmsd.cpptraj")
+    assert_allclose(read_cpptraj(infile).values, df.values)
+    process_cpptraj(infiles=infile, outfile=outfile, address="perresrmsd",
+      dtype=np.float32, scaleoffset=4, verbose=0)
+    with h5py.File(outfile, "r") as out_h5:
+        assert out_h5["perresrmsd"].shape == df.shape
+        assert out_h5["perresrmsd"].attrs["last_frame"] == df.index[-1]
+
+def test_layout(tmpdir):
+    outfile = str(tmpdir.join("perresrmsd.h5"))
+
+    # Convert using column-oriented layout
+    process_cpptraj(infiles="data/p53/perresrmsd.cpptraj", outfile=outfile,
+      address="perresrmsd", dtype=np.float32, scaleoffset=4,
+      layout="columns", verbose=0)
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        assert out_h5["perresrmsd"].chunks[1] == 1
+        assert out_h5["perresrmsd"].shuffle
+        with h5py.File("data/p53/perresrmsd_legacy.h5", "r") as lgcy_h5:
+            assert_allclose(out_h5["perresrmsd"][:],
+              lgcy_h5["perresrmsd"][:], atol=1e-4)
+
+def test_packbits(tmpdir):
+    infile = str(tmpdir.join("helix.dat"))
+    outfile = str(tmpdir.join("helix.h5"))
+
+    # Write binary data spanning more than one byte per frame
+    with open("data/p53/dssp.cpptraj", "r") as cpptraj:
+        header = cpptraj.readline()
+    helix = (np.loadtxt("data/p53/dssp.cpptraj", skiprows=1)[:,1:] == 4)
+    with open(infile, "w") as binary:
+        binary.write(header)
+        for i, frame in enumerate(helix.astype(np.uint8), 1):
+            binary.write("{0:8d}".format(i) +
+              "".join("{0:13d}".format(v) for v in frame) + "\n")
+
+    # Convert in small blocks
+    process_cpptraj(infiles=infile, outfile=outfile, address="helix",
+      dtype=np.uint8, scaleoffset=1, block_size=1000, packbits=True,
+      verbose=0)
+
+    # Compare, reading all data and a partial selection
+    with h5py.File(outfile, "r") as out_h5:
+        assert out_h5["helix"].shape == (helix.shape[0], 2)
+        assert out_h5["helix"].attrs["packbits"] == helix.shape[1]
+        assert_array_equal(read_hdf5_dataset(out_h5["helix"]), helix)
+        assert_array_equal(read_hdf5_dataset(out_h5["helix"],
+          frames=slice(100, 200), columns=[9, 4, 12]),
+          helix[100:200][:,[9, 4, 12]])
+
+def test_pyramid(tmpdir, capsys):
+    infile = str(tmpdir.join("perresrmsd.dat"))
+    outfile = str(tmpdir.join("perresrmsd.h5"))
+    with open("data/p53/perresrmsd.cpptraj", "r") as cpptraj:
+        lines = cpptraj.readlines()
+    with open(infile, "w") as partial:
+        partial.writelines(lines[:4001])
+
+    # Convert in blocks not aligned to levels
+    process_cpptraj(infiles=infile, outfile=outfile, address="perresrmsd",
+      dtype=np.float32, scaleoffset=4, block_size=333, pyramid=[7, 10, 70],
+      append=True, verbose=0)
+    with h5py.File(outfile, "r") as out_h5:
+        assert list(out_h5) == ["perresrmsd", "perresrmsd_pyramid"]
+        assert out_h5["perresrmsd_pyramid"].attrs["source_rows"] == 4000
+
+    # Append; pyramid is extended from the interval of 70 containing the
+    # start of the last chunk of 256 rows previously covered
+    with open(infile, "w") as complete:
+        complete.writelines(lines)
+    capsys.readouterr()
+    process_cpptraj(infiles=infile, outfile=outfile, address="perresrmsd",
+      dtype=np.float32, scaleoffset=4, append=True, verbose=1)
+    assert "from row 3780 to 10000" in capsys.readouterr()[0]
+
+    # Compare
+    with h5py.File(outfile, "r") as out_h5:
+        data = out_h5["perresrmsd"][:]
+        pyramid = out_h5["perresrmsd_pyramid"]
+        assert pyramid.attrs["source_rows"] == data.shape[0]
+        for factor in [7, 10, 70]:
+            n_rows = data.shape[0] // factor
+            reduced = np.reshape(data[:n_rows * factor],
+              (n_rows, factor, data.shape[1]))
+            level = pyramid[str(factor)]
+            assert_allclose(level["index"][:], np.reshape(
+              np.arange(n_rows * factor), (n_rows, factor)).mean(axis=1))
+            assert_allclose(level["mean"][:], reduced.mean(axis=1),
+              rtol=1e-6)
+            assert_array_equal(level["min"][:], reduced.min(axis=1))
+            assert_array_equal(level["max"][:], reduced.max(axis=1))
+
+def test_batch(tmpdir):
+    indir = tmpdir.mkdir("p53")
+    outdir = str(tmpdir.join("h5"))
+    shutil.copy("data/p53/perresrmsd.cpptraj",
+      str(indir.join("perresrmsd.dat")))
+    shutil.copy("data/p53/dssp.cpptraj",
+      str(indir.mkdir("1").join("dssp.dat")))
+    shutil.copy("data/p53/rmsd.dat", str(indir.join("rmsd.dat")))
+
+    # Convert directory tree in parallel
+    results = process_batch(str(indir), outdir=outdir, n_processes=2,
+      summary=str(tmpdir.join("summary.txt")), verbose=0)
+    assert list(results["status"]) == ["converted", "converted"]
+    assert list(results["frames"]) == [10000, 10000]
+    with h5py.File(os.path.join(outdir, "perresrmsd.h5"), "r") as out_h5:
+        with h5py.File("data/p53/perresrmsd_legacy.h5", "r") as lgcy_h5:
+            assert_allclose(out_h5["perresrmsd"][:],
+              lgcy_h5["perresrmsd"][:], atol=1e-4)
+    with h5py.File(os.path.join(outdir, "1", "dssp.h5"), "r") as out_h5:
+        with h5py.File("data/p53/dssp_legacy.h5", "r") as lgcy_h5:
+            assert_array_equal(out_h5["secstruct"][:],
+              lgcy_h5["secstruct"][:])
+
+    # Skip outfiles that are newer than their infiles, or whose infiles'
+    # contents are unchanged
+    os.utime(str(indir.join("perresrmsd.dat")), (2e9, 2e9))
+    results = process_batch(str(indir), outdir=outdir, verbose=0)
+    assert list(results["status"]) == ["skipped", "skipped"]
+
+    # Convert outfiles whose infiles have changed
+    with open(str(indir.join("1", "dssp.dat")), "r") as infile:
+        lines = infile.readlines()
+    with open(str(indir.join("1", "dssp.dat")), "w") as infile:
+        infile.writelines(lines[:1001])
+    os.utime(str(indir.join("1", "dssp.dat")), (2e9, 2e9))
+    results = process_batch(str(indir), outdir=outdir, verbose=0)
+    assert list(results["status"]) == ["skipped", "converted"]
+    assert list(results["frames"]) == [10000, 1000]
+
+    # Determine kinds of manifest entries from their file names
+    manifest = str(tmpdir.join("manifest.txt"))
+    with open(manifest, "w") as manifest_file:
+        manifest_file.write("p53/perresrmsd.dat\n")
+        manifest_file.write("p53/1/dssp.dat secstruct h5/dssp.h5\n")
+    assert [kind for _, kind, _ in find_batch_infiles(manifest)] == [
+      "perresrmsd", "secstruct"]
+    with open(manifest, "a") as manifest_file:
+        manifest_file.write("p53/rmsd.dat\n")
+    with pytest.raises(ValueError) as excinfo:
+        find_batch_infiles(manifest)
+    assert "line 3 of '{0}'".format(manifest) in str(excinfo.value)
@@ -0,0 +1,251 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#   test_formats.py
+#
+#   Copyright (C) 2015-2016 Karl T Debiec
+#   All rights reserved.
+#
+#   This software may be modified and distributed under the terms of the
+#   BSD license. See the LICENSE file for details.
+################################### MODULES ###################################
+import os
+import numpy as np
+from numpy.testing import assert_allclose
+from moldynplot.formats import read_infile, sniff_cache, sniff_infile
+################################## FUNCTIONS ##################################
+def test_sniff(tmpdir):
+    relax = str(tmpdir.join("relax.dat"))
+    with open(relax, "w") as infile:
+        infile.write("#Vec    ired[T1]    ired[T2]    ired[NOE]\n")
+        infile.write("1    0.5    0.1    0.8\n")
+    order = str(tmpdir.join("order.dat"))
+    with open(order, "w") as infile:
+        infile.write("#Vec    ired[S2]\n")
+        infile.write("1    0.9\n")
+
+    assert sniff_infile("data/p53/perresrmsd.cpptraj") == "cpptraj"
+    assert sniff_infile("data/p53/perresrmsd.h5") == "hdf5"
+    assert sniff_infile("data/p53/perresrmsd_legacy.h5:perresrmsd") == "hdf5"
+    assert sniff_infile("data/p53/dssp.gnu") == "gnu"
+    assert sniff_infile(relax) == "ired_relax"
+    assert sniff_infile(order) == "ired_order"
+    assert sniff_infile("data/p53/perresrmsd.dat") == "other"
+
+    # Modified infiles are sniffed again
+    with open(order, "w") as infile:
+        infile.write("#Frame    rmsd\n")
+        infile.write("1    0.9\n")
+    os.utime(order, (0, 0))
+    assert sniff_infile(order) == "cpptraj"
+    assert sniff_cache[order] == (0, "cpptraj")
+
+    # Formats determined from path alone are not cached
+    assert sniff_infile(str(tmpdir.join("missing.h5"))) == "hdf5"
+    assert str(tmpdir.join("missing.h5")) not in sniff_cache
+
+    # SAXS profiles are identified from the header of each program
+    for package, header in [("crysol", " Dif/Atom/Excl/Shell lyz.pdb"),
+      ("foxs", "# SAXS profile: number of points = 501, q_min = 0"),
+      ("saxs_md", "# saxs_md output"), ("other", "# SAXS intensity")]:
+        saxs = str(tmpdir.join("{0}.dat".format(package)))
+        with open(saxs, "w") as infile:
+            infile.write(header + "\n")
+            infile.write("0.0    1.0\n")
+        assert sniff_infile(saxs) == package
+
+    # Read
+    df = read_infile(relax)
+    assert list(df.columns) == ["r1", "r2", "noe"]
+    assert_allclose(df.values, [[2.0, 10.0, 0.8]])
+
+def test_read():
+    cpptraj_df = read_infile("data/p53/perresrmsd.cpptraj")
+    lgcy_df = read_infile("data/p53/perresrmsd_legacy.h5")
+    hdf5_df = read_infile("data/p53/perresrmsd.h5")
+
+    assert list(cpptraj_df.columns) == list(lgcy_df.columns)
+    assert list(cpptraj_df.columns) == list(hdf5_df.columns)
+    assert_allclose(cpptraj_df.values, lgcy_df.values, atol=1e-4)
+    assert_allclose(cpptraj_df.values, hdf5_df.values, atol=1e-4)
+    assert_allclose(cpptraj_df.index.values * 0.1 - 0.1,
+      hdf5_df.index.values)
+
+def test_cpptraj(tmpdir):
+    import gzip
+    import lzma
+    from pandas.testing import assert_frame_equal
+    from moldynplot.formats import get_sidecar_path, read_cpptraj
+
+    # Read with column types inferred, as by read_csv
+    df = read_cpptraj("data/p53/dssp.cpptraj")
+    assert (df.dtypes == "int64").all()
+    assert_frame_equal(read_cpptraj("data/p53/dssp.cpptraj", n_threads=4),
+      df)
+
+    # Read compressed
+    with open("data/p53/dssp.cpptraj", "rb") as infile:
+        text = infile.read()
+    for open_func, extension in [(gzip.open, "gz"), (lzma.open, "xz")]:
+        path = str(tmpdir.join("dssp.cpptraj.{0}".format(extension)))
+        with open_func(path, "wb") as outfile:
+            outfile.write(text)
+        assert sniff_infile(path) == "cpptraj"
+        assert_frame_equal(read_cpptraj(path, n_threads=2), df)
+
+    # Write sidecar on first read, and read from it thereafter
+    path = str(tmpdir.join("dssp.cpptraj"))
+    with open(path, "wb") as outfile:
+        outfile.write(text)
+    assert_frame_equal(read_cpptraj(path, sidecar=True), df)
+    assert os.path.isfile(get_sidecar_path(path))
+    assert len(tmpdir.listdir()) == 4
+    assert_frame_equal(read_cpptraj(path, sidecar=True), df)
+
+    # Parse infile again if it has changed
+    with open(path, "wb") as outfile:
+        outfile.write(text[:len(text) // 2].rsplit(b"\n", 1)[0] + b"\n")
+    assert read_cpptraj(path, sidecar=True).shape[0] < df.shape[0]
+
+def test_lazy():
+    from pandas.testing import assert_frame_equal, assert_series_equal
+    from moldynplot.formats import HDF5TimeSeries, read_hdf5
+
+    # Index stored in infile
+    df = read_hdf5("data/p53/perresrmsd.h5")
+    lazy = HDF5TimeSeries("data/p53/perresrmsd.h5")
+    assert lazy.shape == df.shape
+    assert_frame_equal(lazy.load(), df)
+    assert_series_equal(lazy["LEU:7"], df["LEU:7"])
+    assert_frame_equal(lazy.loc[100.0:200.0, ["PRO:12", "ACE:1"]].load(),
+      df.loc[100.0:200.0, ["PRO:12", "ACE:1"]])
+    assert_frame_equal(lazy[["GLU:2", "TRP:8"]].iloc[10:5000:7].load(),
+      df[["GLU:2", "TRP:8"]].iloc[10:5000:7])
+    lazy.close()
+
+    # Index of frames, scaled and shifted as metadata
+    df = read_hdf5("data/p53/perresrmsd_legacy.h5")
+    df.index = df.index.values * 0.1 + 5.0
+    df.index.name = "time"
+    lazy = HDF5TimeSeries("data/p53/perresrmsd_legacy.h5").scale_index(0.1,
+      "time").shift_index(5.0)
+    assert_frame_equal(lazy.load(), df)
+    assert_frame_equal(lazy.loc[55.0:60.0].load(), df.loc[55.0:60.0])
+    assert_frame_equal(lazy.iloc[::10].loc[55.0:].load(),
+      df.iloc[::10].loc[55.0:])
+    for (column, series), (_, expected) in zip(lazy.items(), df.items()):
+        assert_series_equal(series, expected)
+    lazy.close()
+
+def test_blocks():
+    from moldynplot.formats import HDF5TimeSeries
+
+    lazy = HDF5TimeSeries("data/p53/perresrmsd.h5")
+    lengths = [len(block) for block in lazy.iter_blocks(7, block_size=15000)]
+    assert sum(lengths) == len(lazy)
+    assert all(length % 7 == 0 for length in lengths[:-1])
+    lazy.close()
+
+def test_level(tmpdir):
+    import h5py
+    from moldynplot.cpptraj2hdf5 import write_pyramid
+    from moldynplot.formats import HDF5TimeSeries, read_hdf5
+
+    path = str(tmpdir.join("perresrmsd.h5"))
+    with h5py.File("data/p53/perresrmsd.h5", "r") as in_h5:
+        with h5py.File(path, "w") as out_h5:
+            for key in in_h5:
+                in_h5.copy(key, out_h5)
+            for key, value in in_h5.attrs.items():
+                out_h5.attrs[key] = value
+            write_pyramid(out_h5, [10, 100], verbose=0)
+    df = read_hdf5("data/p53/perresrmsd.h5")
+    assert_allclose(read_hdf5(path).values, df.values)
+
+    # Select coarsest level dividing interval, and rows within window
+    lazy = HDF5TimeSeries(path)
+    assert lazy.pyramid_factors == [10, 100]
+    level, remaining = lazy.iloc[100:].get_level(200)
+    assert remaining == 2
+    reduced = np.reshape(df.values[100:100 + len(level) * 100],
+      (len(level), 100, -1))
+    assert_allclose(level.values, reduced.mean(axis=1), rtol=1e-6)
+    level, remaining = lazy[["PRO:12"]].get_level(30, "max")
+    assert remaining == 3
+    assert_allclose(level.values[:,0], np.reshape(df["PRO:12"].values[
+      :len(level) * 10], (-1, 10)).max(axis=1))
+    assert lazy.get_level(7)[1] == 7
+
+    # Use no level if rows of view are not aligned to its intervals
+    assert lazy.iloc[55:].get_level(200)[1] == 200
+    assert lazy.iloc[50:].get_level(200)[1] == 20
+    lazy.close()
+
+def test_window():
+    from pandas.testing import assert_frame_equal
+    from moldynplot.formats import HDF5TimeSeries, read_cpptraj, select_window
+
+    # Parse only lines of cpptraj within window, across blocks
+    df = read_cpptraj("data/p53/perresrmsd.cpptraj")
+    for frames in [(101, 5000, 7), (None, 33, None), (9990, None, 3)]:
+        for n_threads in [1, 3]:
+            assert_frame_equal(read_cpptraj("data/p53/perresrmsd.cpptraj",
+              n_threads=n_threads, frames=frames), select_window(df, *frames))
+
+    # Select hyperslab of hdf5
+    df = read_infile("data/p53/perresrmsd.h5")
+    lazy = HDF5TimeSeries("data/p53/perresrmsd.h5")
+    assert_frame_equal(select_window(lazy, 100.0, 500.0, 0.7).load(),
+      df.loc[100.0:500.0].iloc[::7])
+    lazy.close()
+
+def test_residues():
+    from pandas.testing import assert_frame_equal
+    from moldynplot.formats import read_cpptraj, select_residues
+
+    # Select by number, range, name, and regular expression
+    df = read_cpptraj("data/p53/perresrmsd.cpptraj")
+    assert select_residues(df.columns, "3-5") == ["THR:3", "PHE:4", "SER:5"]
+    assert select_residues(df.columns, [12, "LEU:7", "GL.:.*"]) == [
+      "GLU:2", "LEU:7", "PRO:12", "GLU:13"]
+
+    # Parse only selected fields of cpptraj
+    for n_threads in [1, 3]:
+        assert_frame_equal(read_cpptraj("data/p53/perresrmsd.cpptraj",
+          n_threads=n_threads, columns=["PRO:12", "GLU:2"]),
+          df[["PRO:12", "GLU:2"]])
+
+def test_dtype():
+    import pandas as pd
+    from moldynplot.formats import cast_dtype, get_dtype, read_cpptraj
+
+    # Resolve data types, including those of kinds of cpptraj output
+    assert get_dtype("float32") == np.float32
+    assert get_dtype("secstruct") == np.uint8
+    assert get_dtype(None) is None
+
+    # Cast without truncating values
+    df = pd.DataFrame(dict(a=[0.0, 3.0], b=[0.5, 1.0], c=[-1, 2]))
+    cast_df = cast_dtype(df, "uint8")
+    assert list(cast_df.dtypes) == [np.uint8, np.float64, np.int64]
+    assert cast_dtype(cast_df, None) is cast_df
+
+    # Parse directly into single precision
+    df = read_cpptraj("data/p53/perresrmsd.cpptraj")
+    single_df = read_cpptraj("data/p53/perresrmsd.cpptraj", np.float32)
+    assert (single_df.dtypes == np.float32).all()
+    assert single_df.values.nbytes * 2 == df.values.nbytes
+    assert_allclose(single_df.values, df.values.astype(np.float32))
+
+    # Peak memory is reduced by parsing into single precision; measured
+    # where supported (Python 3)
+    try:
+        import tracemalloc
+    except ImportError:
+        return
+    peaks = []
+    for dtype in [None, np.float32]:
+        tracemalloc.start()
+        read_cpptraj("data/p53/perresrmsd.cpptraj", dtype)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < peaks[0]
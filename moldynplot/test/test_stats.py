@@ -0,0 +1,197 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#   test_stats.py
+#
+#   Copyright (C) 2015-2016 Karl T Debiec
+#   All rights reserved.
+#
+#   This software may be modified and distributed under the terms of the
+#   BSD license. See the LICENSE file for details.
+################################### MODULES ###################################
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+from scipy.stats.mstats import mode
+from moldynplot.stats import (autocorrelation_se, binned_kde, block_mode,
+  blocking_se, calc_pdist, calc_pdists, calc_se, calc_summary, decimate,
+  histogram, merge_summaries, norm_kde, summarize, summary_to_df,
+  summary_to_sequence_df)
+################################## FUNCTIONS ##################################
+def scipy_block_mode(blocks):
+    return np.reshape(np.ma.filled(mode(blocks, axis=1)[0], np.nan),
+      (blocks.shape[0], blocks.shape[2]))
+
+def test_block_mode():
+    random = np.random.RandomState(0)
+
+    # Integer, negative integer, and float alphabets
+    for blocks in [random.randint(0, 8, (50, 6, 7)).astype(np.uint8),
+      random.randint(-3, 4, (50, 6, 7)),
+      random.randint(0, 4, (50, 6, 7)) * 0.25]:
+        expected = scipy_block_mode(blocks)
+        assert_array_equal(block_mode(blocks), expected)
+        assert_array_equal(block_mode(blocks, max_counts=10), expected)
+        assert_array_equal(block_mode(blocks, max_alphabet=2), expected)
+
+    # Ties resolved in favor of smallest value
+    blocks = np.array([[[2, 1], [1, 2], [1, 3], [2, 3]]])
+    assert_array_equal(block_mode(blocks), [[1, 3]])
+    assert_array_equal(block_mode(blocks), scipy_block_mode(blocks))
+
+def test_decimate():
+    random = np.random.RandomState(0)
+    x = np.arange(100001) * 0.1
+    y = random.normal(size=x.size)
+    y[12345] = 50
+    y[777] = -40
+
+    # Extrema and endpoints retained, in order
+    for mode in ["minmax", "lttb"]:
+        dec_x, dec_y = decimate(x, y, 1000, mode)
+        assert 900 < dec_x.size <= 1002
+        assert np.all(np.diff(dec_x) > 0)
+        assert dec_x[0] == x[0] and dec_x[-1] == x[-1]
+        assert dec_y.max() == 50 and dec_y.min() == -40
+
+    # Short time series unchanged
+    dec_x, dec_y = decimate(x[:100], y[:100], 1000)
+    assert_array_equal(dec_y, y[:100])
+
+def test_kde():
+    from sklearn.neighbors import KernelDensity
+
+    random = np.random.RandomState(0)
+    values = np.concatenate((random.normal(1.0, 0.3, 20000),
+      random.normal(3.0, 0.5, 10000)))
+    grid = np.linspace(0.0, 5.0, 100)
+
+    # Compare binned estimate to that of sklearn
+    for kernel in ["gaussian", "epanechnikov", "exponential"]:
+        kde = KernelDensity(bandwidth=0.1, kernel=kernel)
+        kde.fit(values[:, np.newaxis])
+        expected = np.exp(kde.score_samples(grid[:, np.newaxis]))
+        assert_allclose(binned_kde(values, grid, 0.1, kernel), expected,
+          atol=1e-3 * expected.max())
+
+    # Non-finite values are disregarded
+    assert_array_equal(binned_kde(np.append(values, np.nan), grid, 0.1),
+      binned_kde(values, grid, 0.1))
+
+def test_histogram():
+    values = np.array([0.1, 0.9, 1.1, 1.2, 2.6, np.nan])
+    assert_allclose(histogram(values, [0.0, 1.0, 2.0, 3.0]),
+      [0.2, 0.6, 0.0, 0.2])
+
+def test_calc_pdists():
+    random = np.random.RandomState(0)
+    values = random.normal(size=(2000, 9)) * np.arange(1, 10)
+    values[5, 3] = np.nan
+    grids = [np.linspace(-4 * i, 4 * i, 50 + i) for i in range(1, 10)]
+    bandwidths = [0.1 * i for i in range(1, 10)]
+
+    # Parallel results match serial, in order
+    for mode in ["kde", "norm", "hist"]:
+        pdists = calc_pdists(values, grids, bandwidths, mode, n_processes=3)
+        assert len(pdists) == values.shape[1]
+        for i, pdist in enumerate(pdists):
+            assert_allclose(pdist, calc_pdist(values[:,i], grids[i],
+              bandwidths[i], mode))
+
+def test_norm_kde():
+    from scipy.stats import norm
+
+    random = np.random.RandomState(0)
+    values = random.normal(5.0, 1.0, 300)
+    se = random.uniform(0.05, 0.5, 300)
+    values[[3, 10]] = np.nan
+    se[[20, 30]] = [np.nan, 0.0]
+    grid = np.linspace(0.0, 10.0, 200)
+
+    # Compare per-value bandwidths to explicit sum, in small blocks
+    expected = np.zeros_like(grid)
+    for value, scale in zip(values, se):
+        if np.isfinite(value) and np.isfinite(scale) and scale > 0:
+            expected += norm(loc=value, scale=scale).pdf(grid)
+    assert_allclose(norm_kde(values, grid, se), expected)
+    assert_allclose(norm_kde(values, grid, se, max_values=1000), expected)
+
+def test_se():
+    from scipy.signal import lfilter
+
+    # Autoregressive processes of known standard error of the mean
+    random = np.random.RandomState(0)
+    n = 2 ** 16
+    phi = np.array([0.0, 0.5, 0.9])
+    noise = random.normal(size=(n, phi.size))
+    values = np.column_stack([lfilter([1.0], [1.0, -p], noise[:,i])
+      for i, p in enumerate(phi)])
+    expected = np.sqrt((1 + phi) / (1 - phi) / (1 - phi ** 2) / n)
+
+    # Blocking, in memory and streamed in blocks not aligned to levels
+    se = blocking_se([values])
+    assert_allclose(se, expected, rtol=0.15)
+    assert_allclose(blocking_se([values[i:i + 777]
+      for i in range(0, n, 777)]), se)
+
+    # Autocorrelation
+    assert_allclose(autocorrelation_se(values), expected, rtol=0.15)
+
+def test_se_hdf5():
+    from moldynplot.formats import HDF5TimeSeries, read_hdf5
+
+    df = read_hdf5("data/p53/perresrmsd.h5")
+    lazy = HDF5TimeSeries("data/p53/perresrmsd.h5")
+    for method in ["blocking", "autocorrelation"]:
+        se = calc_se(df, method)
+        assert list(se.index) == list(df.columns)
+        assert_allclose(calc_se(lazy, method, block_size=20000), se)
+    lazy.close()
+
+def test_summary():
+    import pandas as pd
+    from moldynplot.formats import HDF5TimeSeries, read_hdf5
+
+    # Merged summaries of blocks match summary of whole, ignoring NaN
+    values = np.random.RandomState(0).normal(1e6, 2.0, (1000, 3))
+    values[5, 1] = np.nan
+    summary = merge_summaries(summarize(values[i:i + 77])
+      for i in range(0, 1000, 77))
+    df = summary_to_df(summary)
+    assert list(df["count"]) == [1000, 999, 1000]
+    assert_allclose(df["mean"], np.nanmean(values, axis=0), rtol=1e-12)
+    assert_allclose(df["std"], np.nanstd(values, axis=0, ddof=1), rtol=1e-9)
+    assert_allclose(df["min"], np.nanmin(values, axis=0))
+    assert_allclose(df["max"], np.nanmax(values, axis=0))
+
+    # Streamed from hdf5 and from text, merged across files and processes
+    expected = read_hdf5("data/p53/perresrmsd.h5")
+    lazy = HDF5TimeSeries("data/p53/perresrmsd.h5")
+    df = summary_to_df(calc_summary(lazy, block_size=20000))
+    assert_allclose(df["mean"], expected.mean(), rtol=1e-6)
+    assert_allclose(df["std"], expected.std(), rtol=1e-6)
+    lazy.close()
+    summary = calc_summary(["data/p53/perresrmsd.cpptraj"] * 2,
+      block_size=20000, n_processes=2)
+    assert_array_equal(summary["count"], 2 * len(expected))
+    assert_allclose(summary["mean"], expected.mean(), atol=1e-4)
+
+    # Sequence DataFrame, with quantities named by second column level
+    sequence_df = summary_to_sequence_df(summary, name="rmsd")
+    assert list(sequence_df.columns) == ["rmsd", "rmsd se"]
+    assert list(sequence_df.index) == list(expected.columns)
+    columns = pd.MultiIndex.from_product([["ALA:2", "GLY:1"], ["r1", "r2"]])
+    sequence_df = summary_to_sequence_df(summarize(pd.DataFrame(values[:,
+      [0, 0, 2, 2]], columns=columns)), se=np.arange(4.0))
+    assert list(sequence_df.columns) == ["r1", "r1 se", "r2", "r2 se"]
+    assert list(sequence_df.index) == ["ALA:2", "GLY:1"]
+    assert_allclose(sequence_df["r2 se"], [1.0, 3.0])
+
+if __name__ == "__main__":
+    test_block_mode()
+    test_decimate()
+    test_kde()
+    test_histogram()
+    test_calc_pdists()
+    test_norm_kde()
+    test_se()
+    test_se_hdf5()
+    test_summary()
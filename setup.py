@@ -6,8 +6,7 @@ setup(
     name             = "MolDynPlot",
     version          = "0.1",
     packages         = ["moldynplot",
-                        "moldynplot.myplotspec",
-                        "moldynplot.fpblockaverager"],
+                        "moldynplot.myplotspec"],
     license          = "BSD 3-clause",
     long_description = open("README.rst").read()
 )